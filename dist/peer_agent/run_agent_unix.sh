@@ -13,4 +13,4 @@ if [[ -z "${SATYAGRAH_SECRET:-}" ]]; then
 fi
 
 mkdir -p "$INBOX" "$OUTBOX"
-python -m satyagrah.peer.agent run --inbox "$INBOX" --outbox "$OUTBOX" --state "$STATE" --config "$CFG" --panel-port 8090 $SDHOST
+python -m satyagrah.peer.agent run --inbox "$INBOX" --outbox "$OUTBOX" --state "$STATE" --config "$CFG" --home "$ROOT" --panel-port 8090 $SDHOST
@@ -18,5 +18,5 @@ REM ensure folders
 if not exist "%INBOX%" mkdir "%INBOX%"
 if not exist "%OUTBOX%" mkdir "%OUTBOX%"
 
-python -m satyagrah.peer.agent run --inbox "%INBOX%" --outbox "%OUTBOX%" --state "%STATE%" --config "%CFG%" --panel-port 8090 %SDHOST%
+python -m satyagrah.peer.agent run --inbox "%INBOX%" --outbox "%OUTBOX%" --state "%STATE%" --config "%CFG%" --home "%ROOT%." --panel-port 8090 %SDHOST%
 pause
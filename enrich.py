@@ -27,11 +27,12 @@ def make_pdf(file_paths: List[str], out_path: str, title: str="AISatyagrah Expor
         c.setFont("Helvetica",10); c.drawString(2*cm,y,p); y-=0.7*cm
     c.save(); return out_path
 
-def make_pptx(image_paths: List[str], out_path: str, title: str="AISatyagrah Export") -> str:
+def make_pptx(image_paths: List[str], out_path: str, title: str="AISatyagrah Export",
+              cache_dir: str|Path|None=None) -> str:
     try:
         from pptx import Presentation
         from pptx.util import Inches, Pt
-        from PIL import Image
+        from satyagrah.utils.pptximg import DeckImages
     except Exception:
         Path(out_path).with_suffix(".txt").write_text(
             "Install python-pptx & Pillow:  pip install python-pptx Pillow\n", encoding="utf-8")
@@ -40,13 +41,13 @@ def make_pptx(image_paths: List[str], out_path: str, title: str="AISatyagrah Exp
     slide = prs.slides.add_slide(prs.slide_layouts[5])
     tx = slide.shapes.add_textbox(Inches(0.5), Inches(0.3), Inches(9), Inches(1))
     tf = tx.text_frame; tf.text = title; tf.paragraphs[0].font.size = Pt(28)
+    deck = DeckImages(cache_dir=cache_dir)
     x,y,col = 0.5,1.1,0
     for p in image_paths:
         try:
-            Image.open(p).close()
+            deck.add_picture(slide.shapes, p, Inches(x), Inches(y), width=Inches(3.2))
         except Exception:
             continue
-        slide.shapes.add_picture(p, Inches(x), Inches(y), width=Inches(3.2))
         col += 1; x += 3.4
         if col==3:
             col=0; x=0.5; y+=2.6
@@ -88,7 +89,8 @@ def export_all(root: Path, date: str, kind: str) -> Dict[str,str]:
     # PPTX
     if kind in ("all","pptx"):
         pptx_path = outdir / f"export_{date}_{stamp}.pptx"
-        artifacts["pptx"] = make_pptx(images, str(pptx_path), title=f"AISatyagrah Export — {date}")
+        artifacts["pptx"] = make_pptx(images, str(pptx_path), title=f"AISatyagrah Export — {date}",
+                                      cache_dir=Path(root).parent / "data" / "cache" / "pptx")
 
     # Lightweight GIF/MP4 placeholders (upgrade later to real ffmpeg calls)
     if kind in ("all","gif"):
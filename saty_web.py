@@ -386,15 +386,15 @@ def get_outbox_path(root: Path, run_date: str) -> Path:
 
 
 def zip_outbox(root: Path, run_date: str) -> Path:
-    import zipfile
+    from satyagrah.utils.zipper import SmartZip  # media stored, text deflated in parallel
     outbox = get_outbox_path(root, run_date)
     zip_path = root / "exports" / run_date / f"outbox_{run_date}.zip"
     zip_path.parent.mkdir(parents=True, exist_ok=True)
-    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+    with SmartZip(zip_path) as z:
         if outbox.exists():
-            for p in outbox.rglob("*"):
+            for p in sorted(outbox.rglob("*")):
                 if p.is_file():
-                    z.write(p, p.relative_to(outbox))
+                    z.add(p, p.relative_to(outbox).as_posix())
     return zip_path
 
 
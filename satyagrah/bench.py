@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks for the export pipelines.
+
+Each case runs in a fresh child process so peak RSS is measured per variant.
+
+  python -m satyagrah.bench gif --frames 120
+  python -m satyagrah.bench mp4 --frames 120 --preset fast
+  python -m satyagrah.bench zip --images 500
+  python -m satyagrah.bench pdf --rows 50000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List
+
+
+# ---------- measurement ----------
+def _rss() -> int:
+    try:
+        import psutil
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        pass
+    try:
+        import resource
+        return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024
+    except Exception:
+        return 0
+
+
+def _measure(fn: Callable[..., object], *args) -> Dict[str, float]:
+    """Run fn(*args) while sampling RSS; returns seconds and peak RSS growth (MB)."""
+    base = _rss()
+    peak = [base]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.is_set():
+            peak[0] = max(peak[0], _rss())
+            stop.wait(0.005)
+
+    t = threading.Thread(target=sample, daemon=True)
+    t.start()
+    t0 = time.perf_counter()
+    try:
+        extra = fn(*args)
+    finally:
+        dt = time.perf_counter() - t0
+        stop.set(); t.join()
+    peak[0] = max(peak[0], _rss())
+    out = {"sec": round(dt, 3), "peak_mb": round((peak[0] - base) / 1e6, 1)}
+    if isinstance(extra, dict):
+        out.update(extra)
+    return out
+
+
+def _isolated(fn: Callable[..., object], *args) -> Dict[str, float]:
+    with ProcessPoolExecutor(max_workers=1) as ex:
+        return ex.submit(_measure, fn, *args).result()
+
+
+def _report(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    print(f"== {title}")
+    for name, r in rows.items():
+        print(f"  {name:<14} " + "  ".join(f"{k}={v}" for k, v in r.items()))
+
+
+# ---------- fixtures ----------
+def _make_images(folder: Path, n: int, size=(1024, 1280), fmt: str = "JPEG") -> List[Path]:
+    from PIL import Image, ImageDraw
+    folder.mkdir(parents=True, exist_ok=True)
+    ext = ".jpg" if fmt == "JPEG" else ".png"
+    rnd = random.Random(1234)
+    base = Image.effect_noise(size, 48).convert("RGB")
+    out = []
+    for i in range(n):
+        im = base.copy()
+        d = ImageDraw.Draw(im)
+        for _ in range(12):
+            x, y = rnd.randrange(size[0]), rnd.randrange(size[1])
+            d.rectangle([x, y, x + 200, y + 160], fill=(rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)))
+        d.text((24, 24), f"frame {i}", fill=(255, 255, 255))
+        p = folder / f"img_{i:04d}{ext}"
+        im.save(p, fmt, quality=90) if fmt == "JPEG" else im.save(p, fmt)
+        out.append(p)
+    return out
+
+
+# ---------- gif ----------
+def _gif_legacy(paths: List[Path], out: Path):
+    from PIL import Image
+    frames = [Image.open(p).convert("RGB") for p in paths]
+    frames[0].save(out, save_all=True, append_images=frames[1:], optimize=True, duration=100, loop=0, format="GIF")
+    return {"out_kb": out.stat().st_size // 1024}
+
+
+def _gif_stream(paths: List[Path], out: Path, width: int):
+    from .utils.gifstream import write_gif
+    n = write_gif(paths, out, width=width, duration_ms=100)
+    return {"frames": n, "out_kb": out.stat().st_size // 1024}
+
+
+def bench_gif(frames: int, width: int, fmt: str, legacy: bool) -> None:
+    with tempfile.TemporaryDirectory() as td:
+        paths = _make_images(Path(td) / "src", frames, fmt=fmt)
+        rows = {"stream": _isolated(_gif_stream, paths, Path(td) / "s.gif", width)}
+        if legacy:
+            rows["legacy"] = _isolated(_gif_legacy, paths, Path(td) / "l.gif")
+        _report(f"gif: {frames} x 1024x1280 {fmt}, width={width}", rows)
+
+
+# ---------- mp4 ----------
+def _mp4_moviepy(paths: List[Path], out: Path, fps: float):
+    try:
+        from moviepy import ImageSequenceClip  # moviepy 2.x
+    except Exception:
+        from moviepy.editor import ImageSequenceClip  # moviepy 1.x
+    from .utils.mp4pipe import ffmpeg_exe
+    os.environ["IMAGEIO_FFMPEG_EXE"] = ffmpeg_exe()
+    t0 = time.perf_counter()
+    clip = ImageSequenceClip([str(p) for p in paths], fps=fps)
+    clip.write_videofile(str(out), codec="libx264", audio=False, ffmpeg_params=["-pix_fmt", "yuv420p"], logger=None)
+    dt = time.perf_counter() - t0
+    return {"frames": len(paths), "fps": round(len(paths) / dt, 2), "out_kb": out.stat().st_size // 1024}
+
+
+def _mp4_pipe(paths: List[Path], out: Path, fps: float, preset: str):
+    from .utils.mp4pipe import encode_mp4
+    st = encode_mp4(paths, out, fps=fps, preset=preset)
+    return {"frames": st["frames"], "fps": st["fps"], "out_kb": out.stat().st_size // 1024}
+
+
+def bench_mp4(frames: int, fps: float, preset: str, legacy: bool) -> None:
+    with tempfile.TemporaryDirectory() as td:
+        paths = _make_images(Path(td) / "src", frames)
+        rows = {f"pipe/{preset}": _isolated(_mp4_pipe, paths, Path(td) / "p.mp4", fps, preset)}
+        if legacy:
+            try:
+                rows["moviepy"] = _isolated(_mp4_moviepy, paths, Path(td) / "m.mp4", fps)
+            except ImportError:
+                print("  (moviepy not installed; skipping legacy path)")
+        _report(f"mp4: {frames} x 1024x1280 JPEG @ {fps} fps", rows)
+
+
+# ---------- zip ----------
+def _zip_legacy(files: List[Path], root: Path, out: Path):
+    import zipfile
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as z:
+        for p in files:
+            z.write(p, arcname=p.relative_to(root).as_posix())
+    return {"out_mb": round(out.stat().st_size / 1e6, 1)}
+
+
+def _zip_smart(files: List[Path], root: Path, out: Path):
+    from .utils.zipper import SmartZip
+    with SmartZip(out) as z:
+        for p in files:
+            z.add(p, p.relative_to(root).as_posix())
+    return {"out_mb": round(out.stat().st_size / 1e6, 1), **z.stats}
+
+
+def bench_zip(images: int, fmt: str, legacy: bool) -> None:
+    import json
+    with tempfile.TemporaryDirectory() as td:
+        root = Path(td)
+        run = root / "data" / "runs" / "2025-01-01"
+        files = _make_images(run / "art", images, fmt=fmt)
+        caps = {f"/data/runs/2025-01-01/art/{p.name}": {"caption": "lorem ipsum " * 20, "hashtags": ["#satire"]} for p in files}
+        (run / "captions.json").write_text(json.dumps(caps, indent=2), encoding="utf-8")
+        for i in range(images // 10):
+            (run / "prompts").mkdir(exist_ok=True)
+            (run / "prompts" / f"t{i}.prompt.json").write_text(json.dumps({"positive": "poster " * 50}), encoding="utf-8")
+        files = sorted(p for p in run.rglob("*") if p.is_file())
+        rows = {"smart": _isolated(_zip_smart, files, root, root / "s.zip")}
+        if legacy:
+            rows["deflate-all"] = _isolated(_zip_legacy, files, root, root / "l.zip")
+        _report(f"zip: {images} x 1024x1280 {fmt} + captions/prompts", rows)
+
+
+# ---------- pdf ----------
+def _pdf_rows(n: int):
+    for i in range(n):
+        yield {"id": i + 1, "timestamp": f"2025-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}Z",
+               "value": round(200 + (i % 97) * 1.5, 2), "status": "ok" if i % 4 else "peak",
+               "note": "lorem ipsum dolor sit amet " * (1 + i % 3)}
+
+
+def _pdf_legacy(n: int, out: Path):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.platypus import Table, TableStyle
+    rows = list(_pdf_rows(n))
+    c = canvas.Canvas(str(out), pagesize=A4); W, H = A4
+    data = [list(rows[0].keys())] + [list(r.values()) for r in rows]
+    tbl = Table(data, colWidths=[(W - 144) / len(data[0])] * len(data[0]))
+    tbl.setStyle(TableStyle([("GRID", (0, 0), (-1, -1), 0.25, colors.grey), ("FONTSIZE", (0, 0), (-1, -1), 9)]))
+    tbl.wrapOn(c, 72, H - 120); tbl.drawOn(c, 72, 72)
+    c.showPage(); c.save()
+    return {"pages": 1, "out_mb": round(out.stat().st_size / 1e6, 1)}
+
+
+def _pdf_paged(n: int, out: Path):
+    from .utils.pdftable import write_table_pdf
+    st = write_table_pdf(out, _pdf_rows(n))
+    return {"pages": st["pages"], "pages_per_sec": st["pages_per_sec"], "out_mb": round(out.stat().st_size / 1e6, 1)}
+
+
+def bench_pdf(rows: int, legacy: bool) -> None:
+    with tempfile.TemporaryDirectory() as td:
+        res = {"paged": _isolated(_pdf_paged, rows, Path(td) / "p.pdf")}
+        if legacy:
+            res["one-table"] = _isolated(_pdf_legacy, rows, Path(td) / "l.pdf")
+        _report(f"pdf: {rows} rows x 5 columns", res)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="satyagrah.bench", description="Export pipeline benchmarks")
+    sub = ap.add_subparsers(dest="case", required=True)
+
+    g = sub.add_parser("gif", help="streaming GIF writer vs. all-frames-in-memory")
+    g.add_argument("--frames", type=int, default=120)
+    g.add_argument("--width", type=int, default=480)
+    g.add_argument("--format", choices=["JPEG", "PNG"], default="JPEG")
+    g.add_argument("--no-legacy", action="store_true")
+
+    m = sub.add_parser("mp4", help="ffmpeg pipe encoder vs. moviepy ImageSequenceClip")
+    m.add_argument("--frames", type=int, default=120)
+    m.add_argument("--fps", type=float, default=2.0)
+    m.add_argument("--preset", choices=["fast", "balanced", "quality"], default="balanced")
+    m.add_argument("--no-legacy", action="store_true")
+
+    z = sub.add_parser("zip", help="store-media/parallel-deflate zip writer vs. ZIP_DEFLATED everything")
+    z.add_argument("--images", type=int, default=500)
+    z.add_argument("--format", choices=["JPEG", "PNG"], default="JPEG")
+    z.add_argument("--no-legacy", action="store_true")
+
+    d = sub.add_parser("pdf", help="paged table engine vs. a single reportlab Table")
+    d.add_argument("--rows", type=int, default=50000)
+    d.add_argument("--no-legacy", action="store_true")
+
+    args = ap.parse_args(argv)
+    if args.case == "gif":
+        bench_gif(args.frames, args.width, args.format, not args.no_legacy)
+    elif args.case == "mp4":
+        bench_mp4(args.frames, args.fps, args.preset, not args.no_legacy)
+    elif args.case == "zip":
+        bench_zip(args.images, args.format, not args.no_legacy)
+    elif args.case == "pdf":
+        bench_pdf(args.rows, not args.no_legacy)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
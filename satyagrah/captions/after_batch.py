@@ -7,6 +7,8 @@ Usage:
 import argparse, json, datetime, re
 from pathlib import Path
 from .build import build_for, latest_run_date
+from ..utils import filecache
+from ..utils.shortlist import read_ids as _read_ids
 
 def _safe_read_text(p: Path):
     try:
@@ -111,26 +113,9 @@ def _ensure_topic_in_facts(facts_path: Path, runs_root: Path, date: str, topic_i
     facts["topics"] = topics
     facts_path.parent.mkdir(parents=True, exist_ok=True)
     facts_path.write_text(json.dumps(facts, indent=2, ensure_ascii=False), encoding="utf-8")
+    filecache.invalidate(facts_path)  # the web UI reads facts.json through the cache
     return True
 
-def _read_ids(shortlist_path: Path):
-    data = _safe_read_json(shortlist_path)
-    ids = []
-    if isinstance(data, list):
-        for x in data:
-            if isinstance(x, str):
-                ids.append(x)
-            elif isinstance(x, dict):
-                ids.append(x.get("id") or x.get("topic_id") or x.get("slug"))
-    elif isinstance(data, dict):
-        seq = data.get("items") or data.get("topics") or data.get("ids") or []
-        for x in seq:
-            if isinstance(x, str):
-                ids.append(x)
-            elif isinstance(x, dict):
-                ids.append(x.get("id") or x.get("topic_id") or x.get("slug"))
-    return [i for i in ids if i]
-
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--date", default="latest")
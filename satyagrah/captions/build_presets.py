@@ -10,6 +10,7 @@ Writes:
 """
 import argparse, csv, datetime, json
 from pathlib import Path
+from ..utils.shortlist import read_ids
 from typing import List
 from .build import build_for, latest_run_date
 from .presets import PRESETS
@@ -107,13 +108,7 @@ def main():
         sl = runs / date / "shortlist.json"
         if not sl.exists():
             raise SystemExit(f"shortlist not found: {sl}")
-        data = json.loads(sl.read_text(encoding="utf-8"))
-        if isinstance(data, list):
-            ids = [x if isinstance(x, str) else (x.get("id") or x.get("topic_id") or x.get("slug")) for x in data]
-        else:
-            seq = data.get("items") or data.get("topics") or data.get("ids") or []
-            ids = [x if isinstance(x, str) else (x.get("id") or x.get("topic_id") or x.get("slug")) for x in seq]
-        ids = [i for i in ids if i]
+        ids = read_ids(sl)
         if args.top and args.top>0: ids = ids[:args.top]
     elif args.id:
         ids = [args.id]
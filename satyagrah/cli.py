@@ -36,8 +36,12 @@ def main(argv=None):
     p_prompt.add_argument("--risk")
 
     # image
-    p_image = sub.add_parser("image", help="Generate image for topic id")
-    p_image.add_argument("--id", required=True)
+    p_image = sub.add_parser("image", help="Generate image for topic id (or --all topics of the date)")
+    p_image.add_argument("--id")
+    p_image.add_argument("--all", action="store_true", help="render every shortlisted topic of the date")
+    p_image.add_argument("--hosts", help="comma-separated SD hosts for --all (default: --host)")
+    p_image.add_argument("--concurrency", type=int, default=1, help="concurrent renders per host for --all")
+    p_image.add_argument("--force", action="store_true", help="re-render heroes that already match their prompt")
 
     # exports
     for kind in ("csv", "pdf", "pptx", "gif", "mp4", "zip"):
@@ -99,7 +103,16 @@ def main(argv=None):
         print(out)
         return 0
 
+    if args.cmd == "image" and args.all:
+        from .image.batch import generate_images, print_summary
+        hosts = [h.strip() for h in (args.hosts or args.host).split(",") if h.strip()]
+        summary = generate_images(date, hosts=hosts, per_host=args.concurrency, seed=args.seed, force=args.force)
+        print_summary(summary)
+        return 1 if summary["failed"] else 0
+
     if args.cmd == "image":
+        if not args.id:
+            parser.error("image: give --id or --all")
         from .image import generate_image_for_id
         out = generate_image_for_id(args.id, date, host=args.host)
         print(out)
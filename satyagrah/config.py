@@ -5,16 +5,16 @@ try:
 except Exception:
     yaml = None  # graceful fallback if PyYAML missing
 
+from .utils import filecache
+
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 
 def _read_yaml(path: pathlib.Path) -> dict:
-    if not path.exists() or yaml is None:
-        return {}
-    try:
-        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
-        return data if isinstance(data, dict) else {}
-    except Exception:
+    if yaml is None:
         return {}
+    # cached per (mtime, size): settings.yaml is read on every SD call
+    data = filecache.load_yaml(path, {}) or {}
+    return data if isinstance(data, dict) else {}
 
 def load_feeds_yaml() -> dict:
     """Return {'rss': [...]} from configs/feeds.yaml (if present)."""
@@ -1,17 +1,24 @@
 # satyagrah/core/status.py
 from __future__ import annotations
 import os
-import socket
+import random
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import urlparse
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
 
 from .config import RUNS, EXPORTS, SD_HOST, SECRET, ensure_dirs
+from ..image.sdapi import get_client, stats as sd_stats
 
 ensure_dirs()
 
+# Background prober: /api/status and /dash read the latest snapshot instead of
+# probing SD and walking EXPORTS on every request.
+PROBE_INTERVAL_SEC = float(os.getenv("SATYAGRAH_STATUS_INTERVAL", "15"))
+PROBE_MAX_BACKOFF_SEC = 300.0   # SD probe interval cap while the host is down
+PROBE_JITTER = 0.2              # +/- fraction applied to every sleep
+
 def _fmt_dt(ts: float | int | None) -> str | None:
     if not ts:
         return None
@@ -34,6 +41,55 @@ def _latest_dir_info(base: Path) -> tuple[str | None, float | None]:
     except Exception:
         return (None, None)
 
+class _ExportTree:
+    """
+    File names under EXPORTS, maintained incrementally: every directory is
+    stat'ed per refresh, but only those whose mtime changed are re-listed.
+    """
+    def __init__(self, base: Path):
+        self.base = base
+        self._dirs: dict[str, tuple[int, list[str], list[str]]] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return self._walk()
+
+    def _walk(self) -> list[str]:
+        out: list[str] = []
+        seen = set()
+        stack = [str(self.base)]
+        while stack:
+            d = stack.pop()
+            try:
+                mt = os.stat(d).st_mtime_ns
+            except OSError:
+                continue
+            seen.add(d)
+            cached = self._dirs.get(d)
+            if cached is None or cached[0] != mt:
+                files, subdirs = [], []
+                try:
+                    with os.scandir(d) as it:
+                        for e in it:
+                            try:
+                                if e.is_dir(follow_symlinks=False):
+                                    subdirs.append(e.path)
+                                elif e.is_file():
+                                    files.append(e.name)
+                            except OSError:
+                                pass
+                except OSError:
+                    continue
+                cached = self._dirs[d] = (mt, files, subdirs)
+            out.extend(cached[1])
+            stack.extend(cached[2])
+        for gone in set(self._dirs) - seen:
+            del self._dirs[gone]
+        return out
+
+_exports = _ExportTree(EXPORTS)
+
 def _count_exports_for_hint(hint: str | None) -> int:
     """
     Best-effort count of exports associated with the latest run.
@@ -41,36 +97,25 @@ def _count_exports_for_hint(hint: str | None) -> int:
     as a substring; otherwise return total file count.
     """
     try:
+        names = _exports.names()
         if hint:
-            return sum(1 for p in EXPORTS.rglob("*") if p.is_file() and hint in p.name)
-        return sum(1 for p in EXPORTS.rglob("*") if p.is_file())
+            return sum(1 for n in names if hint in n)
+        return len(names)
     except Exception:
         return 0
 
 def _check_host_reachable(url: str, timeout: float = 1.5) -> bool:
     """
-    Lightweight reachability check using stdlib (no requests dependency).
-    We try a HEAD/GET to the root of SD_HOST. Any response (even 403) counts
-    as reachable; only connection failures are 'down'.
+    Lightweight reachability check on the shared keep-alive SD client.
+    We GET the root of SD_HOST. Any response (even 403) counts as
+    reachable; only connection failures are 'down'.
     """
-    try:
-        parsed = urlparse(url)
-        if not parsed.scheme:
-            return False
-        # Some SD servers don't like HEAD on root; fall back to GET.
-        req = Request(url, method="GET")
-        with urlopen(req, timeout=timeout) as resp:
-            return resp.status > 0
-    except (HTTPError, URLError, socket.timeout, ValueError):
-        return False
-    except Exception:
+    if not urlparse(url).scheme:
         return False
+    return get_client(url).probe("/", timeout=timeout) is not None
 
-def get_status() -> dict:
-    """Produce a status snapshot used by /dash and /api/status."""
-    # Reachability and secret
-    sd_host = SD_HOST
-    sd_reachable = _check_host_reachable(sd_host)
+def _local_status() -> dict:
+    """Everything except the SD probe; cheap enough to run inline."""
     secret_set = bool(SECRET)
 
     # Telegram configured?
@@ -84,10 +129,85 @@ def get_status() -> dict:
     exports_count_for_latest = _count_exports_for_hint(latest_name)
 
     return {
-        "sd_host": sd_host,
-        "sd_reachable": sd_reachable,
+        "sd_host": SD_HOST,
         "secret_set": secret_set,
         "telegram_configured": telegram_configured,
         "latest_run_date": latest_run_date,
         "exports_count_for_latest": exports_count_for_latest,
     }
+
+_lock = threading.Lock()
+_snapshot: dict = {}
+_snapshot_at = 0.0
+_sd = {"reachable": None, "checked_at": 0.0, "failures": 0}
+_prober: threading.Thread | None = None
+_wake = threading.Event()
+
+def _jitter(sec: float) -> float:
+    return sec * random.uniform(1 - PROBE_JITTER, 1 + PROBE_JITTER)
+
+def _probe_loop() -> None:
+    global _snapshot, _snapshot_at
+    next_sd = 0.0
+    while True:
+        now = time.time()
+        if now >= next_sd:
+            ok = _check_host_reachable(SD_HOST)
+            with _lock:
+                _sd["reachable"], _sd["checked_at"] = ok, time.time()
+                _sd["failures"] = 0 if ok else _sd["failures"] + 1
+                fails = _sd["failures"]
+            # exponential backoff while SD is down, back to the base interval once it answers
+            delay = min(PROBE_MAX_BACKOFF_SEC, PROBE_INTERVAL_SEC * (2 ** fails)) if fails else PROBE_INTERVAL_SEC
+            next_sd = time.time() + _jitter(delay)
+        try:
+            local = _local_status()
+        except Exception:
+            local = None
+        if local is not None:
+            with _lock:
+                _snapshot, _snapshot_at = local, time.time()
+        _wake.wait(_jitter(PROBE_INTERVAL_SEC))
+        if _wake.is_set():
+            _wake.clear()
+            next_sd = 0.0
+
+def start_prober() -> None:
+    """Start the background prober once per process (idempotent)."""
+    global _prober
+    with _lock:
+        if _prober is not None and _prober.is_alive():
+            return
+        _prober = threading.Thread(target=_probe_loop, name="status-prober", daemon=True)
+        _prober.start()
+
+def request_probe() -> None:
+    """Ask the prober to re-check everything (including SD) now instead of at its next tick."""
+    _wake.set()
+
+def get_status() -> dict:
+    """
+    Latest status snapshot used by /dash and /api/status. Returns instantly:
+    values come from the background prober, ``age_sec`` says how old they are
+    and ``sd_reachable`` is None until the first SD probe has finished.
+    """
+    global _snapshot, _snapshot_at
+    start_prober()
+    with _lock:
+        snap, at = _snapshot, _snapshot_at
+    if not snap:
+        # first call races the prober's first pass; the local part is cheap
+        snap, at = _local_status(), time.time()
+        with _lock:
+            if not _snapshot:
+                _snapshot, _snapshot_at = snap, at
+    with _lock:
+        sd = dict(_sd)
+    return {
+        **snap,
+        "sd_reachable": sd["reachable"],
+        "sd_checked_at": _fmt_dt(sd["checked_at"]),
+        "sd_failures": sd["failures"],
+        "sd_latency": sd_stats(),
+        "age_sec": round(max(0.0, time.time() - at), 1),
+    }
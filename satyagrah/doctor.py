@@ -44,6 +44,19 @@ def http_ok(url: str, timeout=3.0):
     except (URLError, HTTPError, TimeoutError, OSError, NameError):
         return False
 
+def sd_reachable(host: str, timeout=3.0):
+    """Any non-5xx answer on the root, /docs or the models list counts (one pooled connection)."""
+    try:
+        from .image.sdapi import get_client
+    except Exception:
+        return http_ok(host) or http_ok(host + "/docs") or http_ok(host + "/sdapi/v1/sd-models")
+    cli = get_client(host)
+    for path in ("/", "/docs", "/sdapi/v1/sd-models"):
+        code = cli.probe(path, timeout=timeout)
+        if code is not None and 200 <= code < 500:
+            return True
+    return False
+
 def ensure_sample_facts(facts_path: Path):
     if facts_path.exists(): return True
     sample = {
@@ -92,7 +105,7 @@ def _run(strict=False, fix=False, host=None):
     # 3) SD host
     host = (host or os.getenv("SATYAGRAH_SD_HOST", "http://127.0.0.1:7860")).rstrip("/")
     p(f"• Checking SD host: {host}")
-    sd_ok = http_ok(host) or http_ok(host + "/docs") or http_ok(host + "/sdapi/v1/sd-models")
+    sd_ok = sd_reachable(host)
     p(f"  - reachable: {'YES' if sd_ok else 'NO'}")
     if not sd_ok: failures.append("sd:unreachable")
 
@@ -1,22 +1,16 @@
 ﻿from __future__ import annotations
-import csv, io, os, zipfile, math, datetime as dt
+import csv, io, os, math, datetime as dt
 from pathlib import Path
 from typing import Iterable, Dict, Any, List
 
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle
-from reportlab.lib import colors
 from pptx import Presentation
 from pptx.util import Inches
+from .utils.zipper import write_zip as _smart_zip
+from .utils.pdftable import write_table_pdf
 try:
     from PIL import Image, ImageDraw
 except Exception:
     Image = None
-try:
-    import imageio.v3 as iio
-except Exception:
-    iio = None
 
 def _ensure_dir(p: Path) -> None:
     p.parent.mkdir(parents=True, exist_ok=True)
@@ -37,19 +31,9 @@ def write_csv(path: Path, rows: Iterable[Dict[str, Any]]) -> None:
         w = csv.DictWriter(f, fieldnames=fields); w.writeheader()
         for r in rows: w.writerow(r)
 
-def write_pdf(path: Path, rows: Iterable[Dict[str, Any]], title="AISatyagrah Export") -> None:
-    _ensure_dir(path); rows = list(rows)
-    c = canvas.Canvas(str(path), pagesize=A4); W,H = A4
-    c.setTitle(title); c.setFont("Helvetica-Bold", 18); c.drawString(72, H-72, title)
-    c.setFont("Helvetica", 10); c.drawRightString(W-72, H-68, dt.datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"))
-    if rows:
-        data = [list(rows[0].keys())] + [list(r.values()) for r in rows]
-        tbl = Table(data, colWidths=[(W-144)/len(data[0])]*len(data[0]))
-        tbl.setStyle(TableStyle([("BACKGROUND",(0,0),(-1,0),colors.lightgrey),
-                                 ("GRID",(0,0),(-1,-1),0.25,colors.grey),
-                                 ("FONTSIZE",(0,0),(-1,-1),9), ("ALIGN",(0,0),(-1,-1),"LEFT")]))
-        tbl.wrapOn(c,72,H-120); tbl.drawOn(c,72,max(72,H-140-18*(len(data)+1)))
-    c.showPage(); c.save()
+def write_pdf(path: Path, rows: Iterable[Dict[str, Any]], title="AISatyagrah Export") -> dict:
+    _ensure_dir(path)  # rows are streamed page by page, never listed
+    return write_table_pdf(path, rows, title=title)
 
 def write_pptx(path: Path, rows: Iterable[Dict[str, Any]], title="AISatyagrah Export") -> None:
     _ensure_dir(path); rows = list(rows); prs = Presentation()
@@ -69,27 +53,30 @@ def write_gif(path: Path, rows: Iterable[Dict[str, Any]], size=(640,360)) -> Non
     _ensure_dir(path)
     if Image is None:
         path.write_bytes(b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xFF\xFF\xFF!\xF9\x04\x01\n\x00\x01\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"); return
-    rows = list(rows) or _sample_rows(20); frames=[]
-    for i,r in enumerate(rows):
-        img = Image.new("RGB", size, (20,24,28)); d = ImageDraw.Draw(img)
-        d.text((20,20), f"Frame {i+1}\nVal: {r['value']}", fill=(220,220,220)); frames.append(img)
-    frames[0].save(path, save_all=True, append_images=frames[1:], duration=120, loop=0)
+    from .utils.gifstream import write_gif as _stream_gif
+    rows = list(rows) or _sample_rows(20)
+    def frames():
+        for i,r in enumerate(rows):
+            img = Image.new("RGB", size, (20,24,28)); d = ImageDraw.Draw(img)
+            d.text((20,20), f"Frame {i+1}\nVal: {r['value']}", fill=(220,220,220)); yield img
+    _stream_gif(frames(), path, width=size[0], duration_ms=120, loop=0)
 
 def write_mp4(path: Path, rows: Iterable[Dict[str, Any]], size=(640,360)) -> None:
     _ensure_dir(path)
-    if iio is None or Image is None: path.write_bytes(b""); return
-    rows = list(rows) or _sample_rows(60); frames=[]
-    for i,r in enumerate(rows):
-        img = Image.new("RGB", size, (12,18,26)); d = ImageDraw.Draw(img)
-        d.text((20,20), f"MP4 Frame {i+1}\nVal: {r['value']}", fill=(230,230,230))
-        frames.append(iio.asarray(img))
-    iio.imwrite(path, frames, fps=15, codec="libx264", quality=6)
+    if Image is None: path.write_bytes(b""); return
+    from .utils.mp4pipe import encode_mp4, ffmpeg_exe
+    try: ffmpeg_exe()
+    except RuntimeError: path.write_bytes(b""); return
+    rows = list(rows) or _sample_rows(60)
+    def frames():
+        for i,r in enumerate(rows):
+            img = Image.new("RGB", size, (12,18,26)); d = ImageDraw.Draw(img)
+            d.text((20,20), f"MP4 Frame {i+1}\nVal: {r['value']}", fill=(230,230,230)); yield img
+    encode_mp4(frames(), path, fps=15, size=size, preset="fast")
 
 def write_zip(path: Path, files: dict[str, Path]) -> None:
     _ensure_dir(path)
-    with zipfile.ZipFile(path,"w",compression=zipfile.ZIP_DEFLATED) as zf:
-        for name, fp in files.items():
-            if Path(fp).exists(): zf.write(fp, arcname=name)
+    _smart_zip(path, files)  # pdf/pptx/gif/mp4 stored, csv deflated
 
 def build_all_exports(root: Path, when: dt.date|None=None) -> dict:
     when = when or dt.date.today()
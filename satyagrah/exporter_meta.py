@@ -153,7 +153,7 @@ def write_pdf_for_topics(out_path: str, run_date: str) -> str:
         print(f"[exporter_meta] build_topic_rows failed for {run_date}: {e}")
         return str(out)
 
-    c = canvas.Canvas(str(out), pagesize=A4)
+    c = canvas.Canvas(str(out), pagesize=A4, pageCompression=1)
     width, height = A4
 
     c.setTitle(f"Satyagraph meta – {run_date}")
@@ -185,15 +185,15 @@ def write_pdf_for_topics(out_path: str, run_date: str) -> str:
         one = (row.get("one_liner") or "").strip()
         lora = (row.get("lora_joke") or "").strip()
 
-        # estimate needed lines; if low, start a new page
-        est_lines = 3  # for title + spacing
+        # wrap each field once; the same lines drive the page break and the drawing
+        lines: List[str] = []
         if summary:
-            est_lines += len(_wrap("Summary: " + summary))
+            lines += _wrap("Summary: " + summary, width=100)
         if one:
-            est_lines += len(_wrap("One-liner: " + one))
+            lines += _wrap("One-liner: " + one, width=100)
         if lora:
-            est_lines += len(_wrap("LoRA joke: " + lora))
-        if y < 60 + est_lines * 11:
+            lines += _wrap("LoRA joke: " + lora, width=100)
+        if y < 60 + (len(lines) + 3) * 11:  # title + spacing + text
             page_num += 1
             y = new_page(f"page {page_num}")
 
@@ -204,22 +204,13 @@ def write_pdf_for_topics(out_path: str, run_date: str) -> str:
         c.setFont("Helvetica", 9)
 
         # Text fields
-        lines: List[str] = []
-        if summary:
-            lines.append("Summary: " + summary)
-        if one:
-            lines.append("One-liner: " + one)
-        if lora:
-            lines.append("LoRA joke: " + lora)
-
-        for text in lines:
-            for ln in _wrap(text, width=100):
-                c.drawString(50, y, ln)
-                y -= 11
+        for ln in lines:
+            c.drawString(50, y, ln)
+            y -= 11
         y -= 8  # extra spacing between topics
 
     c.save()
-    print(f"[exporter_meta] wrote PDF to {out}")
+    print(f"[exporter_meta] wrote PDF to {out} ({page_num} pages)")
     return str(out)
 
 
@@ -5,6 +5,8 @@ import json
 from pathlib import Path
 from typing import Any, Dict, List
 
+from ..storage.inventory import inventory
+
 ROOT = Path(__file__).resolve().parents[2]
 DATAROOT = ROOT / "data"
 EXPORTS = ROOT / "exports"
@@ -14,11 +16,9 @@ def _today() -> str:
     return _dt.date.today().isoformat()
 
 def _images_for_date(date: str) -> List[Path]:
+    # the social CSV only lists generated art, not exports/<date> one-pagers
     art = DATAROOT / "runs" / date / "art"
-    if not art.is_dir():
-        return []
-    exts = {".png", ".jpg", ".jpeg", ".webp"}
-    return sorted([p for p in art.iterdir() if p.suffix.lower() in exts and p.is_file()])
+    return [e.path for e in inventory(date, ROOT) if e.path.parent == art]
 
 def _load_captions(date: str) -> Dict[str, Dict[str, Any]]:
     p = DATAROOT / "runs" / date / "captions.json"
@@ -1,32 +1,25 @@
 ﻿from pathlib import Path
 from typing import List, Optional
-from PIL import Image
+from ..storage.inventory import images_for
+from ..utils.gifstream import DEFAULT_WIDTH, write_gif
 
 
-def _find_images(date: str, root: Path) -> List[Path]:
-    hits: List[Path] = []
-    for base in [root / "exports" / date, root / "data" / "runs" / date, root / "data" / "runs" / date / "art"]:
-        if base.exists():
-            hits += sorted(p for p in base.rglob("*") if p.suffix.lower() in (".png", ".jpg", ".jpeg"))
-    return hits[:120]
-
-
-def run(*, date: str, exports_root: Path, files: Optional[List[str]] = None, duration_ms: Optional[int] = None, **_) -> Path:
+def run(*, date: str, exports_root: Path, files: Optional[List[str]] = None, duration_ms: Optional[int] = None,
+        width: Optional[int] = None, **_) -> Path:
     root = exports_root.parent
     outdir = exports_root / date
     outdir.mkdir(parents=True, exist_ok=True)
     path = outdir / "export.gif"
 
-    imgs = [Path(f) for f in (files or []) if Path(f).exists()] or _find_images(date, root)
+    imgs = [e.path for e in images_for(date, root, files, limit=120)]
     if not imgs:
         raise RuntimeError("No images found for GIF export")
 
-    frames = [Image.open(p).convert("RGB") for p in imgs]
+    # frames are decoded, downscaled and written one at a time (see utils.gifstream)
+    tmp = path.with_suffix(".gif.part")
     try:
-        frames[0].save(path, save_all=True, append_images=frames[1:], optimize=True,
-                       duration=int(duration_ms or 100), loop=0, format="GIF")
+        write_gif(imgs, tmp, width=int(width or DEFAULT_WIDTH), duration_ms=int(duration_ms or 100), loop=0)
+        tmp.replace(path)
     finally:
-        for fr in frames:
-            try: fr.close()
-            except Exception: pass
+        tmp.unlink(missing_ok=True)
     return path
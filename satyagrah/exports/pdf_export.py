@@ -1,17 +1,16 @@
+import io
+import json
 from pathlib import Path
 from typing import List, Optional
-from PIL import Image
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 from ..storage import captions as capstore
+from ..storage.inventory import images_for
+from ..utils.contactsheet import Cell, digest, downscale_many
+
+DPI = 150  # cell images are embedded at this resolution
 
-def _find_images(date: str, root: Path) -> List[Path]:
-    hits: List[Path] = []
-    for base in [root / "exports" / date, root / "data" / "runs" / date, root / "data" / "runs" / date / "art"]:
-        if base.exists():
-            hits += sorted(p for p in base.rglob("*") if p.suffix.lower() in (".png", ".jpg", ".jpeg"))
-    return hits[:120]
 
 def run(*, date: str, exports_root: Path, files: Optional[List[str]] = None, **_) -> Path:
     root = exports_root.parent
@@ -19,9 +18,16 @@ def run(*, date: str, exports_root: Path, files: Optional[List[str]] = None, **_
     outdir.mkdir(parents=True, exist_ok=True)
     out = outdir / "contact_sheet.pdf"
 
-    imgs = [Path(f) for f in (files or []) if Path(f).exists()] or _find_images(date, root)
+    imgs = images_for(date, root, files, limit=120)
     caps = capstore.load(root, date)
 
+    # same images + captions as last time: keep the existing sheet
+    used = {e.rel(root): caps.get(e.rel(root), {}) for e in imgs}
+    key = digest([date, *((e.rel(root), e.size, e.mtime) for e in imgs), json.dumps(used, sort_keys=True), DPI])
+    stamp = root / "data" / "cache" / "contact" / f"{date}.key"
+    if out.exists() and stamp.exists() and stamp.read_text(encoding="utf-8") == key:
+        return out
+
     c = canvas.Canvas(str(out), pagesize=landscape(A4))
     W, H = landscape(A4)
 
@@ -43,14 +49,17 @@ def run(*, date: str, exports_root: Path, files: Optional[List[str]] = None, **_
     cell_w = (W - 2 * margin - (cols - 1) * gutter) / cols
     cell_h = (H - 2 * margin - (rows - 1) * gutter - 32) / rows
 
-    def draw_cell(px: int, py: int, p: Path):
-        with Image.open(p) as im:
-            iw, ih = im.size
+    # decode + shrink every image to cell size in parallel; only those small JPEGs are embedded
+    box = (round(cell_w / 72 * DPI), round((cell_h - 26) / 72 * DPI))
+    cells = downscale_many([e.path for e in imgs], box)
+
+    def draw_cell(px: int, py: int, p: Path, cell: Cell):
+        data, (iw, ih) = cell
         scale = min(cell_w / iw, (cell_h - 26) / ih)
         tw, th = iw * scale, ih * scale
         x = margin + px * (cell_w + gutter) + (cell_w - tw) / 2
         y = H - margin - (py + 1) * (cell_h + gutter) + (cell_h - th)
-        c.drawImage(ImageReader(str(p)), x, y, tw, th, preserveAspectRatio=True, mask="auto")
+        c.drawImage(ImageReader(io.BytesIO(data)), x, y, tw, th, preserveAspectRatio=True)
         rel = p.relative_to(root).as_posix()
         meta = caps.get(rel, {})
         # filename line
@@ -65,8 +74,10 @@ def run(*, date: str, exports_root: Path, files: Optional[List[str]] = None, **_
             c.drawString(margin + px * (cell_w + gutter) + 2, y - 26, line)
 
     x = y = 0
-    for p in imgs:
-        draw_cell(x, y, p)
+    for e, cell in zip(imgs, cells):
+        if cell is None:
+            continue
+        draw_cell(x, y, e.path, cell)
         x += 1
         if x == cols:
             x = 0
@@ -74,4 +85,6 @@ def run(*, date: str, exports_root: Path, files: Optional[List[str]] = None, **_
             if y == rows:
                 c.showPage(); header(); y = 0
     c.showPage(); c.save()
+    stamp.parent.mkdir(parents=True, exist_ok=True)
+    stamp.write_text(key, encoding="utf-8")
     return out
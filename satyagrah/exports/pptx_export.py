@@ -4,13 +4,9 @@ from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_PARAGRAPH_ALIGNMENT
 from ..storage import captions as capstore
+from ..storage.inventory import images_for
+from ..utils.pptximg import DeckImages
 
-def _find_images(date: str, root: Path) -> List[Path]:
-    hits: List[Path] = []
-    for base in [root / "exports" / date, root / "data" / "runs" / date, root / "data" / "runs" / date / "art"]:
-        if base.exists():
-            hits += sorted(p for p in base.rglob("*") if p.suffix.lower() in (".png", ".jpg", ".jpeg"))
-    return hits[:120]
 
 def run(*, date: str, exports_root: Path, files: Optional[List[str]] = None, **_) -> Path:
     root = exports_root.parent
@@ -24,14 +20,15 @@ def run(*, date: str, exports_root: Path, files: Optional[List[str]] = None, **_
     title = slide.shapes.add_textbox(Inches(0.6), Inches(0.6), Inches(10), Inches(1.2))
     tf = title.text_frame; tf.text = f"AISatyagrah — {date}"; tf.paragraphs[0].font.size = Pt(40)
 
-    imgs = [Path(f) for f in (files or []) if Path(f).exists()] or _find_images(date, root)
+    imgs = [e.path for e in images_for(date, root, files, limit=120)]
     caps = capstore.load(root, date)
+    deck = DeckImages(cache_dir=root / "data" / "cache" / "pptx")
 
     for p in imgs:
         slide = prs.slides.add_slide(prs.slide_layouts[6])
         left, top = Inches(0.5), Inches(0.5)
         width, height = Inches(12.33), Inches(6.0)
-        slide.shapes.add_picture(str(p), left, top, width=width, height=height)
+        deck.add_picture(slide.shapes, p, left, top, width=width, height=height)
 
         rel = p.relative_to(root).as_posix()
         meta = caps.get(rel, {})
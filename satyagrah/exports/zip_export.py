@@ -1,21 +1,10 @@
 ﻿from pathlib import Path
 from typing import List, Optional
-import zipfile
+from ..core.logutil import get_logger
+from ..storage.inventory import images_for
+from ..utils.zipper import sync_zip
 
-
-def _find_images(date: str, root: Path) -> List[Path]:
-    hits: List[Path] = []
-    for base in [
-        root / "exports" / date,
-        root / "data" / "runs" / date,
-        root / "data" / "runs" / date / "art",
-    ]:
-        if base.exists():
-            hits += sorted(
-                p for p in base.rglob("*")
-                if p.suffix.lower() in (".png", ".jpg", ".jpeg")
-            )
-    return hits
+logger = get_logger("exports")
 
 
 def run(
@@ -25,16 +14,17 @@ def run(
     files: Optional[List[str]] = None,
     **_,
 ) -> Path:
-    """Zip all images (or selected ones)."""
+    """Zip all images (or selected ones), updating a previous images.zip in place."""
     root = exports_root.parent
     outdir = exports_root / date
     outdir.mkdir(parents=True, exist_ok=True)
     path = outdir / "images.zip"
 
-    imgs = [Path(f) for f in (files or []) if Path(f).exists()] or _find_images(date, root)
+    imgs = images_for(date, root, files)
 
-    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
-        for p in imgs:
-            arc = p.relative_to(root).as_posix()
-            z.write(p, arcname=arc)
+    # images are stored, not deflated; an existing images.zip is only appended
+    # to unless files were removed or changed (see utils.zipper.sync_zip)
+    stats = sync_zip(path, {e.rel(root): e.path for e in imgs})
+    logger.info("zip %s %s: +%d members (%d unchanged, %d retimed)", date, stats["mode"], stats["added"],
+                stats["kept"], stats["retimed"])
     return path
@@ -1,3 +1,4 @@
 ﻿# -*- coding: utf-8 -*-
 from .prompt_builder import build_prompt
 from .sd_client import generate_image_for_id
+from .batch import generate_images
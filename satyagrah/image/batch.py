@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Hero images for every topic of a date, rendered concurrently.
+
+    generate_images("2025-09-21", hosts=["http://gpu1:7860", "http://gpu2:7860"], per_host=2)
+
+Topic ids come from runs/<date>/shortlist.json (falling back to the prompt
+files in runs/<date>/prompts/). Each host gets ``per_host`` worker threads
+pulling from one shared queue, so faster hosts simply take more topics.
+Settings are read once per batch, and heroes whose saved prompt hash matches
+the current payload are skipped unless *force*.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from .sd_client import ROOT, _normalize_host, _sd_defaults, render_hero
+from .sdapi import get_client
+from ..utils.shortlist import read_ids
+
+
+def topic_ids(date: str) -> List[str]:
+    """Shortlisted ids for *date*, else every topic with a prompt file."""
+    run = ROOT / "data" / "runs" / date
+    if (run / "shortlist.json").exists():
+        return list(dict.fromkeys(read_ids(run / "shortlist.json")))
+    return sorted(p.name[: -len(".prompt.json")] for p in (run / "prompts").glob("*.prompt.json"))
+
+
+def generate_images(date: str, ids: Optional[Sequence[str]] = None, hosts: Sequence[str] = ("http://127.0.0.1:7860",),
+                    per_host: int = 1, seed=None, force: bool = False) -> Dict[str, Any]:
+    """Render heroes for *ids* (default: topic_ids(date)); returns a summary dict."""
+    ids = list(ids) if ids is not None else topic_ids(date)
+    hosts = [_normalize_host(h) for h in hosts if h] or [_normalize_host("")]
+    sd = _sd_defaults()
+    todo: "queue.Queue[str]" = queue.Queue()
+    for i in ids:
+        todo.put(i)
+
+    lock = threading.Lock()
+    counts = {"rendered": 0, "cached": 0, "skipped": 0, "failed": 0}
+    errors: Dict[str, str] = {}
+    per: Dict[str, Dict[str, float]] = {h: {"images": 0, "seconds": 0.0} for h in hosts}
+
+    def work(host: str) -> None:
+        client = get_client(host)
+        while True:
+            try:
+                tid = todo.get_nowait()
+            except queue.Empty:
+                return
+            t0 = time.perf_counter()
+            try:
+                _, how = render_hero(tid, date, client, sd, seed=seed, skip_current=not force)
+            except Exception as e:
+                how = "failed"
+                with lock:
+                    errors[tid] = str(e)
+            dur = time.perf_counter() - t0
+            with lock:
+                counts[how] += 1
+                if how == "rendered":
+                    per[host]["images"] += 1
+                    per[host]["seconds"] += dur
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=work, args=(h,), name=f"sd-batch-{n}", daemon=True)
+               for n, h in enumerate(hosts * max(1, per_host))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    return {
+        "date": date,
+        "topics": len(ids),
+        **counts,
+        "errors": errors,
+        "seconds": round(wall, 2),
+        "images_per_min": round(counts["rendered"] * 60.0 / wall, 2) if wall > 0 else 0.0,
+        "hosts": {h: {"images": int(v["images"]),
+                      "avg_sec": round(v["seconds"] / v["images"], 2) if v["images"] else None}
+                  for h, v in per.items()},
+    }
+
+
+def print_summary(s: Dict[str, Any]) -> None:
+    print(f"[image] {s['date']}: {s['topics']} topics, {s['rendered']} rendered, {s['cached']} from cache, "
+          f"{s['skipped']} up to date, {s['failed']} failed in {s['seconds']}s ({s['images_per_min']} img/min)")
+    for h, v in s["hosts"].items():
+        print(f"  {h:<32} images={v['images']}  avg_sec={v['avg_sec']}")
+    for tid, err in s["errors"].items():
+        print(f"  FAILED {tid}: {err}")
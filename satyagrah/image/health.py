@@ -1,9 +1,6 @@
 ﻿# -*- coding: utf-8 -*-
-import requests
+from .sdapi import get_client
 
 def sdapi_ping(host: str, timeout_s: int = 3) -> bool:
-    try:
-        r = requests.get(host.rstrip("/") + "/sdapi/v1/progress", timeout=timeout_s)
-        return r.ok
-    except Exception:
-        return False
+    code = get_client(host).probe("/sdapi/v1/progress", timeout=timeout_s)
+    return code is not None and code < 400
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed cache of rendered SD images.
+
+A txt2img render is deterministic for a given payload, seed and checkpoint,
+so each image is stored under the SHA-256 of the canonical payload (sorted
+keys, with ``batch_size``/``n_iter`` removed and ``seed`` set to that image's
+own seed) plus the SD model id. A batch starting at seed *s* is cached as
+images *s*, *s+1*, ... and can later be served one by one. Random-seed
+(-1) renders are never cached.
+
+Entries are plain PNG files in one folder, size-capped with LRU eviction
+(see ``lrudir``). SATYAGRAH_SD_CACHE_MB sets the default cap (1024).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from ..utils import lrudir
+
+MAX_CACHE_MB = int(os.getenv("SATYAGRAH_SD_CACHE_MB", "1024"))
+_IGNORED = ("batch_size", "n_iter")
+
+
+def image_key(payload: Dict[str, Any], seed: int, model: str) -> str:
+    canon = {k: v for k, v in payload.items() if k not in _IGNORED}
+    canon["seed"] = int(seed)
+    blob = json.dumps({"model": model, "payload": canon}, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def image_keys(payload: Dict[str, Any], count: int, model: Optional[str]) -> Optional[List[str]]:
+    """Keys of the *count* images a call with *payload* renders; None when it can't be cached."""
+    seed = int(payload.get("seed", -1))
+    if seed < 0 or not model:
+        return None
+    return [image_key(payload, seed + i, model) for i in range(count)]
+
+
+class RenderCache:
+    def __init__(self, folder: Union[str, Path], max_mb: int = MAX_CACHE_MB):
+        self.folder = Path(folder)
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+    def _path(self, key: str) -> Path:
+        return self.folder / f"{key}.png"
+
+    def get(self, key: str) -> Optional[Path]:
+        p = self._path(key)
+        ok = p.exists()
+        with self._lock:
+            if ok:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if ok:
+            lrudir.touch(p)
+            return p
+        return None
+
+    def get_all(self, keys: List[str]) -> Optional[List[Path]]:
+        """Cached files for every key, or None (counted as one miss) if any is missing."""
+        paths = [self._path(k) for k in keys]
+        if not all(p.exists() for p in paths):
+            with self._lock:
+                self.misses += 1
+            return None
+        for p in paths:
+            lrudir.touch(p)
+        with self._lock:
+            self.hits += 1
+        return paths
+
+    def put_file(self, key: str, src: Path) -> None:
+        """Copy the rendered *src* into the cache (hard link when possible)."""
+        dst = self._path(key)
+        if dst.exists():
+            return
+        tmp = lrudir.part_path(dst)
+        try:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(src, tmp)
+            except OSError:
+                shutil.copyfile(src, tmp)
+            lrudir.adopt(tmp, dst, self.max_bytes)
+            with self._lock:
+                self.stored += 1
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    def put_bytes(self, key: str, data: bytes) -> None:
+        if not self._path(key).exists():
+            try:
+                lrudir.store(self._path(key), data, self.max_bytes)
+                with self._lock:
+                    self.stored += 1
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "stored": self.stored,
+                    "hit_rate": round(self.hits / total, 3) if total else 0.0}
@@ -1,14 +1,29 @@
 ﻿# -*- coding: utf-8 -*-
-import base64, io, json, time, pathlib, requests
+import base64, hashlib, io, json, random, time, pathlib
+import requests
 from PIL import Image
 from ..config import load_settings
+from .sdapi import get_client, normalize_host
+from .rendercache import RenderCache, image_keys
 
 # project root: D:\AISatyagrah\satyagrah
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 
+_cache = None
+
+# retry delays: BACKOFF_BASE_SEC * 2**(attempt-1), capped, with +/-50% jitter
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 30.0
+
+def _render_cache() -> RenderCache:
+    """Seeded renders are cached under data/cache/sd (see rendercache)."""
+    global _cache
+    if _cache is None:
+        _cache = RenderCache(ROOT / "data" / "cache" / "sd")
+    return _cache
+
 def _normalize_host(host: str) -> str:
-    host = host or "http://127.0.0.1:7860"
-    return host[:-1] if host.endswith("/") else host
+    return normalize_host(host or "http://127.0.0.1:7860")
 
 def _prompt_path(date: str, topic_id: str) -> pathlib.Path:
     return ROOT / "data" / "runs" / date / "prompts" / f"{topic_id}.prompt.json"
@@ -44,7 +59,25 @@ def _load_prompt(date: str, topic_id: str) -> dict:
     except Exception:
         return {}
 
-def _payload_from_prompt(pr: dict, seed=None) -> dict:
+def _backoff(attempt: int) -> float:
+    return min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+def prompt_hash(payload: dict) -> str:
+    """SHA-256 of the txt2img payload; stored with the hero so unchanged topics can be skipped."""
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def hero_is_current(date: str, topic_id: str, phash: str) -> bool:
+    art_dir = ROOT / "data" / "runs" / date / "art"
+    if not (art_dir / f"{topic_id}_hero.png").exists():
+        return False
+    try:
+        saved = json.loads((art_dir / f"{topic_id}.prompt.json").read_text(encoding="utf-8"))
+    except Exception:
+        return False
+    return isinstance(saved, dict) and saved.get("prompt_hash") == phash
+
+def _payload_from_prompt(pr: dict, seed=None, sd: dict = None) -> dict:
     positive = pr.get("positive", "")
     negative = pr.get("negative", "")
     width    = int(pr.get("width", 768))
@@ -67,57 +100,86 @@ def _payload_from_prompt(pr: dict, seed=None) -> dict:
     if seed is not None:
         payload["subseed_strength"] = 0
     # settings override for sampler (optional)
-    sd = _sd_defaults()
+    sd = sd if sd is not None else _sd_defaults()
     if sd.get("sampler_name"):
         payload["sampler_name"] = sd["sampler_name"]
     return payload
 
 def _save_png_atomic(b64png: str, out_path: pathlib.Path) -> pathlib.Path:
-    raw = base64.b64decode(b64png)
+    return _save_png_bytes(base64.b64decode(b64png), out_path)
+
+def _save_png_bytes(raw: bytes, out_path: pathlib.Path) -> pathlib.Path:
     img = Image.open(io.BytesIO(raw))
     tmp = out_path.with_suffix(out_path.suffix + ".part")
     img.save(tmp, format="PNG")
     tmp.replace(out_path)
     return out_path
 
-def generate_image_for_id(topic_id: str, date: str, host: str = "http://127.0.0.1:7860", seed=None) -> pathlib.Path:
+def _write_hero(date: str, topic_id: str, pr: dict, raw: bytes, phash: str = None) -> pathlib.Path:
+    art_dir = _art_dir(date)
+    hero = art_dir / f"{topic_id}_hero.png"
+    _save_png_bytes(raw, hero)
+
+    # Keep a copy of the prompt JSON alongside the hero
+    if phash:
+        pr = {**pr, "prompt_hash": phash}
+    (art_dir / f"{topic_id}.prompt.json").write_text(
+        json.dumps(pr, indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+    return hero
+
+def render_hero(topic_id: str, date: str, client, sd: dict, seed=None, skip_current: bool = False) -> tuple:
     """
-    Create hero PNG at data/runs/<date>/art/<topic_id>_hero.png using AUTOMATIC1111 /sdapi/v1/txt2img.
-    Also copies the prompt JSON next to the hero as data/runs/<date>/art/<topic_id>.prompt.json.
-    Returns the hero path.
+    Render (or reuse) the hero for one topic with an SDClient and settings
+    already loaded by the caller. Returns (hero_path, how) where how is
+    "rendered", "cached" (render cache) or "skipped" (hero already matches
+    the prompt hash; only checked when *skip_current*).
     """
-    host = _normalize_host(host)
     pr = _load_prompt(date, topic_id)
-    payload = _payload_from_prompt(pr, seed=seed)
+    payload = _payload_from_prompt(pr, seed=seed, sd=sd)
+    phash = prompt_hash(payload)
+    if skip_current and hero_is_current(date, topic_id, phash):
+        return _art_dir(date) / f"{topic_id}_hero.png", "skipped"
 
-    url = f"{host}/sdapi/v1/txt2img"
-    sd = _sd_defaults()
+    keys = image_keys(payload, 1, client.model_id()) if payload["seed"] >= 0 else None
+    if keys:
+        hit = _render_cache().get(keys[0])
+        if hit is not None:
+            try:
+                return _write_hero(date, topic_id, pr, hit.read_bytes(), phash), "cached"
+            except OSError:
+                pass  # evicted meanwhile: render
     timeout = int(sd["sd_timeout"])
-    retries = int(sd["sd_retries"])
+    retries = max(1, int(sd["sd_retries"]))
     last_err = None
 
     for attempt in range(1, retries + 1):
         try:
-            r = requests.post(url, json=payload, timeout=timeout)
-            r.raise_for_status()
-            data = r.json()
+            data = client.post_json("/sdapi/v1/txt2img", payload, timeout=timeout)
             images = data.get("images") or []
             if not images:
                 raise RuntimeError("No images returned from SD API")
 
-            art_dir = _art_dir(date)
-            hero = art_dir / f"{topic_id}_hero.png"
-            _save_png_atomic(images[0], hero)
-
-            # Keep a copy of the prompt JSON alongside the hero
-            (art_dir / f"{topic_id}.prompt.json").write_text(
-                json.dumps(pr, indent=2, ensure_ascii=False), encoding="utf-8"
-            )
-            return hero
+            raw = base64.b64decode(images[0])
+            hero = _write_hero(date, topic_id, pr, raw, phash)
+            if keys:
+                _render_cache().put_bytes(keys[0], raw)
+            return hero, "rendered"
         except Exception as e:
             last_err = e
+            if isinstance(e, requests.ConnectionError):
+                # connects are already retried by the SDClient transport; don't stack a second layer
+                raise RuntimeError(f"Image generation failed: {last_err}") from last_err
             if attempt < retries:
-                time.sleep(1.2)
+                time.sleep(_backoff(attempt))
             else:
                 raise RuntimeError(f"Image generation failed after {retries} attempts: {last_err}") from last_err
 
+def generate_image_for_id(topic_id: str, date: str, host: str = "http://127.0.0.1:7860", seed=None) -> pathlib.Path:
+    """
+    Create hero PNG at data/runs/<date>/art/<topic_id>_hero.png using AUTOMATIC1111 /sdapi/v1/txt2img.
+    Also copies the prompt JSON next to the hero as data/runs/<date>/art/<topic_id>.prompt.json.
+    Returns the hero path.
+    """
+    hero, _ = render_hero(topic_id, date, get_client(_normalize_host(host)), _sd_defaults(), seed=seed)
+    return hero
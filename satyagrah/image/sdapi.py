@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Shared keep-alive HTTP client for the Stable Diffusion (A1111) API.
+
+One ``requests.Session`` per SD host, with a pooled adapter, so the agent,
+sd_client, doctor and the status prober reuse TCP connections instead of
+opening one per call. Failed connects are retried with backoff for every
+method; 502/503/504 answers only for idempotent ones, never for a txt2img
+POST the GPU may already have rendered (callers decide whether to repeat
+those). Every call is timed and ``stats()`` reports per-endpoint latency.
+
+    cli = get_client("http://127.0.0.1:7860")
+    data = cli.post_json("/sdapi/v1/txt2img", payload, timeout=600)
+    cli.probe("/sdapi/v1/progress")   # status code, or None when unreachable
+
+Tunables (environment): SATYAGRAH_SD_CONNECT_TIMEOUT (seconds, 3.05),
+SATYAGRAH_SD_RETRIES (2), SATYAGRAH_SD_POOL (connections per host, 4).
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, BinaryIO, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..utils.b64json import stream_b64_array
+
+CONNECT_TIMEOUT = float(os.getenv("SATYAGRAH_SD_CONNECT_TIMEOUT", "3.05"))
+RETRIES = int(os.getenv("SATYAGRAH_SD_RETRIES", "2"))
+POOL_SIZE = int(os.getenv("SATYAGRAH_SD_POOL", "4"))
+RECENT = 256  # latency samples kept per endpoint for percentiles
+MODEL_TTL_SEC = 60.0  # how long the loaded checkpoint id is trusted before re-asking
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def normalize_host(host: Optional[str]) -> str:
+    host = host or os.getenv("SATYAGRAH_SD_HOST", "http://127.0.0.1:7860")
+    return host.rstrip("/")
+
+
+class _Latency:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.recent: Deque[float] = deque(maxlen=RECENT)
+
+    def add(self, sec: float, ok: bool) -> None:
+        self.calls += 1
+        self.errors += 0 if ok else 1
+        self.total += sec
+        self.max = max(self.max, sec)
+        self.last = sec
+        self.recent.append(sec)
+
+    def as_dict(self) -> Dict[str, Any]:
+        r = sorted(self.recent)
+        pct = lambda q: round(r[min(len(r) - 1, int(q * len(r)))] * 1000, 1) if r else 0.0
+        return {"calls": self.calls, "errors": self.errors,
+                "avg_ms": round(self.total / self.calls * 1000, 1) if self.calls else 0.0,
+                "p50_ms": pct(0.5), "p95_ms": pct(0.95),
+                "max_ms": round(self.max * 1000, 1), "last_ms": round(self.last * 1000, 1)}
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, _Latency] = {}
+
+
+def _record(key: str, sec: float, ok: bool) -> None:
+    with _stats_lock:
+        _stats.setdefault(key, _Latency()).add(sec, ok)
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Per "<METHOD> <path>" latency summary across all hosts."""
+    with _stats_lock:
+        return {k: v.as_dict() for k, v in sorted(_stats.items())}
+
+
+class SDClient:
+    def __init__(self, host: str, *, retries: int = RETRIES, pool_size: int = POOL_SIZE,
+                 connect_timeout: float = CONNECT_TIMEOUT):
+        self.host = normalize_host(host)
+        self.connect_timeout = connect_timeout
+        retry = Retry(total=retries, connect=retries, read=0, status=retries, backoff_factor=0.5,
+                      status_forcelist=(502, 503, 504), allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": "Satyagrah-SD", "Accept": "application/json"})
+        self._model: Optional[str] = None
+        self._model_at = 0.0
+
+    def _timeout(self, timeout: Optional[Timeout]) -> Timeout:
+        if isinstance(timeout, tuple):
+            return timeout
+        return (self.connect_timeout, float(timeout or 60))
+
+    def request(self, method: str, path: str, *, timeout: Optional[Timeout] = None, **kw) -> requests.Response:
+        """Timed request on the pooled session; the caller must consume or close the response."""
+        key = f"{method.upper()} {path}"
+        t0 = time.perf_counter()
+        try:
+            r = self.session.request(method, self.host + path, timeout=self._timeout(timeout), **kw)
+        except Exception:
+            _record(key, time.perf_counter() - t0, False)
+            raise
+        _record(key, time.perf_counter() - t0, r.status_code < 500)
+        return r
+
+    def post_json(self, path: str, payload: Dict[str, Any], *, timeout: Optional[Timeout] = None) -> Dict[str, Any]:
+        """POST *payload* and return the decoded JSON body; raises on HTTP errors."""
+        with self.request("POST", path, json=payload, timeout=timeout, stream=True) as r:
+            r.raise_for_status()
+            return read_json(r)
+
+    def post_images(self, path: str, payload: Dict[str, Any], open_sink: Callable[[int], BinaryIO], *,
+                    timeout: Optional[Timeout] = None) -> Tuple[List[int], Dict[str, Any]]:
+        """
+        POST *payload* and decode the response's ``images`` one chunk at a time
+        into ``open_sink(i)``; returns the decoded sizes and the other keys.
+        """
+        with self.request("POST", path, json=payload, timeout=timeout, stream=True) as r:
+            r.raise_for_status()
+            r.raw.decode_content = True
+            return stream_b64_array(r.raw, "images", open_sink)
+
+    def get_json(self, path: str, *, timeout: Optional[Timeout] = None) -> Any:
+        with self.request("GET", path, timeout=timeout, stream=True) as r:
+            r.raise_for_status()
+            return read_json(r)
+
+    def model_id(self, *, timeout: float = 5.0) -> Optional[str]:
+        """
+        Loaded checkpoint ("<name>|<hash>") from /sdapi/v1/options, cached for
+        MODEL_TTL_SEC. The last known id is kept when the host does not answer;
+        None if it never did.
+        """
+        if self._model is not None and time.monotonic() - self._model_at < MODEL_TTL_SEC:
+            return self._model
+        try:
+            opts = self.get_json("/sdapi/v1/options", timeout=timeout) or {}
+            name = opts.get("sd_model_checkpoint") or ""
+            if name:
+                self._model = f"{name}|{opts.get('sd_checkpoint_hash') or ''}"
+                self._model_at = time.monotonic()
+        except (requests.RequestException, ValueError):
+            pass
+        return self._model
+
+    def probe(self, path: str = "/", *, timeout: float = 1.5) -> Optional[int]:
+        """HTTP status of GET *path*, or None when the host cannot be reached."""
+        try:
+            with self.request("GET", path, timeout=(min(timeout, self.connect_timeout), timeout), stream=True) as r:
+                return r.status_code
+        except (requests.RequestException, ValueError):
+            return None
+
+
+def read_json(r: requests.Response) -> Any:
+    """Decode the JSON body of a streamed response."""
+    r.raw.decode_content = True
+    return json.load(r.raw)
+
+
+_clients: Dict[str, SDClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(host: Optional[str] = None) -> SDClient:
+    """Shared client for *host* (defaults to SATYAGRAH_SD_HOST)."""
+    host = normalize_host(host)
+    with _clients_lock:
+        cli = _clients.get(host)
+        if cli is None:
+            cli = _clients[host] = SDClient(host)
+    return cli
@@ -1,24 +1,18 @@
 # D:\AISatyagrah\satyagrah\newsroom\auto_rules.py
 from __future__ import annotations
-import json
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from satyagrah.paths import ROOT_DIR
+from satyagrah.utils import filecache
 
 RULES_PATH = ROOT_DIR / "config" / "rules.json"
 
 
 def load_rules() -> Dict[str, List[Dict[str, Any]]]:
     """Load platform-specific auto-approve rules from config/rules.json."""
-    if not RULES_PATH.exists():
-        return {}
-    try:
-        data = json.loads(RULES_PATH.read_text(encoding="utf-8"))
-        # must be dict[str, list[rule]]
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
+    data = filecache.load_json(RULES_PATH, {})
+    # must be dict[str, list[rule]]
+    return data if isinstance(data, dict) else {}
 
 
 def _norm(s: Optional[str]) -> str:
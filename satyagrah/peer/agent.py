@@ -1,10 +1,16 @@
 ﻿# -*- coding: utf-8 -*-
-import argparse, base64, json, time, sqlite3, threading, os
+import argparse, json, time, sqlite3, threading, os, queue, shutil
 from pathlib import Path
-from urllib.request import Request, urlopen
-from urllib.error import URLError, HTTPError
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from .jobfmt import read_job_zip, write_result_zip
+from .inbox import InboxWatcher
+from .lease import LeaseManager, default_agent_id
+from .batching import TaskBatcher, take_batch
+from .schedule import plan as plan_jobs
+from . import metrics
+from ..image.rendercache import RenderCache, image_keys
+from ..utils import filecache
+from ..image.sdapi import get_client, stats as sd_stats
 
 # ---------- Config & Status (shared across threads) ----------
 CONFIG = {
@@ -13,8 +19,13 @@ CONFIG = {
     "share_percent": 50,          # 0..100; 100 = full speed, 50 = half-duty (sleep ~= work time)
     "paused": False,
     "inactivity_minutes": 120,    # nudge after this much idle time (no jobs processed)
+    "sd_inflight": 1,             # concurrent txt2img calls (render stage workers)
+    "max_batch": 8,               # images per txt2img call when coalescing compatible tasks
+    "render_cache_mb": 1024,      # local cache of rendered images (0 = off)
+    "pipeline_depth": 4,          # bound of each queue between stages
 }
-CONFIG_MTIME = 0.0
+CONFIG_SRC = None  # last parsed config file applied to CONFIG
+RENDER_CACHE = None  # RenderCache set up by main(); None disables caching
 STATUS = {
     "uptime_sec": 0,
     "processed_today": 0,
@@ -27,18 +38,25 @@ STATUS = {
     "needs_attention": False,
     "since_last_job_sec": 0,
     "started_at": int(time.time()),
+    "in_pipeline": 0,
+    "stages": {"intake": 0, "render": 0, "write": 0},
+    "inbox_watch": "poll",
+    "sd_calls": 0,
+    "sd_images": 0,
+    "cache_images": 0,
+    "agent_id": "",
+    "agents": {},
 }
+STATUS_VOLATILE = ("uptime_sec", "since_last_job_sec", "agents")  # alone they don't warrant a status.json rewrite
+STATUS_REFRESH_SEC = 60
 
 def _read_config(path: Path):
-    global CONFIG, CONFIG_MTIME
-    try:
-        if path.exists():
-            mt = path.stat().st_mtime
-            if mt != CONFIG_MTIME:
-                CONFIG.update(json.loads(path.read_text(encoding="utf-8")))
-                CONFIG_MTIME = mt
-    except Exception:
-        pass
+    global CONFIG, CONFIG_SRC
+    data = filecache.load_json(path)
+    # the cache hands back the same object until the file changes
+    if isinstance(data, dict) and data is not CONFIG_SRC:
+        CONFIG.update(data)
+        CONFIG_SRC = data
 
 def _write_config(path: Path):
     global CONFIG
@@ -46,10 +64,19 @@ def _write_config(path: Path):
         path.write_text(json.dumps(CONFIG, indent=2), encoding="utf-8")
     except Exception:
         pass
+    filecache.invalidate(path)
+
+_status_last = {"key": None, "at": 0.0}
 
 def _write_status(path: Path):
+    """Rewrite status.json when something other than the uptime counters changed (or once a minute)."""
+    key = json.dumps({k: v for k, v in STATUS.items() if k not in STATUS_VOLATILE}, sort_keys=True, default=str)
+    now = time.time()
+    if key == _status_last["key"] and now - _status_last["at"] < STATUS_REFRESH_SEC:
+        return
     try:
         path.write_text(json.dumps(STATUS, indent=2), encoding="utf-8")
+        _status_last["key"], _status_last["at"] = key, now
     except Exception:
         pass
 
@@ -59,6 +86,14 @@ def _db(path: Path):
     con.execute("CREATE TABLE IF NOT EXISTS usage(day TEXT PRIMARY KEY, count INTEGER NOT NULL)")
     return con
 
+def _quota_left(dbp: Path, limit: int) -> float:
+    """Jobs that can still be accepted today (inf when unlimited)."""
+    if limit <= 0: return float("inf")
+    con = _db(dbp)
+    row = con.execute("SELECT count FROM usage WHERE day=?", (time.strftime("%Y-%m-%d"),)).fetchone()
+    con.close()
+    return max(0, limit - (row[0] if row else 0))
+
 def _quota_ok(dbp: Path, limit: int) -> bool:
     if limit <= 0: return True
     day = time.strftime("%Y-%m-%d")
@@ -74,18 +109,119 @@ def _quota_ok(dbp: Path, limit: int) -> bool:
     return ok
 
 # ---------- SD call ----------
-def _sd_txt2img(host: str, prompt: str, seed: int, steps: int, width: int, height: int, count: int):
-    url = host.rstrip("/") + "/sdapi/v1/txt2img"
-    body = json.dumps({"prompt": prompt, "seed": seed, "steps": steps, "width": width, "height": height, "n_iter": 1, "batch_size": count}).encode("utf-8")
-    req = Request(url, data=body, headers={"Content-Type":"application/json","User-Agent":"Satyagrah-PeerAgent"})
+def _txt2img_body(t: dict, count: int) -> dict:
+    prompt, seed, steps, width, height, _ = _task_args(t)
+    return {"prompt": prompt, "seed": seed, "steps": steps, "width": width, "height": height, "n_iter": 1, "batch_size": count}
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def _render_batch(host: str, batch: list, model=None):
+    """
+    One SD call for a batch of (run, i, task) units from ``take_batch``: the
+    tasks share everything but seed/count and their seeds form one chain, so
+    ``batch_size`` = total count reproduces each task exactly. Images are
+    base64-decoded chunk by chunk from the response straight into the owning
+    run's spool as ``t<i>_<n>.png`` (peak memory ~ one read chunk) and each
+    unit is reported through ``run.task_done``. With a *model* id, rendered
+    images are added to RENDER_CACHE. Returns the runs that became complete
+    and the call duration.
+    """
+    counts = [int(t["count"]) for _, _, t in batch]
+    body = _txt2img_body(batch[0][2], sum(counts))
+    owners = [(u, k) for u, n in enumerate(counts) for k in range(n)]
+    imgs = [[] for _ in batch]
+    def sink(i):
+        if i >= len(owners):
+            return open(os.devnull, "wb")  # more images than asked for (e.g. a grid): ignore
+        u, k = owners[i]
+        run, ti, _ = batch[u]
+        run.spool.mkdir(parents=True, exist_ok=True)
+        p = run.spool / f"t{ti}_{k+1}.png"
+        imgs[u].append((f"img_{k+1}.png", p))
+        return open(p, "wb")
     t0 = time.time()
-    with urlopen(req, timeout=600) as r:
-        j = json.loads(r.read().decode("utf-8"))
+    err = ""
+    try:
+        get_client(host).post_images("/sdapi/v1/txt2img", body, sink, timeout=600)
+    except Exception as e:
+        err = str(e)
+        for lst in imgs:
+            for _, p in lst:
+                p.unlink(missing_ok=True)
+            lst.clear()
     dur = time.time() - t0
-    imgs = []
-    for i, b64 in enumerate(j.get("images", [])):
-        imgs.append((f"img_{i+1}.png", base64.b64decode(b64)))
-    return imgs, dur
+    STATUS["sd_calls"] += 1
+    STATUS["sd_images"] += sum(len(lst) for lst in imgs)
+    metrics.SD_SECONDS.observe(dur)
+    metrics.SD_BUSY.inc(dur)
+    metrics.IMAGES.inc(sum(len(lst) for lst in imgs))
+    if err:
+        metrics.SD_ERRORS.inc()
+    keys = image_keys(body, len(owners), model) if (RENDER_CACHE is not None and not err) else None
+    if keys:
+        paths = [p for lst in imgs for _, p in lst]
+        for key, p in zip(keys, paths):
+            RENDER_CACHE.put_file(key, p)
+    finished = []
+    for (run, ti, _), n, got in zip(batch, counts, imgs):
+        uerr = err or ("" if len(got) == n else f"SD returned {len(got)} of {n} images")
+        if run.task_done(ti, got, uerr, dur * n / max(1, sum(counts))):
+            finished.append(run)
+    return finished, dur
+
+def _render_units(host: str, batch: list):
+    """
+    Serve units of *batch* from RENDER_CACHE when every image of the task is
+    cached; render the rest, re-chained into contiguous-seed calls since hits
+    can leave gaps. Returns the runs that became complete and the SD time spent.
+    """
+    model = get_client(host).model_id() if RENDER_CACHE is not None else None
+    finished, dur, rest = [], 0.0, []
+    for run, ti, t in batch:
+        keys = image_keys(_txt2img_body(t, 1), int(t["count"]), model)
+        cached = RENDER_CACHE.get_all(keys) if keys else None
+        if cached is None:
+            rest.append((run, ti, t))
+            continue
+        imgs = []
+        try:
+            run.spool.mkdir(parents=True, exist_ok=True)
+            for k, src in enumerate(cached):
+                dst = run.spool / f"t{ti}_{k+1}.png"
+                _link_or_copy(src, dst)
+                imgs.append((f"img_{k+1}.png", dst))
+        except OSError:
+            rest.append((run, ti, t))  # evicted under us: render it
+            continue
+        run.cache_hits += len(imgs)
+        STATUS["cache_images"] += len(imgs)
+        metrics.CACHE_IMAGES.inc(len(imgs))
+        if run.task_done(ti, imgs, "", 0.0):
+            finished.append(run)
+    while rest:
+        f, d = _render_batch(host, take_batch(rest, int(CONFIG.get("max_batch", 8))), model)
+        finished.extend(f)
+        dur += d
+    return finished, dur
+
+def _task_args(t: dict) -> tuple:
+    return (t["prompt"], int(t["seed"]), int(t["steps"]), int(t["width"]), int(t["height"]), int(t["count"]))
+
+def _duty_sleep(work: float) -> None:
+    """share_percent as a duty cycle: after *work* seconds on the GPU, idle ~work*(100-share)/share."""
+    share = max(0, min(100, int(CONFIG.get("share_percent", 100))))
+    if share <= 0:
+        pause = 5.0
+    elif share < 100:
+        pause = min(60.0, max(0.1, work) * (100.0 - share) / max(1.0, share))
+    else:
+        return
+    metrics.DUTY_SLEEP.inc(pause)
+    time.sleep(pause)
 
 # ---------- Panel (stdlib HTTP) ----------
 class PanelHandler(BaseHTTPRequestHandler):
@@ -100,8 +236,11 @@ class PanelHandler(BaseHTTPRequestHandler):
 
     def do_GET(self):
         root = self.server.root  # type: ignore
+        if self.path.startswith("/metrics"):
+            self._send(200, "text/plain; version=0.0.4; charset=utf-8", metrics.render())
+            return
         if self.path.startswith("/status.json"):
-            self._send(200, "application/json; charset=utf-8", STATUS)
+            self._send(200, "application/json; charset=utf-8", {**STATUS, "sd_latency": sd_stats()})
             return
         if self.path.startswith("/"):
             self._send(200, "text/html; charset=utf-8", """<!doctype html>
@@ -212,29 +351,238 @@ def _start_panel(port: int, root: Path):
     return srv
 
 # ---------- Agent core ----------
+def _throughput(t_start: float) -> dict:
+    """Counters published in this agent's heartbeat (shared inbox)."""
+    hours = max(time.time() - t_start, 1.0) / 3600.0
+    jobs, imgs = int(metrics.JOBS_DONE.value), int(metrics.IMAGES.value + metrics.CACHE_IMAGES.value)
+    return {"started_at": int(t_start), "in_pipeline": STATUS["in_pipeline"], "jobs_done": jobs, "images": imgs,
+            "jobs_per_hour": round(jobs / hours, 1), "images_per_hour": round(imgs / hours, 1)}
+
+def _spool_dir(out_dir: Path, job: dict) -> Path:
+    """Decoded images wait here until the result zip is written."""
+    return out_dir / ".spool" / str(job["id"])
+
 def process_one(in_zip: Path, out_dir: Path, sd_host: str, db_path: Path):
     job = read_job_zip(in_zip)  # verifies signature & expiry
     if not _quota_ok(db_path, CONFIG.get("max_per_day", 5)):
         raise RuntimeError("Quota exceeded for today")
-    images = []
-    errors = []
-    total_dur = 0.0
-    for t in job.get("tasks", []):
-        if t.get("type") != "txt2img":
-            errors.append(f"Unsupported task: {t.get('type')}")
-            continue
-        try:
-            imgs, dur = _sd_txt2img(sd_host, t["prompt"], int(t["seed"]), int(t["steps"]), int(t["width"]), int(t["height"]), int(t["count"]))
-            images.extend(imgs)
-            total_dur += float(dur)
-        except Exception as e:
-            errors.append(str(e))
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_zip = out_dir / f"result_{job['id']}.zip"
-    write_result_zip(job, images, out_zip, ok=(len(errors)==0), errors=errors)
-    return out_zip, job["id"], (len(errors)==0), "; ".join(errors), total_dur
+    run = _JobRun(in_zip, job, _spool_dir(out_dir, job))
+    units = [(run, i, t) for i, t in enumerate(run.tasks)]
+    try:
+        while units:
+            _render_units(sd_host, take_batch(units, int(CONFIG.get("max_batch", 8))))
+        images = run.images()
+        errors = run.errors + [e for e in run.task_errors if e]
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_zip = out_dir / f"result_{job['id']}.zip"
+        write_result_zip(job, images, out_zip, ok=(len(errors)==0), errors=errors, extra=run.report())
+    finally:
+        shutil.rmtree(run.spool, ignore_errors=True)
+    return out_zip, job["id"], (len(errors)==0), "; ".join(errors), run.dur
+
+# ---------- Pipelined agent ----------
+class _JobRun:
+    """One job moving through the pipeline; task results are kept in task order."""
+    def __init__(self, src: Path, job: dict, spool: Path, queued_at: float = None):
+        self.src = src
+        self.queued_at = time.time() if queued_at is None else queued_at
+        self.started = False
+        self.job = job
+        self.spool = spool
+        self.tasks = [t for t in job.get("tasks", []) if t.get("type") == "txt2img"]
+        self.errors = [f"Unsupported task: {t.get('type')}" for t in job.get("tasks", []) if t.get("type") != "txt2img"]
+        self.results = [None] * len(self.tasks)   # [(name, spooled path)] per task
+        self.task_errors = [""] * len(self.tasks)
+        self.dur = 0.0
+        self.cache_hits = 0
+        self._left = len(self.tasks)
+        self._done = set()
+        self._lock = threading.Lock()
+
+    def images(self) -> list:
+        """(name, path) for the result zip: task order, numbered across the whole job."""
+        paths = [p for imgs in self.results for _, p in (imgs or [])]
+        return [(f"img_{n+1}.png", p) for n, p in enumerate(paths)]
+
+    def report(self) -> dict:
+        """Extra result.json fields."""
+        n = sum(len(imgs or []) for imgs in self.results)
+        return {"cache": {"hits": self.cache_hits, "rendered": n - self.cache_hits}}
+
+    def task_done(self, i: int, imgs, err: str, dur: float) -> bool:
+        """Record task *i* (first report wins); True once every task of the job has finished."""
+        with self._lock:
+            if i in self._done:
+                return False
+            self._done.add(i)
+            self.results[i] = imgs
+            self.task_errors[i] = err
+            self.dur += dur
+            self._left -= 1
+            return self._left == 0
+
+class AgentPipeline:
+    """
+    intake/verify -> SD render -> decode/write result, each stage on its own
+    thread(s) and connected by bounded queues, so unzipping, verifying,
+    base64 decoding and zipping overlap with GPU work. The render stage runs
+    ``sd_inflight`` workers and is the only stage throttled by share_percent
+    and paused.
+    """
+    def __init__(self, out_dir: Path, db_path: Path, *, inflight: int = 1, depth: int = 4, on_done=None, on_retry=None):
+        self.out_dir = out_dir
+        self.db_path = db_path
+        self.on_done = on_done    # called with the job zip path once it is written or has failed
+        self.on_retry = on_retry  # called instead when it was turned away for now (quota)
+        depth = max(1, depth)
+        self.intake_q: "queue.Queue[Path]" = queue.Queue(maxsize=depth)
+        # (run, i, task) units; render workers take coalesced batches, across jobs
+        self.render_q = TaskBatcher(depth * max(1, int(CONFIG.get("max_batch", 8))))
+        self.write_q: "queue.Queue[_JobRun]" = queue.Queue(maxsize=depth)
+        self.last_done = time.time()
+        self._lock = threading.Lock()
+        self._active = 0          # jobs accepted and not yet written
+        self._offered = {}        # job zip name -> time it entered the pipeline; until intake charged the quota
+        self._idle = threading.Condition(self._lock)
+        threads = [("intake", self._intake)] + [(f"render-{i+1}", self._render) for i in range(max(1, inflight))] + [("write", self._write)]
+        for name, fn in threads:
+            threading.Thread(target=fn, name=f"agent-{name}", daemon=True).start()
+
+    # -- bookkeeping --
+    def offer(self, z: Path) -> bool:
+        """Queue *z* for intake; False when the intake queue is full (try again later)."""
+        with self._lock:
+            try:
+                self.intake_q.put_nowait(z)
+            except queue.Full:
+                return False
+            self._active += 1
+            self._offered[z.name] = time.time()
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._active
+
+    def uncharged(self) -> int:
+        """Accepted jobs not yet counted against today's quota (still before intake)."""
+        with self._lock:
+            return len(self._offered)
+
+    def drain(self, timeout=None) -> bool:
+        """Wait until every accepted job has been written."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+    def _finish(self, src: Path, retry: bool = False) -> None:
+        cb = self.on_retry if retry else self.on_done
+        if cb is not None:
+            try:
+                cb(src)
+            except Exception:
+                pass
+        with self._idle:
+            self._active -= 1
+            self._idle.notify_all()
+        STATUS["in_pipeline"] = self.pending()
+
+    def _failed(self, z: Path, err: str, retry: bool = False) -> None:
+        print("ERR:", z.name, err)
+        STATUS["last_job_id"] = z.stem.replace("job_","")
+        STATUS["last_ok"] = False
+        STATUS["last_error"] = err
+        self._finish(z, retry)
+
+    def stage_sizes(self) -> dict:
+        return {"intake": self.intake_q.qsize(), "render": len(self.render_q), "write": self.write_q.qsize()}
+
+    # -- stages --
+    def _intake(self):
+        while True:
+            z = self.intake_q.get()
+            try:
+                job = read_job_zip(z)  # verifies signature & expiry
+            except Exception as e:
+                with self._lock:
+                    self._offered.pop(z.name, None)
+                metrics.VERIFY_FAILURES.inc()
+                self._failed(z, str(e))
+                continue
+            try:
+                charged = _quota_ok(self.db_path, CONFIG.get("max_per_day", 5))
+                run = _JobRun(z, job, _spool_dir(self.out_dir, job))
+            except Exception as e:
+                with self._lock:
+                    self._offered.pop(z.name, None)
+                self._failed(z, str(e), retry=isinstance(e, sqlite3.Error))  # e.g. a locked db: try again later
+                continue
+            with self._lock:
+                run.queued_at = self._offered.pop(z.name, None) or run.queued_at
+            if not charged:
+                metrics.QUOTA_REJECTIONS.inc()
+                self._failed(z, "Quota exceeded for today", retry=True)  # keep it for tomorrow
+                continue
+            units = []
+            for i, t in enumerate(run.tasks):
+                try:
+                    _task_args(t)
+                    units.append((run, i, t))
+                except (KeyError, TypeError, ValueError) as e:
+                    run.task_done(i, [], f"Bad task: {e!r}", 0.0)  # never reaches the render stage
+            if not units:
+                self.write_q.put(run)
+            for u in units:
+                self.render_q.put(u)   # blocks while the GPU is behind
+
+    def _render(self):
+        while True:
+            batch = self.render_q.take(int(CONFIG.get("max_batch", 8)))
+            while CONFIG.get("paused"):
+                time.sleep(1.0)
+            now = time.time()
+            for run, _, _ in batch:
+                if not run.started:
+                    run.started = True
+                    metrics.QUEUE_WAIT.observe(now - run.queued_at)
+            try:
+                finished, dur = _render_units(CONFIG["sd_host"], batch)
+            except Exception as e:
+                # fail just this batch's tasks (those not reported yet) and keep the stage alive
+                finished, dur = [run for run, ti, _ in batch if run.task_done(ti, [], str(e), 0.0)], 0.0
+            for run in finished:
+                self.write_q.put(run)
+            _duty_sleep(dur)
+
+    def _write(self):
+        while True:
+            run = self.write_q.get()
+            try:
+                images = run.images()
+                errors = run.errors + [e for e in run.task_errors if e]
+                ok = not errors
+                self.out_dir.mkdir(parents=True, exist_ok=True)
+                out = self.out_dir / f"result_{run.job['id']}.zip"
+                write_result_zip(run.job, images, out, ok=ok, errors=errors, extra=run.report())
+            except Exception as e:
+                self._failed(run.src, str(e))
+                continue
+            finally:
+                shutil.rmtree(run.spool, ignore_errors=True)
+            metrics.JOBS_DONE.inc()
+            try:
+                metrics.BYTES_WRITTEN.inc(out.stat().st_size)
+            except OSError:
+                pass
+            err = "; ".join(errors)
+            print("OK:" if ok else "ERR:", run.src.name, "â†’", out.name if ok else err)
+            STATUS["last_job_id"] = run.job["id"]
+            STATUS["last_ok"] = ok
+            STATUS["last_error"] = "" if ok else err
+            self.last_done = time.time()
+            self._finish(run.src)
 
 def main():
+    global RENDER_CACHE
     ap = argparse.ArgumentParser(description="Peer GPU Agent")
     ap.add_argument("mode", choices=["once","run"], help="'once' processes a single zip; 'run' watches a folder")
     ap.add_argument("--inbox", default="jobs/inbox")
@@ -245,11 +593,18 @@ def main():
     ap.add_argument("--interval", type=int, default=3, help="watch interval (seconds)")
     ap.add_argument("--panel-port", type=int, default=8090, help="0=disabled, otherwise serve control UI on this port")
     ap.add_argument("--config", default=None, help="path to agent_config.json")
+    ap.add_argument("--shared", action="store_true", help="share the inbox with other agents (lease files)")
+    ap.add_argument("--agent-id", default=None, help="this agent's name in a shared inbox (default: host-pid)")
+    ap.add_argument("--home", default=None,
+                    help="folder for this agent's status.json, quit.flag, state db and config "
+                         "(default: the inbox's parent; with --shared: the current folder)")
     args = ap.parse_args()
 
     inbox = Path(args.inbox); outbox = Path(args.outbox)
     inbox.mkdir(parents=True, exist_ok=True); outbox.mkdir(parents=True, exist_ok=True)
-    root = inbox.parent  # pack root (contains inbox/out)
+    # pack root (contains inbox/out); a shared inbox's parent is shared too, so per-agent files stay local
+    root = Path(args.home) if args.home else (Path.cwd() if args.shared else inbox.parent)
+    root.mkdir(parents=True, exist_ok=True)
     cfg_path = Path(args.config) if args.config else (root / "agent_config.json")
     st_path = root / "status.json"
     dbp = Path(args.state) if args.state else (root / "agent_state.db")
@@ -258,6 +613,8 @@ def main():
     _read_config(cfg_path)
     if args.sd_host:      CONFIG["sd_host"] = args.sd_host
     if args.max_per_day is not None: CONFIG["max_per_day"] = args.max_per_day
+    if int(CONFIG.get("render_cache_mb", 0)) > 0:
+        RENDER_CACHE = RenderCache(root / "cache" / "sd", int(CONFIG["render_cache_mb"]))
     STATUS["share_percent"] = CONFIG["share_percent"]
     STATUS["paused"] = CONFIG["paused"]
     STATUS["inactivity_minutes"] = CONFIG["inactivity_minutes"]
@@ -276,10 +633,25 @@ def main():
         print("Wrote:", out)
         return
 
-    # run watcher loop
-    seen = set()
-    last_job_time = time.time()
+    # run watcher loop: this thread only watches the inbox and feeds the pipeline
+    watcher = InboxWatcher(inbox, dbp)
     t_start = time.time()
+    lease = None
+    if args.shared:
+        # claimed zips leave the inbox for claimed/<id>/, then done/ (or back to the inbox on retry)
+        lease = LeaseManager(inbox, args.agent_id or default_agent_id(),
+                             lambda: _throughput(t_start))
+        STATUS["agent_id"] = lease.agent_id
+        on_done = lambda z: (lease.finish(z), watcher.done(z))
+        on_retry = lambda z: (lease.release(z), watcher.release(z))
+    else:
+        on_done, on_retry = watcher.done, watcher.release
+    pipe = AgentPipeline(outbox, dbp, inflight=int(CONFIG.get("sd_inflight", 1)),
+                         depth=int(CONFIG.get("pipeline_depth", 4)), on_done=on_done, on_retry=on_retry)
+    STATUS["inbox_watch"] = watcher.start()
+    if lease is not None:
+        lease.start(on_steal=watcher.wake)
+        print(f"[agent] shared inbox as {lease.agent_id}")
     while True:
         # config hot-reload
         _read_config(cfg_path)
@@ -288,53 +660,64 @@ def main():
         STATUS["inactivity_minutes"] = CONFIG["inactivity_minutes"]
         STATUS["max_per_day"] = CONFIG["max_per_day"]
         STATUS["uptime_sec"] = int(time.time() - t_start)
-        STATUS["since_last_job_sec"] = int(time.time() - last_job_time)
+        STATUS["since_last_job_sec"] = int(time.time() - pipe.last_done)
         STATUS["needs_attention"] = (not CONFIG["paused"]) and (STATUS["since_last_job_sec"] >= CONFIG["inactivity_minutes"] * 60)
 
-        # graceful quit
+        # graceful quit: let jobs already accepted (and charged to the quota) finish
         if (root / "quit.flag").exists():
             print("[agent] Quit flag detected. Exiting.")
             try: (root / "quit.flag").unlink()
             except Exception: pass
+            watcher.stop()
+            if not CONFIG["paused"]:
+                pipe.drain()
+            if lease is not None:
+                lease.retire()  # hand back what we claimed but never finished
             break
 
-        # queue
-        pending = [z for z in sorted(inbox.glob("job_*.zip")) if z.name not in seen]
-        STATUS["queue_len"] = len(pending)
+        # queue: priority, then deadline, from the zip comments; expired jobs never reach intake
+        # (shared inbox: plus zips already in our claimed folder, i.e. leftovers and stolen work)
+        candidates = watcher.pending()
+        if lease is not None:
+            candidates += [z for z in lease.owned() if not watcher.is_taken(z.name)]
+        pending, expired = plan_jobs(candidates)
+        for z in expired:
+            if lease is not None and z.parent == inbox:
+                z = lease.claim(z)
+                if z is None:
+                    continue  # another agent is dropping it
+            print("ERR:", z.name, "Job expired (not started)")
+            metrics.EXPIRED_DROPPED.inc()
+            STATUS["last_job_id"] = z.stem.replace("job_","")
+            STATUS["last_ok"] = False
+            STATUS["last_error"] = "Job expired"
+            if lease is not None:
+                lease.finish(z)
+            watcher.done(z)
+        STATUS["in_pipeline"] = pipe.pending()
+        STATUS["stages"] = pipe.stage_sizes()
+        STATUS["queue_len"] = len(pending) + STATUS["in_pipeline"]
+        STATUS["inbox_watch"] = watcher.mode
+        if lease is not None:
+            STATUS["agents"] = lease.peers()
         _write_status(st_path)
 
-        if CONFIG["paused"] or not pending:
-            time.sleep(args.interval)
-            continue
+        # only offer what today's quota can still take; the rest waits instead of being rejected
+        # (jobs past intake are already charged; only those still waiting for it count here)
+        room = _quota_left(dbp, int(CONFIG.get("max_per_day", 5))) - pipe.uncharged()
+        if not CONFIG["paused"] and room > 0:
+            for z in pending[:int(min(room, len(pending)))]:
+                if lease is not None and z.parent == inbox:
+                    z = lease.claim(z)
+                    if z is None:
+                        continue  # claimed by another agent meanwhile
+                watcher.taken(z)
+                if not pipe.offer(z):
+                    watcher.release(z)
+                    break
 
-        z = pending[0]
-        try:
-            out, jid, ok, err, dur = process_one(z, outbox, CONFIG["sd_host"], dbp)
-            print("OK:" if ok else "ERR:", z.name, "â†’", out.name if ok else err)
-            STATUS["last_job_id"] = jid
-            STATUS["last_ok"] = ok
-            STATUS["last_error"] = "" if ok else err
-            last_job_time = time.time()
-        except Exception as e:
-            print("ERR:", z.name, e)
-            STATUS["last_job_id"] = z.stem.replace("job_","")
-            STATUS["last_ok"] = False
-            STATUS["last_error"] = str(e)
-
-        # duty-cycle sleep based on share_percent
-        share = max(0, min(100, int(CONFIG.get("share_percent", 100))))
-        if share <= 0:
-            # sleep long if 0%
-            time.sleep(max(5, args.interval))
-        elif share < 100:
-            # simple duty-cycle: sleep ~= work_time * (100-share)/share
-            work = max(0.1, dur if 'dur' in locals() else 1.0)
-            sleep_extra = work * (100.0 - share) / max(1.0, share)
-            time.sleep(min(60.0, sleep_extra))
-
-        seen.add(z.name)
-        # small idle tick
-        time.sleep(max(0.2, args.interval * 0.2))
+        # sleep until the inbox changes; polling mode just waits out the interval
+        watcher.wait(args.interval)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Coalescing of txt2img tasks into batched SD calls.
+
+A1111 renders ``batch_size`` images from seeds ``seed, seed+1, ...``, so two
+tasks can share one call without changing their output when everything but
+seed/count is identical and the second task's seed continues where the first
+one's range ends (or both use a random seed, -1). ``take_batch`` builds such
+chains from the head of the pending list, across jobs, up to ``max_images``.
+The caller splits the returned images back by each task's count.
+
+``TaskBatcher`` is the bounded hand-off between the agent's intake stage and
+its render workers: intake ``put``s (run, index, task) units, workers ``take``
+whole batches.
+"""
+import threading
+
+RANDOM_SEED = -1
+
+
+def task_key(t: dict) -> tuple:
+    """Everything that must match for two tasks to share a call."""
+    return tuple(sorted((k, repr(v)) for k, v in t.items() if k not in ("seed", "count")))
+
+
+def _seed(t: dict) -> int:
+    return int(t.get("seed", RANDOM_SEED))
+
+
+def take_batch(units: list, max_images: int, task_of=lambda u: u[2]) -> list:
+    """
+    Pop the first unit of *units* plus every unit that can extend its seed
+    chain (scanning the whole list), keeping at most *max_images* images.
+    Returns the batch in seed order; *units* is modified in place.
+    """
+    first = units.pop(0)
+    t0 = task_of(first)
+    key, batch = task_key(t0), [first]
+    total = int(t0.get("count", 1))
+    random = _seed(t0) == RANDOM_SEED
+    nxt = _seed(t0) + total
+    grew = True
+    while grew and units and total < max_images:
+        grew = False
+        for i, u in enumerate(units):
+            t = task_of(u)
+            n = int(t.get("count", 1))
+            if total + n > max_images or task_key(t) != key:
+                continue
+            s = _seed(t)
+            if (random and s == RANDOM_SEED) or (not random and s == nxt):
+                batch.append(units.pop(i))
+                total += n
+                nxt += n
+                grew = True
+                break
+    return batch
+
+
+class TaskBatcher:
+    def __init__(self, max_pending: int, task_of=lambda u: u[2]):
+        self.max_pending = max(1, max_pending)
+        self.task_of = task_of
+        self._units = []
+        self._cv = threading.Condition()
+
+    def __len__(self) -> int:
+        with self._cv:
+            return len(self._units)
+
+    def put(self, unit) -> None:
+        """Queue *unit*, blocking while ``max_pending`` units are already waiting."""
+        with self._cv:
+            self._cv.wait_for(lambda: len(self._units) < self.max_pending)
+            self._units.append(unit)
+            self._cv.notify_all()
+
+    def take(self, max_images: int) -> list:
+        """Next batch of units (at least one), blocking until there is work."""
+        with self._cv:
+            self._cv.wait_for(lambda: bool(self._units))
+            batch = take_batch(self._units, max(1, max_images), self.task_of)
+            self._cv.notify_all()
+            return batch
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Inbox watching for the peer agent.
+
+``InboxWatcher.wait()`` returns as soon as watchfiles reports a change in
+the inbox (inotify/FSEvents/ReadDirectoryChangesW), or after the timeout.
+Without watchfiles, or if the watcher dies, it degrades to plain polling.
+Either way, listing goes through ``dir_index``, so an unchanged inbox costs
+one ``stat``.
+
+Which jobs were already handled is kept in the agent's state DB, in table
+``processed``, keyed by name plus (mtime, size). A restart therefore does
+not redo them, and a job rewritten in place counts as new. Rows for files
+that left the inbox are dropped and the table is capped at ``MAX_PROCESSED``
+rows, so the set stays bounded.
+"""
+import fnmatch, os, sqlite3, threading, time
+from pathlib import Path
+
+from ..utils.dirindex import dir_index
+
+MAX_PROCESSED = 5000
+SETTLE_SEC = 1.0        # ignore files modified this recently (still being copied in)
+PRUNE_EVERY = 100       # marks between sweeps of rows whose file is gone
+
+
+class ProcessedLog:
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._marks = 0
+        with self._con() as con:
+            con.execute("CREATE TABLE IF NOT EXISTS processed(name TEXT PRIMARY KEY, mtime REAL, size INTEGER, at REAL)")
+            rows = con.execute("SELECT name, mtime, size FROM processed").fetchall()
+        self._done = {n: (m, s) for n, m, s in rows}
+
+    def _con(self):
+        return sqlite3.connect(self.db_path)
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def is_done(self, name: str, mtime: float, size: int) -> bool:
+        return self._done.get(name) == (mtime, size)
+
+    def mark(self, path: Path) -> None:
+        try:
+            st = path.stat()
+        except OSError:
+            return
+        with self._lock:
+            self._done[path.name] = (st.st_mtime, st.st_size)
+            self._marks += 1
+            sweep = self._marks % PRUNE_EVERY == 0 or len(self._done) > MAX_PROCESSED
+            con = self._con()
+            try:
+                con.execute("INSERT OR REPLACE INTO processed(name, mtime, size, at) VALUES(?,?,?,?)",
+                            (path.name, st.st_mtime, st.st_size, time.time()))
+                if sweep:
+                    self._prune(con, path.parent)
+                con.commit()
+            finally:
+                con.close()
+
+    def _prune(self, con, inbox: Path) -> None:
+        gone = [n for n in self._done if not (inbox / n).exists()]
+        con.executemany("DELETE FROM processed WHERE name=?", [(n,) for n in gone])
+        for n in gone:
+            del self._done[n]
+        extra = len(self._done) - MAX_PROCESSED
+        if extra > 0:
+            old = [n for (n,) in con.execute("SELECT name FROM processed ORDER BY at LIMIT ?", (extra,))]
+            con.executemany("DELETE FROM processed WHERE name=?", [(n,) for n in old])
+            for n in old:
+                self._done.pop(n, None)
+
+
+class InboxWatcher:
+    def __init__(self, inbox: Path, db_path: Path, pattern: str = "job_*.zip"):
+        self.inbox = inbox
+        self.pattern = pattern
+        self.processed = ProcessedLog(db_path)
+        self.mode = "poll"
+        self._index = dir_index(inbox, pattern)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._in_flight = set()
+        self._touched = set()   # names reported changed by the watcher since the last pending()
+        self._lock = threading.Lock()
+        self._unsettled = False
+        self._thread = None
+
+    def start(self) -> str:
+        """Start the event watcher if watchfiles is available; returns "events" or "poll"."""
+        try:
+            import watchfiles  # noqa: F401
+        except Exception:
+            return self.mode
+        self.mode = "events"
+        self._thread = threading.Thread(target=self._watch, name="agent-inbox", daemon=True)
+        self._thread.start()
+        return self.mode
+
+    def _watch(self) -> None:
+        import watchfiles
+        try:
+            for changes in watchfiles.watch(self.inbox, stop_event=self._stop, recursive=False,
+                                            debounce=200, raise_interrupt=False):
+                names = {os.path.basename(p) for _, p in changes}
+                names = {n for n in names if fnmatch.fnmatch(n, self.pattern)}
+                if names:
+                    with self._lock:
+                        self._touched |= names
+                    self._wake.set()
+        except Exception:
+            pass
+        if not self._stop.is_set():
+            self.mode = "poll"
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def wait(self, timeout: float) -> None:
+        """Block until the inbox changes (events mode) or *timeout* passes."""
+        if self._unsettled:
+            timeout = min(timeout, SETTLE_SEC)
+        self._wake.wait(timeout)
+        self._wake.clear()
+
+    def pending(self) -> list:
+        """Settled job zips that are neither processed nor in flight, by name."""
+        now = time.time()
+        self._unsettled = False
+        out = []
+        with self._lock:
+            in_flight = set(self._in_flight)
+            touched, self._touched = self._touched, set()
+        for e in self._index.entries():
+            if e.name in in_flight:
+                continue
+            # rewrites in place don't change the folder mtime, so the index entry can be stale
+            if e.name not in touched and self.processed.is_done(e.name, e.mtime, e.size):
+                continue
+            try:
+                st = e.path.stat()  # the index entry may predate the last write
+            except OSError:
+                continue
+            if self.processed.is_done(e.name, st.st_mtime, st.st_size):
+                continue
+            if now - st.st_mtime < SETTLE_SEC:
+                self._unsettled = True
+                if e.name in touched:
+                    with self._lock:
+                        self._touched.add(e.name)
+                continue
+            out.append(e.path)
+        return sorted(out, key=lambda p: p.name)
+
+    def taken(self, path: Path) -> None:
+        with self._lock:
+            self._in_flight.add(path.name)
+
+    def is_taken(self, name: str) -> bool:
+        with self._lock:
+            return name in self._in_flight
+
+    def release(self, path: Path) -> None:
+        """*path* was not accepted after all; offer it again later."""
+        with self._lock:
+            self._in_flight.discard(path.name)
+
+    def done(self, path: Path) -> None:
+        """Called when the pipeline is finished with *path* (written or failed)."""
+        self.processed.mark(path)
+        self.release(path)
+        self._wake.set()  # a slot freed up: feed the pipeline without waiting for the timeout
@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-import base64, hashlib, hmac, json, time, zipfile, io, os, datetime
+import base64, hashlib, hmac, json, time, zipfile, io, os, datetime, shutil, struct
 from pathlib import Path
 
 def _secret() -> bytes:
@@ -22,7 +22,7 @@ def verify_payload(payload: dict, sig: str) -> bool:
     except Exception:
         return False
 
-def make_job_dict(job_id: str, requester: str, tasks: list, ttl_hours=24):
+def make_job_dict(job_id: str, requester: str, tasks: list, ttl_hours=24, priority=0):
     now = int(time.time())
     return {
         "id": job_id,
@@ -30,14 +30,51 @@ def make_job_dict(job_id: str, requester: str, tasks: list, ttl_hours=24):
         "created": now,
         "expires": now + ttl_hours*3600,
         "version": 1,
+        "priority": int(priority),  # higher runs first on the agent
         "tasks": tasks,  # e.g. [{"type":"txt2img","prompt":"...","seed":123,"steps":28,"width":768,"height":1024,"count":1}]
     }
 
+def job_meta(job: dict) -> dict:
+    """Scheduling summary stored (unsigned) as the job zip's comment."""
+    tasks = job.get("tasks", [])
+    n = lambda t, k, d=0: int(t.get(k, d) or d)
+    return {
+        "v": 1,
+        "id": job.get("id"),
+        "priority": int(job.get("priority", 0)),
+        "expires": int(job.get("expires", 0)),
+        "tasks": len(tasks),
+        "images": sum(n(t, "count", 1) for t in tasks),
+        "pixels": sum(n(t, "width") * n(t, "height") * n(t, "count", 1) for t in tasks),
+    }
+
 def write_job_zip(job: dict, out_zip: Path):
     payload = {"job": job}
     payload["sig"] = sign_payload(payload)
     with zipfile.ZipFile(out_zip, "w", zipfile.ZIP_DEFLATED) as z:
         z.writestr("job.json", json.dumps(payload, indent=2, ensure_ascii=False))
+        z.comment = json.dumps(job_meta(job), separators=(",",":")).encode("utf-8")
+
+def read_job_meta(in_zip: Path):
+    """
+    The job_meta() comment of *in_zip*, read from the end-of-central-directory
+    record only (no unzip, no signature check); None for zips without one.
+    It is a hint for scheduling: read_job_zip still verifies the job itself.
+    """
+    try:
+        with open(in_zip, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - (22 + 0xFFFF)))
+            tail = f.read()
+        i = tail.rfind(b"PK\x05\x06")
+        if i < 0 or i + 22 > len(tail):
+            return None
+        (clen,) = struct.unpack("<H", tail[i+20:i+22])
+        meta = json.loads(tail[i+22:i+22+clen].decode("utf-8"))
+        return meta if isinstance(meta, dict) and meta.get("v") == 1 else None
+    except (OSError, ValueError, struct.error):
+        return None
 
 def read_job_zip(in_zip: Path) -> dict:
     with zipfile.ZipFile(in_zip, "r") as z:
@@ -48,7 +85,8 @@ def read_job_zip(in_zip: Path) -> dict:
     if int(time.time()) > int(payload["job"]["expires"]): raise RuntimeError("Job expired")
     return payload["job"]
 
-def write_result_zip(job: dict, images: list[tuple[str, bytes]], out_zip: Path, ok=True, errors=None):
+def write_result_zip(job: dict, images: list[tuple], out_zip: Path, ok=True, errors=None, extra=None):
+    """Images are (name, bytes) or (name, path); files are streamed into the zip entry. *extra* adds fields to result.json."""
     result = {
         "job_id": job["id"],
         "ok": bool(ok),
@@ -57,12 +95,17 @@ def write_result_zip(job: dict, images: list[tuple[str, bytes]], out_zip: Path,
         "created": int(time.time()),
         "version": 1
     }
+    result.update(extra or {})
     payload = {"result": result}
     payload["sig"] = sign_payload(payload)
     with zipfile.ZipFile(out_zip, "w", zipfile.ZIP_DEFLATED) as z:
         z.writestr("result.json", json.dumps(payload, indent=2, ensure_ascii=False))
         for name, data in images:
-            z.writestr(name, data)
+            if isinstance(data, Path):
+                with open(data, "rb") as src, z.open(name, "w") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            else:
+                z.writestr(name, data)
 
 def read_result_zip(in_zip: Path) -> dict:
     with zipfile.ZipFile(in_zip, "r") as z:
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Lease files for several agents sharing one inbox (``run --shared``).
+
+An agent claims a job by renaming ``inbox/job_x.zip`` into
+``inbox/claimed/<agent-id>/``. The rename is atomic, so exactly one agent
+wins. Finished (or expired) jobs move on to ``inbox/done/``. A job the agent
+cannot take today (quota) is renamed back into the inbox for the others.
+
+Every agent rewrites ``claimed/<agent-id>/heartbeat.json`` every
+``HEARTBEAT_SEC`` with its throughput counters. An agent whose heartbeat is
+older than ``LEASE_SEC`` counts as dead: the first live agent to notice
+renames its claimed zips into its own folder and runs them (work stealing).
+The heartbeat files of all agents are what ``status.json`` reports as
+``agents``.
+"""
+import json, os, socket, threading, time
+from pathlib import Path
+
+HEARTBEAT_SEC = 10.0
+LEASE_SEC = 60.0
+PATTERN = "job_*.zip"
+
+
+def default_agent_id() -> str:
+    host = "".join(c if c.isalnum() or c in "-_." else "-" for c in socket.gethostname()) or "agent"
+    return f"{host}-{os.getpid()}"
+
+
+class LeaseManager:
+    def __init__(self, inbox: Path, agent_id: str, stats_fn=None):
+        self.inbox = inbox
+        self.agent_id = agent_id
+        self.claimed_root = inbox / "claimed"
+        self.dir = self.claimed_root / agent_id
+        self.done_dir = inbox / "done"
+        self.stats_fn = stats_fn or (lambda: {})
+        self.stolen = 0
+        self._stop = threading.Event()
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.done_dir.mkdir(parents=True, exist_ok=True)
+
+    # -- claims --
+    def claim(self, z: Path):
+        """Move *z* from the inbox into our folder; None if another agent got it first."""
+        dst = self.dir / z.name
+        try:
+            os.rename(z, dst)
+        except OSError:
+            return None
+        return dst
+
+    def finish(self, p: Path) -> None:
+        """Done with a claimed zip (written, failed or expired): archive it."""
+        try:
+            os.replace(p, self.done_dir / p.name)
+        except OSError:
+            pass
+
+    def release(self, p: Path) -> None:
+        """Give a claimed zip back to the shared inbox."""
+        dst = self.inbox / p.name
+        try:
+            if not dst.exists():
+                os.rename(p, dst)
+        except OSError:
+            pass
+
+    def owned(self) -> list:
+        """Zips in our folder: leftovers from a previous run plus stolen work."""
+        try:
+            return sorted(self.dir.glob(PATTERN))
+        except OSError:
+            return []
+
+    # -- heartbeat & stealing --
+    def beat(self) -> None:
+        info = {"agent": self.agent_id, "host": socket.gethostname(), "pid": os.getpid(),
+                "ts": int(time.time()), "stolen": self.stolen}
+        info.update(self.stats_fn())
+        tmp = self.dir / "heartbeat.json.part"
+        try:
+            tmp.write_text(json.dumps(info, indent=2), encoding="utf-8")
+            os.replace(tmp, self.dir / "heartbeat.json")
+        except OSError:
+            pass
+
+    def _dead(self, d: Path, now: float) -> bool:
+        try:
+            return now - (d / "heartbeat.json").stat().st_mtime > LEASE_SEC
+        except OSError:
+            try:  # never beat (crashed at start): judge by the folder itself
+                return now - d.stat().st_mtime > LEASE_SEC
+            except OSError:
+                return False
+
+    def steal(self) -> int:
+        """Take over the claimed zips of agents whose lease expired; returns how many we got."""
+        now, got = time.time(), 0
+        try:
+            others = [d for d in self.claimed_root.iterdir() if d.is_dir() and d.name != self.agent_id]
+        except OSError:
+            return 0
+        for d in others:
+            if not self._dead(d, now):
+                continue
+            for z in sorted(d.glob(PATTERN)):
+                try:
+                    os.rename(z, self.dir / z.name)
+                    got += 1
+                except OSError:
+                    pass  # another agent stole it first
+            if not any(d.glob(PATTERN)):
+                for f in d.iterdir():
+                    try: f.unlink()
+                    except OSError: pass
+                try: d.rmdir()
+                except OSError: pass
+        self.stolen += got
+        return got
+
+    def peers(self) -> dict:
+        """Heartbeat info of every agent on this inbox, with ``alive`` and ``claimed`` counts."""
+        out, now = {}, time.time()
+        try:
+            dirs = [d for d in self.claimed_root.iterdir() if d.is_dir()]
+        except OSError:
+            return out
+        for d in dirs:
+            try:
+                info = json.loads((d / "heartbeat.json").read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                info = {}
+            if d.name == self.agent_id:
+                info.update(self.stats_fn())  # our own counters needn't wait for the next beat
+            info.pop("ts", None)
+            info["alive"] = not self._dead(d, now)
+            info["claimed"] = sum(1 for _ in d.glob(PATTERN))
+            out[d.name] = info
+        return out
+
+    def start(self, on_steal=None) -> None:
+        """Heartbeat (and steal) every HEARTBEAT_SEC on a daemon thread."""
+        def run():
+            while not self._stop.is_set():
+                self.beat()
+                if self.steal() and on_steal is not None:
+                    on_steal()
+                self._stop.wait(HEARTBEAT_SEC)
+        self.beat()
+        threading.Thread(target=run, name="agent-lease", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def retire(self) -> None:
+        """Clean exit: stop beating, hand unfinished claims back, remove our folder."""
+        self.stop()
+        for z in self.owned():
+            self.release(z)
+        for f in ("heartbeat.json", "heartbeat.json.part"):
+            try: (self.dir / f).unlink()
+            except OSError: pass
+        try: self.dir.rmdir()
+        except OSError: pass
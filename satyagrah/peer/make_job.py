@@ -15,6 +15,7 @@ def main():
     ap.add_argument("--height", type=int, default=1024)
     ap.add_argument("--count", type=int, default=1)
     ap.add_argument("--ttl", type=int, default=24, help="hours until expires")
+    ap.add_argument("--priority", type=int, default=0, help="higher runs first on the agent")
     args = ap.parse_args()
 
     outbox = Path(args.outbox); outbox.mkdir(parents=True, exist_ok=True)
@@ -28,7 +29,7 @@ def main():
         "height": args.height,
         "count": args.count
     }]
-    job = make_job_dict(job_id, args.requester, tasks, ttl_hours=args.ttl)
+    job = make_job_dict(job_id, args.requester, tasks, ttl_hours=args.ttl, priority=args.priority)
     out_zip = outbox / f"job_{job_id}.zip"
     write_job_zip(job, out_zip)
     print("Wrote:", out_zip)
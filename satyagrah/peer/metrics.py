@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal Prometheus-style metrics for the peer agent (no client library).
+
+    SD_SECONDS.observe(dur)          # histogram
+    IMAGES.inc(4)                    # counter
+    render()                         # text exposition format 0.0.4
+
+Served by the agent panel at /metrics.
+"""
+import math, threading, time
+
+_lock = threading.Lock()
+_registry = []
+
+
+def _fmt(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not float(v).is_integer() else str(int(v))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name, self.help, self.value = name, help, 0.0
+        _registry.append(self)
+
+    def inc(self, n: float = 1.0) -> None:
+        with _lock:
+            self.value += n
+
+    def samples(self):
+        yield self.name, "", self.value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn=None):
+        super().__init__(name, help)
+        self.fn = fn  # computed on scrape when given
+
+    def set(self, v: float) -> None:
+        with _lock:
+            self.value = v
+
+    def samples(self):
+        yield self.name, "", self.fn() if self.fn else self.value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets):
+        self.name, self.help = name, help
+        self.buckets = sorted(buckets) + [math.inf]
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+        _registry.append(self)
+
+    def observe(self, v: float) -> None:
+        with _lock:
+            self.sum += v
+            self.count += 1
+            for i, b in enumerate(self.buckets):
+                if v <= b:
+                    self.counts[i] += 1
+                    break
+
+    def samples(self):
+        acc = 0
+        for b, c in zip(self.buckets, self.counts):
+            acc += c
+            yield self.name + "_bucket", f'le="{_fmt(b)}"', acc
+        yield self.name + "_sum", "", self.sum
+        yield self.name + "_count", "", self.count
+
+
+def render() -> str:
+    out = []
+    with _lock:
+        for m in _registry:
+            out.append(f"# HELP {m.name} {m.help}")
+            out.append(f"# TYPE {m.name} {m.kind}")
+            for name, labels, v in m.samples():
+                out.append(f"{name}{{{labels}}} {_fmt(v)}" if labels else f"{name} {_fmt(v)}")
+    return "\n".join(out) + "\n"
+
+
+_started = time.time()
+
+SD_SECONDS = Histogram("agent_sd_call_seconds", "Duration of txt2img calls to the SD host.",
+                       (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600))
+SD_ERRORS = Counter("agent_sd_call_errors_total", "txt2img calls that failed.")
+IMAGES = Counter("agent_images_total", "Images rendered by SD.")
+CACHE_IMAGES = Counter("agent_cache_images_total", "Images served from the local render cache.")
+BYTES_WRITTEN = Counter("agent_result_bytes_total", "Bytes of result zips written.")
+JOBS_DONE = Counter("agent_jobs_total", "Result zips written.")
+QUEUE_WAIT = Histogram("agent_queue_wait_seconds", "Time from a job entering the pipeline until its render starts.",
+                       (0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600))
+VERIFY_FAILURES = Counter("agent_verify_failures_total", "Job zips rejected by signature/expiry checks.")
+EXPIRED_DROPPED = Counter("agent_expired_dropped_total", "Jobs dropped as expired before intake.")
+QUOTA_REJECTIONS = Counter("agent_quota_rejections_total", "Jobs turned away by the daily quota.")
+DUTY_SLEEP = Counter("agent_duty_sleep_seconds_total", "Time the render stage slept to honour share_percent.")
+SD_BUSY = Counter("agent_sd_busy_seconds_total", "Time spent inside txt2img calls.")
+IMAGES_PER_SEC = Gauge("agent_images_per_second", "Rendered images per second of agent uptime.",
+                       lambda: IMAGES.value / max(1.0, time.time() - _started))
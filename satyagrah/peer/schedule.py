@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Ordering of pending job zips for the peer agent.
+
+Uses the job_meta() comment written by write_job_zip (read from the zip's
+end record, cached per file version), so nothing is unzipped or verified
+before a job is chosen. Expired jobs are split off before they cost quota.
+The rest is ordered by priority (high first), then deadline (soonest first),
+then estimated pixels (smallest first), then name. Zips without metadata
+sort as priority 0 with no deadline.
+"""
+import math, time
+from functools import lru_cache
+from pathlib import Path
+
+from .jobfmt import read_job_meta
+
+
+@lru_cache(maxsize=4096)
+def _meta(path: str, mtime_ns: int, size: int):
+    return read_job_meta(Path(path))
+
+
+def job_meta(path: Path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return _meta(str(path), st.st_mtime_ns, st.st_size)
+
+
+def plan(paths: list, now: float = None) -> tuple:
+    """(runnable paths in scheduling order, expired paths)."""
+    now = time.time() if now is None else now
+    ready, expired = [], []
+    for p in paths:
+        m = job_meta(p) or {}
+        exp = int(m.get("expires") or 0)
+        if exp and exp < now:
+            expired.append(p)
+            continue
+        ready.append(((-int(m.get("priority") or 0), exp or math.inf, int(m.get("pixels") or 0), p.name), p))
+    ready.sort(key=lambda x: x[0])
+    return [p for _, p in ready], expired
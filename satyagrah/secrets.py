@@ -4,6 +4,8 @@ import json, os
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from .utils import filecache
+
 try:
     import keyring  # Uses Windows Credential Manager on Windows
     HAVE_KEYRING = True
@@ -18,18 +20,14 @@ INDEX_PATH = ROOT / "configs" / "creds_index.json"  # stores key *names* only (n
 def _svc(service: str) -> str:
     return f"{NAMESPACE}:{service.strip().lower()}"
 
-def _load_index() -> Dict[str, List[str]]:
-    try:
-        INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
-        if INDEX_PATH.exists():
-            return json.loads(INDEX_PATH.read_text(encoding="utf-8") or "{}")
-    except Exception:
-        pass
-    return {}
+def _load_index(mutable: bool = False) -> Dict[str, List[str]]:
+    data = filecache.load_json(INDEX_PATH, {}, copy=mutable)
+    return data if isinstance(data, dict) else {}
 
 def _save_index(idx: Dict[str, List[str]]) -> None:
     INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
     INDEX_PATH.write_text(json.dumps(idx, indent=2, ensure_ascii=False), encoding="utf-8")
+    filecache.invalidate(INDEX_PATH)
 
 def list_keys(service: str) -> List[str]:
     idx = _load_index()
@@ -39,7 +37,7 @@ def set_secret(service: str, key: str, value: str) -> None:
     if not HAVE_KEYRING:
         raise RuntimeError("keyring not available. Install with: pip install keyring")
     keyring.set_password(_svc(service), key, value)
-    idx = _load_index()
+    idx = _load_index(mutable=True)
     items = idx.get(service.lower(), [])
     if key not in items:
         items.append(key)
@@ -57,7 +55,7 @@ def delete_secret(service: str, key: str) -> bool:
     from keyring.errors import PasswordDeleteError
     try:
         keyring.delete_password(_svc(service), key)
-        idx = _load_index()
+        idx = _load_index(mutable=True)
         items = [k for k in idx.get(service.lower(), []) if k != key]
         idx[service.lower()] = items
         _save_index(idx)
@@ -0,0 +1,171 @@
+"""
+Per-date image inventory shared by the exporters.
+
+A date's images live under ``exports/<date>`` and ``data/runs/<date>`` (which
+contains ``art/``). Each tree is walked once and files are de-duplicated by
+real path, so art is no longer counted twice. Results are cached in memory
+and in ``data/cache/inventory/<date>.json``, keyed on the mtimes of every
+directory in those trees; on a rescan, dimensions are only read for files
+whose size or mtime changed.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+IMAGE_EXTS: Tuple[str, ...] = (".png", ".jpg", ".jpeg")
+ALL_IMAGE_EXTS: Tuple[str, ...] = IMAGE_EXTS + (".webp",)
+_VERSION = 1
+
+_lock = threading.Lock()
+_mem: Dict[Tuple[str, str], Tuple[list, List["ImageEntry"]]] = {}
+
+
+@dataclass(frozen=True)
+class ImageEntry:
+    path: Path
+    size: int
+    mtime: float
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    def rel(self, root: Path) -> str:
+        return self.path.relative_to(root).as_posix()
+
+
+def _bases(date: str, root: Path) -> List[Path]:
+    return [root / "exports" / date, root / "data" / "runs" / date]
+
+
+def _cache_file(date: str, root: Path) -> Path:
+    return root / "data" / "cache" / "inventory" / f"{date}.json"
+
+
+def _signature(bases: Sequence[Path]) -> list:
+    """[(dir, mtime_ns), ...] for every directory under *bases* (files are not stat'ed)."""
+    sig = []
+    stack = [b for b in bases if b.is_dir()]
+    while stack:
+        d = stack.pop()
+        try:
+            sig.append((str(d), d.stat().st_mtime_ns))
+            with os.scandir(d) as it:
+                stack.extend(Path(e.path) for e in it if e.is_dir(follow_symlinks=False))
+        except OSError:
+            continue
+    return sorted(sig)
+
+
+def _dims(path: Path) -> Tuple[Optional[int], Optional[int]]:
+    try:
+        from PIL import Image
+        with Image.open(path) as im:  # header only
+            return im.size
+    except Exception:
+        return None, None
+
+
+def _entry(path: Path, prev: Optional[ImageEntry] = None) -> Optional[ImageEntry]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    if prev is not None and prev.size == st.st_size and prev.mtime == st.st_mtime:
+        return ImageEntry(path, st.st_size, st.st_mtime, prev.width, prev.height)
+    w, h = _dims(path)
+    return ImageEntry(path, st.st_size, st.st_mtime, w, h)
+
+
+def _scan(bases: Sequence[Path], previous: Iterable[ImageEntry]) -> List[ImageEntry]:
+    prev = {str(e.path): e for e in previous}
+    seen = set()
+    out: List[ImageEntry] = []
+    for base in bases:
+        if not base.is_dir():
+            continue
+        for p in sorted(base.rglob("*")):
+            if p.suffix.lower() not in ALL_IMAGE_EXTS or not p.is_file():
+                continue
+            real = os.path.realpath(p)
+            if real in seen:
+                continue
+            seen.add(real)
+            e = _entry(p, prev.get(str(p)))
+            if e is not None:
+                out.append(e)
+    return out
+
+
+def _load_disk(date: str, root: Path) -> Tuple[list, List[ImageEntry]]:
+    try:
+        data = json.loads(_cache_file(date, root).read_text(encoding="utf-8"))
+        if data.get("version") != _VERSION:
+            return [], []
+        items = [ImageEntry(Path(d["path"]), int(d["size"]), float(d["mtime"]), d.get("width"), d.get("height"))
+                 for d in data.get("items", [])]
+        return [tuple(x) for x in data.get("sig", [])], items
+    except Exception:
+        return [], []
+
+
+def _save_disk(date: str, root: Path, sig: list, items: List[ImageEntry]) -> None:
+    p = _cache_file(date, root)
+    try:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        rows = [dict(asdict(e), path=str(e.path)) for e in items]
+        tmp = p.with_suffix(".json.part")
+        tmp.write_text(json.dumps({"version": _VERSION, "sig": sig, "items": rows}), encoding="utf-8")
+        tmp.replace(p)
+    except OSError:
+        pass
+
+
+def inventory(date: str, root: Path) -> List[ImageEntry]:
+    """All images for *date* (png/jpg/jpeg/webp), exports tree first, de-duplicated."""
+    root = Path(root)
+    key = (str(root), date)
+    bases = _bases(date, root)
+    sig = _signature(bases)
+    with _lock:
+        hit = _mem.get(key)
+    if hit is None:
+        hit = _load_disk(date, root)
+    if hit[0] == sig:
+        with _lock:
+            _mem[key] = hit
+        return list(hit[1])
+    items = _scan(bases, hit[1])
+    with _lock:
+        _mem[key] = (sig, items)
+    _save_disk(date, root, sig, items)
+    return list(items)
+
+
+def images_for(date: str, root: Path, files: Optional[Sequence[str]] = None,
+               limit: Optional[int] = None, exts: Sequence[str] = IMAGE_EXTS) -> List[ImageEntry]:
+    """
+    Images an exporter should use: the explicit *files* selection (existing
+    paths, in the given order) or, when that is empty, the date's inventory.
+    """
+    picked: List[ImageEntry] = []
+    if files:
+        known = {str(e.path): e for e in inventory(date, root)}
+        for f in files:
+            p = Path(f)
+            e = known.get(str(p)) or (_entry(p) if p.is_file() else None)
+            if e is not None:
+                picked.append(e)
+    if not picked:
+        picked = [e for e in inventory(date, root) if e.path.suffix.lower() in exts]
+    return picked[:limit] if limit else picked
+
+
+def invalidate(date: Optional[str] = None) -> None:
+    """Drop in-memory entries (all dates when *date* is None)."""
+    with _lock:
+        for k in [k for k in _mem if date is None or k[1] == date]:
+            del _mem[k]
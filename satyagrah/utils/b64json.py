@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental decoding of JSON responses that carry base64 blobs.
+
+SD's txt2img answer is ``{"images": ["<base64>", ...], "parameters": ...,
+"info": "..."}``. ``json.loads`` + ``b64decode`` keeps every image in memory
+two or three times. ``stream_b64_array`` instead reads the body in chunks,
+decodes each string of the chosen array as it arrives and writes the bytes
+to a sink supplied per item, so only one chunk is held at a time. The other
+top-level keys are small and are returned parsed.
+
+    def sink(i):
+        return open(spool / f"{i}.png", "wb")
+    sizes, rest = stream_b64_array(resp.raw, "images", sink)
+"""
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, BinaryIO, Callable, Dict, List, Tuple
+
+CHUNK = 64 * 1024
+
+_ESCAPES = {ord("/"): b"/", ord("\\"): b"\\", ord('"'): b'"', ord("b"): b"\b",
+            ord("f"): b"\f", ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t"}
+_WS = b" \t\r\n"
+
+
+class _Reader:
+    def __init__(self, fp: BinaryIO, chunk: int):
+        self.fp = fp
+        self.chunk = chunk
+        self.buf = b""
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        data = self.fp.read(self.chunk)
+        if not data:
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> int:
+        while self.pos >= len(self.buf):
+            if not self._fill():
+                raise ValueError("unexpected end of JSON")
+        return self.buf[self.pos]
+
+    def take(self) -> int:
+        c = self.peek()
+        self.pos += 1
+        return c
+
+    def ws(self) -> int:
+        while self.peek() in _WS:
+            self.pos += 1
+        return self.buf[self.pos]
+
+    def expect(self, ch: bytes) -> None:
+        if self.ws() != ch[0]:
+            raise ValueError(f"expected {ch!r} in JSON")
+        self.pos += 1
+
+    def string(self, emit: Callable[[bytes], None]) -> None:
+        """Stream the raw (unescaped) bytes of a string whose opening quote was consumed."""
+        while True:
+            if self.pos >= len(self.buf) and not self._fill():
+                raise ValueError("unterminated JSON string")
+            q = self.buf.find(b'"', self.pos)
+            b = self.buf.find(b"\\", self.pos, q if q >= 0 else len(self.buf))
+            end = b if b >= 0 else q
+            if end < 0:
+                emit(self.buf[self.pos:])
+                self.pos = len(self.buf)
+                continue
+            if end > self.pos:
+                emit(self.buf[self.pos:end])
+            self.pos = end + 1
+            if end == q:
+                return
+            c = self.take()
+            if c == ord("u"):
+                hexd = bytes(self.take() for _ in range(4))
+                emit(chr(int(hexd, 16)).encode("utf-8", "surrogatepass"))
+            else:
+                emit(_ESCAPES.get(c, bytes([c])))
+
+    def raw_value(self) -> bytes:
+        """Bytes of the next JSON value (any type), for ``json.loads``."""
+        out: List[bytes] = []
+        c = self.ws()
+        if c == ord('"'):
+            self.pos += 1
+            out.append(b'"')
+            self._raw_string(out)
+            return b"".join(out)
+        if c in b"{[":
+            depth = 0
+            while True:
+                c = self.take()
+                if c == ord('"'):
+                    out.append(b'"')
+                    self._raw_string(out)
+                    continue
+                out.append(bytes([c]))
+                if c in b"{[":
+                    depth += 1
+                elif c in b"}]":
+                    depth -= 1
+                    if depth == 0:
+                        return b"".join(out)
+        while self.peek() not in b",}]" + _WS:
+            out.append(bytes([self.take()]))
+        return b"".join(out)
+
+    def _raw_string(self, out: List[bytes]) -> None:
+        # keep escapes as-is; json.loads undoes them
+        while True:
+            c = self.take()
+            out.append(bytes([c]))
+            if c == ord("\\"):
+                out.append(bytes([self.take()]))
+            elif c == ord('"'):
+                return
+
+
+class _B64Writer:
+    """Decodes base64 text fed in arbitrary pieces, in 4-character groups."""
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.pending = b""
+        self.started = False
+        self.size = 0
+
+    def write(self, piece: bytes) -> None:
+        data = self.pending + piece.translate(None, b" \t\r\n")
+        if not self.started:
+            if len(data) < 5 and b"data:".startswith(data):
+                self.pending = data  # too short to tell whether it is a data URL
+                return
+            if data.startswith(b"data:"):
+                # tolerate data URLs ("data:image/png;base64,....")
+                comma = data.find(b",")
+                if comma < 0:
+                    self.pending = data
+                    return
+                data = data[comma + 1:]
+            self.started = True
+        n = len(data) // 4 * 4
+        if n:
+            chunk = base64.b64decode(data[:n])
+            self.out.write(chunk)
+            self.size += len(chunk)
+        self.pending = data[n:]
+
+    def close(self) -> None:
+        if self.pending:
+            chunk = base64.b64decode(self.pending + b"=" * (-len(self.pending) % 4))
+            self.out.write(chunk)
+            self.size += len(chunk)
+            self.pending = b""
+
+
+def stream_b64_array(fp: BinaryIO, key: str, open_sink: Callable[[int], BinaryIO], *,
+                     chunk: int = CHUNK) -> Tuple[List[int], Dict[str, Any]]:
+    """
+    Decode every base64 string of the top-level array *key* in the JSON object
+    read from *fp* into ``open_sink(i)`` (closed afterwards). Returns the
+    decoded sizes and the remaining top-level keys, parsed.
+    """
+    r = _Reader(fp, chunk)
+    sizes: List[int] = []
+    rest: Dict[str, Any] = {}
+    r.expect(b"{")
+    if r.ws() == ord("}"):
+        return sizes, rest
+    while True:
+        r.expect(b'"')
+        name: List[bytes] = []
+        r.string(name.append)
+        k = b"".join(name).decode("utf-8")
+        r.expect(b":")
+        if k == key and r.ws() == ord("["):
+            r.pos += 1
+            if r.ws() == ord("]"):
+                r.pos += 1
+            else:
+                while True:
+                    r.expect(b'"')
+                    sink = open_sink(len(sizes))
+                    try:
+                        w = _B64Writer(sink)
+                        r.string(w.write)
+                        w.close()
+                    finally:
+                        sink.close()
+                    sizes.append(w.size)
+                    c = r.ws()
+                    r.pos += 1
+                    if c == ord("]"):
+                        break
+                    if c != ord(","):
+                        raise ValueError("expected ',' or ']' in JSON array")
+        else:
+            rest[k] = json.loads(r.raw_value())
+        c = r.ws()
+        r.pos += 1
+        if c == ord("}"):
+            return sizes, rest
+        if c != ord(","):
+            raise ValueError("expected ',' or '}' in JSON object")
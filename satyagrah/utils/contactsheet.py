@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Pooled image downscaling for contact sheets.
+
+Contact sheets only ever show images at cell size, so each source is
+decoded (JPEG draft decoding where possible) and shrunk to the cell's pixel
+box on a thread pool, then re-encoded as a small JPEG. reportlab embeds
+JPEG bytes as-is, so the PDF carries the cell-sized versions only.
+
+    cells = downscale_many(paths, (cell_w_px, cell_h_px))
+    for (data, (w, h)) in filter(None, cells):
+        c.drawImage(ImageReader(io.BytesIO(data)), x, y, w_pt, h_pt)
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .frames import Source, open_frame
+
+JPEG_QUALITY = 80
+Loader = Union[Source, Callable[[], Source]]
+Cell = Tuple[bytes, Tuple[int, int]]
+
+
+def downscale_jpeg(src: Loader, box: Tuple[int, int], quality: int = JPEG_QUALITY) -> Cell:
+    """JPEG bytes and pixel size of *src* shrunk to fit *box* (never enlarged)."""
+    if callable(src):
+        src = src()
+    im = open_frame(src, max(1, box[0]), max(1, box[1]))
+    buf = io.BytesIO()
+    im.save(buf, "JPEG", quality=quality, optimize=True)
+    return buf.getvalue(), im.size
+
+
+def downscale_many(sources: Sequence[Loader], box: Tuple[int, int], *, workers: Optional[int] = None,
+                   quality: int = JPEG_QUALITY) -> List[Optional[Cell]]:
+    """``downscale_jpeg`` over *sources* on a thread pool; unreadable ones give None. Order is kept."""
+    def one(src: Loader) -> Optional[Cell]:
+        try:
+            return downscale_jpeg(src, box, quality)
+        except Exception:
+            return None
+
+    workers = workers or min(8, os.cpu_count() or 2)
+    if len(sources) <= 1 or workers <= 1:
+        return [one(s) for s in sources]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(one, sources))
+
+
+def digest(parts: Iterable[object]) -> str:
+    """Stable cache key over the string forms of *parts*."""
+    h = hashlib.sha1()
+    for p in parts:
+        h.update(str(p).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
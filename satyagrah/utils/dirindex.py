@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Incrementally maintained listings of job/result folders.
+
+``dir_index(folder, "job_*.zip")`` returns a snapshot of the matching files
+(name, mtime, size) sorted newest first. The folder is only re-listed when
+its own mtime changes (a file was added, removed or renamed in), and then
+only new names are stat'ed. A full re-stat still happens every
+``FULL_RESCAN_SEC`` to pick up files rewritten in place. Checking a cached
+snapshot costs one ``stat`` of the folder, so paging stays O(page).
+"""
+from __future__ import annotations
+
+import fnmatch
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+FULL_RESCAN_SEC = 60.0
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    name: str
+    path: Path
+    mtime: float
+    size: int
+
+
+class DirIndex:
+    def __init__(self, folder: Path, pattern: str):
+        self.folder = folder
+        self.pattern = pattern
+        self._lock = threading.Lock()
+        self._dir_mtime: Optional[int] = None
+        self._full_at = 0.0
+        self._by_name: Dict[str, FileEntry] = {}
+        self._sorted: List[FileEntry] = []
+
+    def _stat(self, name: str) -> Optional[FileEntry]:
+        p = self.folder / name
+        try:
+            st = p.stat()
+        except OSError:
+            return None
+        return FileEntry(name, p, st.st_mtime, st.st_size)
+
+    def refresh(self) -> None:
+        try:
+            dm = self.folder.stat().st_mtime_ns
+        except OSError:
+            with self._lock:
+                self._dir_mtime, self._by_name, self._sorted = None, {}, []
+            return
+        now = time.monotonic()
+        with self._lock:
+            full = now - self._full_at > FULL_RESCAN_SEC
+            if dm == self._dir_mtime and not full:
+                return
+            with os.scandir(self.folder) as it:
+                names = {e.name for e in it if fnmatch.fnmatch(e.name, self.pattern)}
+            old = {} if full else self._by_name
+            by_name = {}
+            for n in names:
+                e = old.get(n) or self._stat(n)
+                if e is not None:
+                    by_name[n] = e
+            self._by_name = by_name
+            self._sorted = sorted(by_name.values(), key=lambda e: e.mtime, reverse=True)
+            self._dir_mtime = dm
+            if full:
+                self._full_at = now
+
+    def entries(self) -> List[FileEntry]:
+        """All matching files, newest first."""
+        self.refresh()
+        return self._sorted
+
+    def get(self, name: str) -> Optional[FileEntry]:
+        self.refresh()
+        return self._by_name.get(name)
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._sorted)
+
+
+_registry: Dict[Tuple[str, str], DirIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def dir_index(folder: Union[str, Path], pattern: str) -> DirIndex:
+    """Shared index for (*folder*, *pattern*)."""
+    key = (str(Path(folder).resolve()), pattern)
+    with _registry_lock:
+        idx = _registry.get(key)
+        if idx is None:
+            idx = _registry[key] = DirIndex(Path(folder), pattern)
+    return idx
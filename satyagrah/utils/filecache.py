@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Cached loaders for small JSON/YAML config files.
+
+Prefs, presets, facts, rules, the creds index and settings.yaml used to be
+re-read and re-parsed on every call. ``load_json`` / ``load_yaml`` keep the
+parsed object per path and only re-read when (mtime_ns, size) changes, so
+a hot path costs one ``stat``. Returned objects are shared: treat them as
+read-only, or pass ``copy=True`` before mutating.
+
+With ``enable_watch`` (needs the optional ``watchfiles`` package) the
+folders of the given files are watched and entries under them are dropped
+on change events instead of being stat'ed on every call.
+
+``stats()`` reports hits/misses overall and per file.
+"""
+from __future__ import annotations
+
+import copy as _copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import yaml  # type: ignore
+except Exception:
+    yaml = None
+
+_lock = threading.Lock()
+# path -> (mtime_ns, size, parsed, trusted)
+_entries: Dict[str, Tuple[int, int, Any, bool]] = {}
+_counts: Dict[str, Dict[str, int]] = {}
+_totals = {"hits": 0, "misses": 0, "errors": 0}
+
+_watch_dirs: set = set()
+_watch_stop: Optional[threading.Event] = None
+
+
+def _count(key: str, what: str) -> None:
+    _totals[what] += 1
+    c = _counts.setdefault(key, {"hits": 0, "misses": 0, "errors": 0})
+    c[what] += 1
+
+
+def _parse_json(text: str) -> Any:
+    return json.loads(text or "null")
+
+
+def _parse_yaml(text: str) -> Any:
+    if yaml is None:
+        raise RuntimeError("PyYAML not installed")
+    return yaml.safe_load(text)
+
+
+def load(path: Union[str, Path], parser: Callable[[str], Any], default: Any = None, *, copy: bool = False) -> Any:
+    """Parsed contents of *path*; *default* when it is missing or unparsable."""
+    path = Path(path)
+    key = os.path.abspath(path)
+    with _lock:
+        hit = _entries.get(key)
+        if hit is not None and hit[3]:  # watched folder: no stat needed until an event drops it
+            _count(key, "hits")
+            return _copy.deepcopy(hit[2]) if copy else hit[2]
+    try:
+        st = path.stat()
+    except OSError:
+        with _lock:
+            _entries.pop(key, None)
+            _count(key, "misses")
+        return _copy.deepcopy(default) if copy else default
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        with _lock:
+            _count(key, "hits")
+        return _copy.deepcopy(hit[2]) if copy else hit[2]
+    try:
+        value = parser(path.read_text(encoding="utf-8"))
+    except Exception:
+        with _lock:
+            _count(key, "errors")
+        return _copy.deepcopy(default) if copy else default
+    with _lock:
+        _count(key, "misses")
+        _entries[key] = (st.st_mtime_ns, st.st_size, value, os.path.dirname(key) in _watch_dirs)
+    return _copy.deepcopy(value) if copy else value
+
+
+def load_json(path: Union[str, Path], default: Any = None, *, copy: bool = False) -> Any:
+    return load(path, _parse_json, default, copy=copy)
+
+
+def load_yaml(path: Union[str, Path], default: Any = None, *, copy: bool = False) -> Any:
+    return load(path, _parse_yaml, default, copy=copy)
+
+
+def invalidate(path: Union[str, Path, None] = None) -> None:
+    """Forget one file (or everything when *path* is None)."""
+    with _lock:
+        if path is None:
+            _entries.clear()
+        else:
+            _entries.pop(os.path.abspath(path), None)
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        total = _totals["hits"] + _totals["misses"]
+        return {**_totals, "hit_rate": round(_totals["hits"] / total, 3) if total else 0.0,
+                "watching": sorted(_watch_dirs), "files": {k: dict(v) for k, v in _counts.items()}}
+
+
+# ---------- optional inotify-style invalidation ----------
+def enable_watch(paths: Iterable[Union[str, Path]]) -> bool:
+    """Watch the folders of *paths* with watchfiles; returns False when it is unavailable."""
+    global _watch_stop
+    try:
+        import watchfiles  # type: ignore
+    except Exception:
+        return False
+    dirs = {os.path.dirname(os.path.abspath(p)) for p in paths if Path(p).parent.is_dir()}
+    with _lock:
+        if dirs <= _watch_dirs:
+            return True
+        if _watch_stop is not None:
+            _watch_stop.set()
+        _watch_dirs.update(dirs)
+        watched = sorted(_watch_dirs)
+        # entries loaded before the watch started were validated by stat only
+        for k, (m, s, v, _) in list(_entries.items()):
+            _entries[k] = (m, s, v, False)
+        stop = _watch_stop = threading.Event()
+
+    def run():
+        try:
+            for changes in watchfiles.watch(*watched, stop_event=stop, recursive=False,
+                                            debounce=50, raise_interrupt=False):
+                with _lock:
+                    for _, changed in changes:
+                        _entries.pop(os.path.abspath(changed), None)
+        except Exception:
+            pass
+        finally:
+            if not stop.is_set():  # watcher died: fall back to stat validation
+                with _lock:
+                    _watch_dirs.difference_update(watched)
+                    for k, (m, s, v, _) in list(_entries.items()):
+                        _entries[k] = (m, s, v, False)
+
+    threading.Thread(target=run, name="filecache-watch", daemon=True).start()
+    return True
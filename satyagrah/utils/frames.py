@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Frame decode helpers shared by the streaming GIF and MP4 writers."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import IO, Optional, Tuple, Union
+
+from PIL import Image, ImageOps
+
+Source = Union[str, Path, IO[bytes], Image.Image]
+
+
+def open_frame(src: Source, width: int, height: Optional[int] = None) -> Image.Image:
+    """Decode *src* as RGB, downscaled so it fits ``width`` x ``height``."""
+    im = src if isinstance(src, Image.Image) else Image.open(src)
+    iw, ih = im.size
+    if height is None:
+        height = max(1, round(ih * width / max(1, iw)))
+    if im.format == "JPEG":
+        # let libjpeg decode at 1/2, 1/4 or 1/8 scale when that still covers the target
+        im.draft("RGB", (width, height))
+    im.load()
+    im = ImageOps.exif_transpose(im)
+    if im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info):
+        im = im.convert("RGBA")
+        bg = Image.new("RGB", im.size, "white")
+        bg.paste(im, mask=im.getchannel("A"))
+        im = bg
+    elif im.mode != "RGB":
+        im = im.convert("RGB")
+    scale = min(width / im.width, height / im.height)
+    if scale < 1.0:
+        size = (max(1, round(im.width * scale)), max(1, round(im.height * scale)))
+        im = im.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    return im
+
+
+def fit_canvas(im: Image.Image, canvas: Tuple[int, int], background=(0, 0, 0)) -> Image.Image:
+    """Letterbox *im* into an exact ``canvas`` size, shrinking it first if needed."""
+    if im.size == canvas:
+        return im
+    if im.width > canvas[0] or im.height > canvas[1]:
+        im = ImageOps.contain(im, canvas, Image.Resampling.LANCZOS)
+    out = Image.new("RGB", canvas, background)
+    out.paste(im, ((canvas[0] - im.width) // 2, (canvas[1] - im.height) // 2))
+    return out
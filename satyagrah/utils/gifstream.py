@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming animated-GIF writer.
+
+Frames are decoded one at a time (JPEGs via ``Image.draft`` so the decoder
+does the first downscale for free), resized to the canvas, quantised against
+one shared palette and written straight to the output file. Only a small
+sample of frames (used to build the palette) is ever held in memory, so peak
+memory does not grow with the number of frames.
+
+When the sources are a sequence, the palette sample is spread across all of
+it; a one-pass iterable can only be sampled from its head. Either way, a
+frame the shared palette renders badly (colours the sample never saw) is
+written with its own local colour table instead.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import IO, Iterable, List, Optional, Sequence, Tuple, Union
+
+from PIL import GifImagePlugin, Image, ImageChops, ImageOps, ImageStat
+
+from .frames import Source, fit_canvas, open_frame
+
+DEFAULT_WIDTH = 480
+PALETTE_SAMPLE = 8       # frames used to build the shared palette
+PALETTE_THUMB = 96       # edge of each palette-sample tile
+LOCAL_PALETTE_ERROR = 12.0  # mean per-channel error (0..255) above which a frame gets its own palette
+
+
+def build_palette(frames: List[Image.Image], colors: int = 256) -> Image.Image:
+    """Quantise a mosaic of small tiles into one palette image shared by all frames."""
+    tiles = [ImageOps.contain(f, (PALETTE_THUMB, PALETTE_THUMB)) for f in frames]
+    mosaic = Image.new("RGB", (PALETTE_THUMB * max(1, len(tiles)), PALETTE_THUMB))
+    for i, t in enumerate(tiles):
+        mosaic.paste(t, (i * PALETTE_THUMB, 0))
+    return mosaic.quantize(colors=colors, method=Image.Quantize.MEDIANCUT)
+
+
+class GifStreamWriter:
+    """Write GIF frames to *fp* as they arrive; every frame uses the global palette."""
+
+    def __init__(self, fp: IO[bytes], canvas: Tuple[int, int], palette: Image.Image,
+                 duration_ms: int = 100, loop: Optional[int] = 0, dither: bool = True):
+        self.fp = fp
+        self.canvas = canvas
+        self.palette = palette
+        self.duration_ms = int(duration_ms)
+        self.loop = loop
+        self.dither = Image.Dither.FLOYDSTEINBERG if dither else Image.Dither.NONE
+        self.frames = 0
+        self.local_palettes = 0
+        self._closed = False
+
+    def _fits_palette(self, rgb: Image.Image) -> bool:
+        probe = ImageOps.contain(rgb, (PALETTE_THUMB, PALETTE_THUMB))
+        back = probe.quantize(palette=self.palette, dither=Image.Dither.NONE).convert("RGB")
+        err = ImageStat.Stat(ImageChops.difference(probe, back)).mean
+        return max(err) <= LOCAL_PALETTE_ERROR
+
+    def add(self, im: Image.Image) -> None:
+        rgb = fit_canvas(im, self.canvas)
+        local = self.frames > 0 and not self._fits_palette(rgb)
+        if local:
+            frame = rgb.quantize(colors=256, method=Image.Quantize.MEDIANCUT, dither=self.dither)
+            self.local_palettes += 1
+        else:
+            frame = rgb.quantize(palette=self.palette, dither=self.dither)
+        if self.frames == 0:
+            info = {"duration": self.duration_ms}
+            if self.loop is not None:
+                info["loop"] = int(self.loop)
+            header, _ = GifImagePlugin.getheader(frame, info=info)
+            for chunk in header:
+                self.fp.write(chunk)
+        for chunk in GifImagePlugin.getdata(frame, duration=self.duration_ms, include_color_table=local):
+            self.fp.write(chunk)
+        self.frames += 1
+
+    def close(self) -> None:
+        if not self._closed:
+            self.fp.write(b";")  # trailer
+            self._closed = True
+
+
+def write_gif(sources: Iterable[Source], out: Union[str, Path, IO[bytes]], *,
+              width: int = DEFAULT_WIDTH, duration_ms: int = 100, loop: Optional[int] = 0,
+              palette_sample: int = PALETTE_SAMPLE) -> int:
+    """
+    Stream *sources* (paths, file objects or images) into an animated GIF.
+
+    The canvas is ``width`` wide with the first frame's aspect ratio; later
+    frames are letterboxed into it. Unreadable sources are skipped.
+    Returns the number of frames written; raises RuntimeError if none were.
+    """
+    n = max(1, palette_sample)
+    it = iter(sources)
+    head: List[Image.Image] = []
+    canvas: Optional[Tuple[int, int]] = None
+    for src in it:
+        try:
+            im = open_frame(src, width) if canvas is None else open_frame(src, *canvas)
+        except Exception:
+            continue
+        if canvas is None:
+            canvas = im.size
+        head.append(im)
+        if len(head) >= n or isinstance(sources, Sequence):
+            break
+    if not head or canvas is None:
+        raise RuntimeError("No readable frames for GIF")
+
+    if isinstance(sources, Sequence) and len(sources) > 1:
+        # sample evenly over the whole sequence; sampled frames are reopened when written
+        sample = head[:]
+        for i in sorted({round(k * (len(sources) - 1) / max(1, n - 1)) for k in range(1, n)}):
+            try:
+                sample.append(open_frame(sources[i], *canvas))
+            except Exception:
+                continue
+        palette = build_palette(sample)
+        for im in sample[1:]:
+            im.close()
+    else:
+        palette = build_palette(head)
+    own = not hasattr(out, "write")
+    fp = open(out, "wb") if own else out  # type: ignore[arg-type]
+    try:
+        w = GifStreamWriter(fp, canvas, palette, duration_ms=duration_ms, loop=loop)
+        while head:
+            w.add(head.pop(0))
+        for src in it:
+            try:
+                im = open_frame(src, *canvas)
+            except Exception:
+                continue
+            w.add(im)
+            im.close()
+        w.close()
+        return w.frames
+    finally:
+        if own:
+            fp.close()
+
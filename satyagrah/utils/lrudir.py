@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Size-capped on-disk caches with LRU eviction.
+
+Entries are plain files in one directory. A hit refreshes the file's mtime
+(``touch``), so eviction by oldest mtime drops the least recently used
+entries first. Writes go through a ``.part`` file of their own and an atomic
+rename, so concurrent writers of one entry never share a temp file.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+_lock = threading.Lock()
+_totals: Dict[str, int] = {}  # running byte totals, seeded by the first prune
+
+
+def part_path(path: Path) -> Path:
+    """A ``.part`` name next to *path* that no other process or thread writes to."""
+    return path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.part")
+
+
+def touch(path: Path) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune(folder: Path, max_bytes: int) -> int:
+    """Delete least recently used files until *folder* fits in *max_bytes*; returns the new total."""
+    try:
+        files = [(p.stat(), p) for p in folder.iterdir() if p.is_file() and p.suffix != ".part"]
+    except OSError:
+        return 0
+    total = sum(st.st_size for st, _ in files)
+    for st, p in sorted(files, key=lambda x: x[0].st_mtime):
+        if total <= max_bytes:
+            break
+        try:
+            p.unlink()
+            total -= st.st_size
+        except OSError:
+            pass
+    with _lock:
+        _totals[str(folder)] = total
+    return total
+
+
+def adopt(tmp: Path, path: Path, max_bytes: Optional[int] = None) -> Path:
+    """Atomically move the finished file *tmp* to *path*, evicting old entries once the cap is exceeded."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    size = tmp.stat().st_size
+    tmp.replace(path)
+    if max_bytes:
+        key = str(path.parent)
+        with _lock:
+            total = _totals.get(key)
+            if total is not None:
+                total = _totals[key] = total + size
+        if total is None or total > max_bytes:
+            prune(path.parent, int(max_bytes * 0.9) if total else max_bytes)
+    return path
+
+
+def store(path: Path, data: bytes, max_bytes: Optional[int] = None) -> Path:
+    """Atomically write *data* to *path* (see ``adopt``)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = part_path(path)
+    try:
+        tmp.write_bytes(data)
+        return adopt(tmp, path, max_bytes)
+    finally:
+        tmp.unlink(missing_ok=True)
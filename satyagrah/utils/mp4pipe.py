@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+MP4 encoder that pipes raw RGB frames into ffmpeg.
+
+Replaces moviepy's ImageSequenceClip (which loads and normalises every frame
+up front). A decode thread feeds a bounded queue sized from ``max_mem_mb``;
+the calling thread writes each frame to ffmpeg's stdin as soon as it is
+ready. Frames are letterboxed to a common even size, as libx264/yuv420p needs.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from PIL import Image
+
+from .frames import Source, fit_canvas, open_frame
+
+PRESETS: Dict[str, Dict[str, Union[str, int]]] = {
+    "fast":     {"preset": "veryfast", "crf": 26},
+    "balanced": {"preset": "medium",   "crf": 23},
+    "quality":  {"preset": "slow",     "crf": 18},
+}
+DEFAULT_PRESET = "balanced"
+MAX_EDGE = 1920
+MAX_MEM_MB = 64
+
+
+def ffmpeg_exe() -> str:
+    """Path of the bundled imageio-ffmpeg binary (falls back to ffmpeg on PATH)."""
+    try:
+        import imageio_ffmpeg  # type: ignore
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        pass
+    exe = os.getenv("IMAGEIO_FFMPEG_EXE") or shutil.which("ffmpeg")
+    if not exe:
+        raise RuntimeError("ffmpeg not found. pip install imageio-ffmpeg")
+    return exe
+
+
+def _even(n: int) -> int:
+    return max(2, n - (n % 2))
+
+
+def plan_canvas(first: Tuple[int, int], size: Optional[Tuple[int, int]] = None,
+                max_edge: int = MAX_EDGE, max_mem_mb: int = MAX_MEM_MB) -> Tuple[int, int]:
+    """Even-sized canvas; shrunk until two raw RGB frames fit in the memory ceiling."""
+    w, h = size or first
+    scale = min(1.0, max_edge / max(w, h))
+    budget = max_mem_mb * 1024 * 1024 / 2
+    if w * h * 3 * scale * scale > budget:
+        scale = (budget / (w * h * 3)) ** 0.5
+    return _even(int(w * scale)), _even(int(h * scale))
+
+
+class Mp4PipeWriter:
+    """Feed RGB frames to an ffmpeg child process writing H.264/yuv420p MP4."""
+
+    def __init__(self, out: Union[str, Path], canvas: Tuple[int, int], fps: float = 1.0,
+                 preset: str = DEFAULT_PRESET):
+        if canvas[0] % 2 or canvas[1] % 2:
+            raise ValueError(f"canvas must be even-sized, got {canvas}")
+        opts = PRESETS.get(preset) or PRESETS[DEFAULT_PRESET]
+        self.canvas = canvas
+        self.frames = 0
+        cmd = [
+            ffmpeg_exe(), "-y", "-loglevel", "error", "-nostats",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{canvas[0]}x{canvas[1]}",
+            "-r", f"{max(0.1, float(fps)):g}", "-i", "-",
+            "-an", "-c:v", "libx264", "-preset", str(opts["preset"]), "-crf", str(opts["crf"]),
+            "-pix_fmt", "yuv420p", "-movflags", "+faststart", str(out),
+        ]
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.PIPE)
+        self._err: List[bytes] = []
+        # drain stderr so ffmpeg can never block on a full pipe
+        self._err_t = threading.Thread(target=self._drain, daemon=True)
+        self._err_t.start()
+
+    def _drain(self) -> None:
+        for line in self._proc.stderr:  # type: ignore[union-attr]
+            self._err = (self._err + [line])[-20:]
+
+    def add(self, im: Image.Image) -> None:
+        frame = fit_canvas(im, self.canvas)
+        try:
+            self._proc.stdin.write(frame.tobytes())  # type: ignore[union-attr]
+        except BrokenPipeError:
+            self.close()
+            raise
+        self.frames += 1
+
+    def close(self) -> None:
+        if self._proc.stdin and not self._proc.stdin.closed:
+            try:
+                self._proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        rc = self._proc.wait()
+        self._err_t.join(timeout=5)
+        if rc != 0:
+            msg = b"".join(self._err).decode("utf-8", "replace").strip()
+            raise RuntimeError(f"ffmpeg exited with {rc}: {msg[-500:]}")
+
+
+def encode_mp4(sources: Iterable[Source], out: Union[str, Path], *, fps: float = 1.0,
+               size: Optional[Tuple[int, int]] = None, preset: str = DEFAULT_PRESET,
+               max_edge: int = MAX_EDGE, max_mem_mb: int = MAX_MEM_MB) -> Dict[str, float]:
+    """
+    Encode *sources* (paths, file objects or images) into an MP4 slideshow.
+
+    The canvas is ``size`` or the first frame's size, capped at ``max_edge``
+    and rounded down to even numbers. Decoded frames waiting for the encoder
+    never exceed ``max_mem_mb``. Unreadable sources are skipped.
+    Returns ``{"frames", "seconds", "fps", "width", "height"}`` where ``fps``
+    is encode throughput in frames per second.
+    """
+    t0 = time.perf_counter()
+    it = iter(sources)
+    first: Optional[Image.Image] = None
+    for src in it:
+        try:
+            first = open_frame(src, max_edge, max_edge)
+            break
+        except Exception:
+            continue
+    if first is None:
+        raise RuntimeError("No readable frames for MP4")
+
+    canvas = plan_canvas(first.size, size, max_edge, max_mem_mb)
+    depth = max(1, min(32, int(max_mem_mb * 1024 * 1024 // (canvas[0] * canvas[1] * 3)) - 1))
+    q: "queue.Queue[Optional[Image.Image]]" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    failure: List[BaseException] = []
+
+    def decode():
+        try:
+            for src in it:
+                if stop.is_set():
+                    return
+                try:
+                    im = fit_canvas(open_frame(src, *canvas), canvas)
+                except Exception:
+                    continue
+                q.put(im)
+        except BaseException as e:  # surfaced after the encoder finishes
+            failure.append(e)
+        finally:
+            q.put(None)
+
+    writer = Mp4PipeWriter(out, canvas, fps=fps, preset=preset)
+    t = threading.Thread(target=decode, daemon=True)
+    try:
+        writer.add(first)
+        first.close()
+        t.start()
+        while True:
+            im = q.get()
+            if im is None:
+                break
+            writer.add(im)
+            im.close()
+    except BaseException:
+        stop.set()
+        while t.is_alive():  # unblock the decoder so it can exit
+            try:
+                q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise
+    finally:
+        writer.close()
+    if failure:
+        raise failure[0]
+    dt = time.perf_counter() - t0
+    return {"frames": writer.frames, "seconds": round(dt, 3),
+            "fps": round(writer.frames / dt, 2) if dt > 0 else 0.0,
+            "width": canvas[0], "height": canvas[1]}
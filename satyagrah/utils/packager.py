@@ -1,6 +1,7 @@
 ﻿# overwrite satyagrah\utils\packager.py to add JPGs too
 # -*- coding: utf-8 -*-
-import json, zipfile, pathlib, datetime
+import json, pathlib, datetime
+from .zipper import SmartZip
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
 
@@ -46,13 +47,13 @@ def make_postpack(topic_id: str, date: str | None = None) -> pathlib.Path:
         raise FileNotFoundError("No one-pager found (need one of the PNG/JPG onepagers).")
 
     zip_path = exp_dir / "postpack.zip"
-    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+    with SmartZip(zip_path) as z:  # images stored as-is, html/json/txt deflated
         # add any onepagers that exist (prefer PNG name, also include JPGs if present)
         for s in sizes:
-            if pngs[s].exists(): z.write(pngs[s], arcname=f"onepager_{s}.png")
-            if jpgs[s].exists(): z.write(jpgs[s], arcname=f"onepager_{s}.jpg")
-        if onepager_html.exists(): z.write(onepager_html, arcname="onepager.html")
-        if hero_png.exists():      z.write(hero_png,      arcname=f"art/{hero_png.name}")
-        if prompt_json.exists():   z.write(prompt_json,   arcname=f"art/{prompt_json.name}")
-        if caption_path.exists():  z.write(caption_path,  arcname="caption_en.txt")
+            if pngs[s].exists(): z.add(pngs[s], f"onepager_{s}.png")
+            if jpgs[s].exists(): z.add(jpgs[s], f"onepager_{s}.jpg")
+        if onepager_html.exists(): z.add(onepager_html, "onepager.html")
+        if hero_png.exists():      z.add(hero_png,      f"art/{hero_png.name}")
+        if prompt_json.exists():   z.add(prompt_json,   f"art/{prompt_json.name}")
+        if caption_path.exists():  z.add(caption_path,  "caption_en.txt")
     return zip_path
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Paged PDF table writer.
+
+Rows are consumed lazily and drawn one page at a time with a single shared
+TableStyle and fixed column widths/row heights, so reportlab never has to
+measure or hold the whole table. Each cell is measured once, when it is
+clipped to its column width. Page content streams are compressed, keeping
+memory small even for 50k-row exports.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Table, TableStyle
+
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+
+
+def clip_text(text: str, width: float, font: str = FONT, size: float = 9) -> str:
+    """Trim *text* with an ellipsis so it fits *width* points."""
+    if stringWidth(text, font, size) <= width:
+        return text
+    ell = "…"
+    lo, hi = 0, len(text)
+    while lo < hi:  # longest prefix that fits, by bisection
+        mid = (lo + hi + 1) // 2
+        if stringWidth(text[:mid] + ell, font, size) <= width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] + ell
+
+
+class PdfTableWriter:
+    """Stream rows into a multi-page PDF table with a repeated header row."""
+
+    def __init__(self, path: Union[str, Path], columns: Sequence[str], *, title: str = "AISatyagrah Export",
+                 pagesize=A4, margin: float = 72, font_size: float = 9, col_widths: Optional[Sequence[float]] = None):
+        self.path = Path(path)
+        self.columns = [str(c) for c in columns]
+        self.title = title
+        self.W, self.H = pagesize
+        self.margin = margin
+        self.font_size = font_size
+        self.row_h = font_size + 6
+        usable = self.W - 2 * margin
+        self.col_widths = list(col_widths or [usable / max(1, len(self.columns))] * len(self.columns))
+        self._pad = 6  # LEFTPADDING + RIGHTPADDING
+        self.style = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("FONTNAME", (0, 0), (-1, 0), FONT_BOLD),
+            ("FONTNAME", (0, 1), (-1, -1), FONT),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("FONTSIZE", (0, 0), (-1, -1), font_size),
+            ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("LEFTPADDING", (0, 0), (-1, -1), 3), ("RIGHTPADDING", (0, 0), (-1, -1), 3),
+            ("TOPPADDING", (0, 0), (-1, -1), 1), ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+        ])
+        self.header = [clip_text(c, w - self._pad, FONT_BOLD, font_size) for c, w in zip(self.columns, self.col_widths)]
+        self.c = canvas.Canvas(str(self.path), pagesize=pagesize, pageCompression=1)
+        self.c.setTitle(title)
+        self.pages = 0
+        self.rows = 0
+        self._buf: List[List[str]] = []
+        self._t0 = time.perf_counter()
+
+    def _top(self) -> float:
+        return self.H - (self.margin + 48 if self.pages == 0 else self.margin)
+
+    def _capacity(self) -> int:
+        return max(1, int((self._top() - self.margin - 14) // self.row_h) - 1)
+
+    def _cells(self, row: Union[Dict[str, Any], Sequence[Any]]) -> List[str]:
+        vals = [row.get(k, "") for k in self.columns] if isinstance(row, dict) else list(row)
+        return [clip_text("" if v is None else str(v), w - self._pad, FONT, self.font_size)
+                for v, w in zip(vals, self.col_widths)]
+
+    def add(self, row: Union[Dict[str, Any], Sequence[Any]]) -> None:
+        self._buf.append(self._cells(row))
+        self.rows += 1
+        if len(self._buf) >= self._capacity():
+            self._flush()
+
+    def add_rows(self, rows: Iterable[Union[Dict[str, Any], Sequence[Any]]]) -> None:
+        for r in rows:
+            self.add(r)
+
+    def _flush(self) -> None:
+        if not self._buf and self.pages:
+            return
+        c = self.c
+        if self.pages == 0:
+            c.setFont(FONT_BOLD, 18); c.drawString(self.margin, self.H - self.margin, self.title)
+            c.setFont(FONT, 10)
+            c.drawRightString(self.W - self.margin, self.H - self.margin + 4, dt.datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"))
+        if self.header:  # no columns (no rows at all): title page only
+            data = [self.header] + self._buf
+            tbl = Table(data, colWidths=self.col_widths, rowHeights=[self.row_h] * len(data))
+            tbl.setStyle(self.style)
+            _, th = tbl.wrapOn(c, self.W - 2 * self.margin, self.H)
+            tbl.drawOn(c, self.margin, self._top() - th)
+        self.pages += 1
+        c.setFont(FONT, 8); c.drawRightString(self.W - self.margin, self.margin / 2, f"page {self.pages}")
+        c.showPage()
+        self._buf = []
+
+    def close(self) -> Dict[str, float]:
+        """Finish the document; returns rows, pages, seconds and pages/sec."""
+        if self._buf or self.pages == 0:
+            self._flush()
+        self.c.save()
+        dt_ = time.perf_counter() - self._t0
+        return {"rows": self.rows, "pages": self.pages, "seconds": round(dt_, 3),
+                "pages_per_sec": round(self.pages / dt_, 1) if dt_ > 0 else 0.0}
+
+
+def write_table_pdf(path: Union[str, Path], rows: Iterable[Dict[str, Any]], *, title: str = "AISatyagrah Export",
+                    columns: Optional[Sequence[str]] = None, **kw) -> Dict[str, float]:
+    """Write dict rows as a paged table; columns default to the first row's keys."""
+    it = iter(rows)
+    first = next(it, None)
+    cols = list(columns or (first.keys() if first else []))
+    w = PdfTableWriter(path, cols, title=title, **kw)
+    if first is not None and cols:
+        w.add(first)
+        w.add_rows(it)
+    return w.close()
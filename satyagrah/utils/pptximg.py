@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Slide-sized pictures for PPTX decks.
+
+python-pptx embeds whatever bytes it is given, so full-resolution PNG
+renders made every deck huge. ``DeckImages`` downsizes each picture to the
+pixel size of the box it occupies on the slide (at ``dpi``) and re-encodes
+photos as JPEG; flat graphics and images with transparency stay PNG.
+Resized blobs are kept in memory for the deck and on disk under
+``cache_dir`` for later exports. Because identical inputs always give the
+same bytes, python-pptx (which de-duplicates image parts by SHA1) embeds a
+repeated picture only once per deck.
+
+    imgs = DeckImages(cache_dir=root / "data" / "cache" / "pptx")
+    imgs.add_picture(slide.shapes, path, Inches(0.5), Inches(0.5), width=Inches(6))
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from PIL import Image, ImageOps
+
+from . import lrudir
+
+EMU_PER_INCH = 914400
+DEFAULT_DPI = 150
+JPEG_QUALITY = 85
+MAX_CACHE_MB = 512
+
+Src = Union[str, Path, bytes]
+
+
+def _has_alpha(im: Image.Image) -> bool:
+    if im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info):
+        alpha = im.convert("RGBA").getchannel("A")
+        return alpha.getextrema()[0] < 255
+    return False
+
+
+def _is_photo(im: Image.Image) -> bool:
+    """More than 256 colours in a small sample: treat as a photo (JPEG)."""
+    probe = im.convert("RGB")
+    probe.thumbnail((128, 128))
+    return probe.getcolors(maxcolors=256) is None
+
+
+class DeckImages:
+    """Resize-and-cache helper used by every PPTX exporter."""
+
+    def __init__(self, *, dpi: int = DEFAULT_DPI, quality: int = JPEG_QUALITY,
+                 cache_dir: Optional[Union[str, Path]] = None, max_cache_mb: int = MAX_CACHE_MB):
+        self.dpi = dpi
+        self.quality = quality
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_cache_bytes = max_cache_mb * 1024 * 1024
+        self._blobs: Dict[str, Tuple[bytes, Tuple[int, int]]] = {}
+        self._sizes: Dict[str, Tuple[int, int]] = {}
+        self.stats: Dict[str, int] = {"resized": 0, "cached": 0, "reused": 0, "bytes": 0}
+        if self.cache_dir:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                lrudir.prune(self.cache_dir, self.max_cache_bytes)
+            except OSError:
+                self.cache_dir = None
+
+    # -- keys / sizes --
+    @staticmethod
+    def _source_key(src: Src) -> str:
+        if isinstance(src, (bytes, bytearray)):
+            return "b:" + hashlib.sha1(src).hexdigest()
+        p = Path(src)
+        st = p.stat()
+        return f"f:{os.path.realpath(p)}:{st.st_size}:{st.st_mtime_ns}"
+
+    @staticmethod
+    def _open(src: Src) -> Image.Image:
+        return Image.open(io.BytesIO(src) if isinstance(src, (bytes, bytearray)) else Path(src))
+
+    def native_size(self, src: Src) -> Tuple[int, int]:
+        """Display size of *src* in pixels (EXIF rotation applied), header only."""
+        key = self._source_key(src)
+        if key not in self._sizes:
+            with self._open(src) as im:
+                w, h = im.size
+                if im.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                    w, h = h, w
+            self._sizes[key] = (w, h)
+        return self._sizes[key]
+
+    def _box_px(self, width_emu: int, height_emu: int) -> Tuple[int, int]:
+        return (max(1, round(width_emu / EMU_PER_INCH * self.dpi)),
+                max(1, round(height_emu / EMU_PER_INCH * self.dpi)))
+
+    # -- blobs --
+    def _encode(self, src: Src, box: Tuple[int, int]) -> bytes:
+        with self._open(src) as im:
+            fmt = (im.format or "").upper()
+            orient = im.getexif().get(0x0112, 1)
+            rotated = orient != 1
+            fits = im.width <= box[0] and im.height <= box[1]
+            if fits and fmt in ("JPEG", "PNG") and not rotated:
+                # already small enough: embed the original bytes untouched
+                return bytes(src) if isinstance(src, (bytes, bytearray)) else Path(src).read_bytes()
+            if fmt == "JPEG":
+                im.draft("RGB", box[::-1] if orient in (5, 6, 7, 8) else box)
+            im = ImageOps.exif_transpose(im)
+            if im.width > box[0] or im.height > box[1]:
+                im.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            buf = io.BytesIO()
+            if _has_alpha(im) or not _is_photo(im):
+                im.save(buf, "PNG", optimize=False)
+            else:
+                im.convert("RGB").save(buf, "JPEG", quality=self.quality, optimize=True, progressive=False)
+            return buf.getvalue()
+
+    def blob(self, src: Src, width_emu: int, height_emu: int) -> bytes:
+        """Bytes to embed for *src* shown in a box of the given EMU size."""
+        box = self._box_px(width_emu, height_emu)
+        key = hashlib.sha1(f"{self._source_key(src)}|{box}|{self.quality}".encode()).hexdigest()
+        hit = self._blobs.get(key)
+        if hit is not None:
+            self.stats["reused"] += 1
+            return hit[0]
+        data = None
+        path = self.cache_dir / f"{key}.bin" if self.cache_dir else None
+        if path is not None and path.exists():
+            try:
+                data = path.read_bytes()
+                lrudir.touch(path)
+                self.stats["cached"] += 1
+            except OSError:
+                data = None
+        if data is None:
+            data = self._encode(src, box)
+            self.stats["resized"] += 1
+            if path is not None:
+                try:
+                    lrudir.store(path, data, self.max_cache_bytes)
+                except OSError:
+                    pass
+        self._blobs[key] = (data, box)
+        self.stats["bytes"] += len(data)
+        return data
+
+    # -- placement --
+    def add_picture(self, shapes, src: Src, left: int, top: int,
+                    width: Optional[int] = None, height: Optional[int] = None, *, fit: bool = False):
+        """
+        ``shapes.add_picture`` with a slide-sized blob.
+
+        With only one of *width*/*height* the other follows the aspect ratio.
+        With both and ``fit=True`` the picture is scaled into that box and
+        centred; otherwise it fills the box exactly, as python-pptx would.
+        """
+        w0, h0 = self.native_size(src)
+        if width is None and height is None:
+            width, height = round(w0 / self.dpi * EMU_PER_INCH), round(h0 / self.dpi * EMU_PER_INCH)
+        elif height is None:
+            height = round(width * h0 / w0)
+        elif width is None:
+            width = round(height * w0 / h0)
+        elif fit:
+            r = min(width / w0, height / h0)
+            w, h = round(w0 * r), round(h0 * r)
+            left, top = left + (width - w) // 2, top + (height - h) // 2
+            width, height = w, h
+        data = self.blob(src, int(width), int(height))
+        return shapes.add_picture(io.BytesIO(data), int(left), int(top), int(width), int(height))
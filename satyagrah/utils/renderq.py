@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Deduplicated background renders for slow downloads (GIF/MP4 slideshows).
+
+``RenderQueue.request(key, suffix, fn)`` returns a ``Render`` record
+immediately. The first request for a key schedules ``fn(tmp_path)`` on a
+small worker pool; identical requests made while it is queued or running
+share that record, and once it finishes the output is served from the
+cache directory (size-capped, LRU) until evicted. The key should include
+everything that changes the output, e.g. the source zip's mtime and size.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+from . import lrudir
+
+KEEP_FINISHED_SEC = 3600
+ERROR_RETRY_SEC = 30  # a failed render is reported as-is for this long before retrying
+
+
+@dataclass
+class Render:
+    token: str
+    path: Path
+    status: str = "queued"          # queued | running | done | error
+    error: str = ""
+    created: float = field(default_factory=time.time)
+    finished: float = 0.0
+    info: Dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"token": self.token, "status": self.status, "error": self.error,
+                "created": int(self.created), "finished": int(self.finished), **self.info}
+
+
+class RenderQueue:
+    def __init__(self, cache_dir: Union[str, Path], *, workers: int = 1, max_cache_mb: int = 512):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_cache_mb * 1024 * 1024
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="render")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Render] = {}
+
+    @staticmethod
+    def token_for(key: Sequence[Any]) -> str:
+        return hashlib.sha1(repr(tuple(key)).encode("utf-8")).hexdigest()[:24]
+
+    def get(self, token: str) -> Optional[Render]:
+        with self._lock:
+            return self._jobs.get(token)
+
+    def request(self, key: Sequence[Any], suffix: str, fn: Callable[[Path], Optional[Dict[str, Any]]]) -> Render:
+        """Cached/in-flight render for *key*, scheduling ``fn(tmp)`` on the first miss."""
+        token = self.token_for(key)
+        path = self.cache_dir / f"{token}{suffix}"
+        with self._lock:
+            self._forget_old()
+            job = self._jobs.get(token)
+            if job is not None and job.status in ("queued", "running"):
+                return job
+            if job is not None and job.status == "error" and time.time() - job.finished < ERROR_RETRY_SEC:
+                return job
+            if path.exists():
+                lrudir.touch(path)
+                if job is None or job.status != "done":
+                    job = self._jobs[token] = Render(token, path, "done", finished=time.time())
+                return job
+            job = self._jobs[token] = Render(token, path)
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job: Render, fn: Callable[[Path], Optional[Dict[str, Any]]]) -> None:
+        # same suffix (ffmpeg picks the container from it), outside the LRU-pruned folder
+        tmp = self.cache_dir / ".tmp" / job.path.name
+        job.status = "running"
+        try:
+            tmp.parent.mkdir(parents=True, exist_ok=True)
+            info = fn(tmp)
+            lrudir.adopt(tmp, job.path, self.max_bytes)
+            job.info.update(info or {})
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e) or e.__class__.__name__
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+            tmp.unlink(missing_ok=True)
+
+    def _forget_old(self) -> None:
+        cutoff = time.time() - KEEP_FINISHED_SEC
+        for t in [t for t, j in self._jobs.items() if j.finished and j.finished < cutoff]:
+            del self._jobs[t]
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Gallery thumbnails for result zips.
+
+A thumbnail is rendered once per (zip, member content, edge, format) and
+kept in a size-capped LRU directory; the cache key doubles as the HTTP
+ETag. Members are identified by name + CRC + size from the zip index, so
+re-packing a zip with unchanged images keeps its thumbnails valid.
+
+    path, etag, mime = thumbnail(zip_index(zp), 0, edge=320, fmt="webp", cache_dir=...)
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Set, Tuple, Union
+
+from . import lrudir
+from .frames import open_frame
+from .zipindex import ZipIndex, read_member, zip_index
+
+DEFAULT_EDGE = int(os.getenv("SATYAGRAH_THUMB_EDGE", "320"))
+MAX_CACHE_MB = int(os.getenv("SATYAGRAH_THUMB_CACHE_MB", "256"))
+FORMATS: Dict[str, Tuple[str, str, str]] = {  # fmt -> (PIL format, suffix, MIME)
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+}
+MIN_EDGE, MAX_EDGE = 32, 1024
+
+try:
+    from PIL import features
+    _HAS_WEBP = bool(features.check("webp"))
+except Exception:
+    _HAS_WEBP = False
+
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbs")
+_pending: Set[str] = set()
+_pending_lock = threading.Lock()
+
+
+def _normalize(edge: int, fmt: str) -> Tuple[int, str]:
+    fmt = fmt if fmt in FORMATS else "webp"
+    if fmt == "webp" and not _HAS_WEBP:
+        fmt = "jpeg"
+    return max(MIN_EDGE, min(MAX_EDGE, int(edge))), fmt
+
+
+def thumb_key(zi: ZipIndex, idx: int, edge: int, fmt: str) -> str:
+    m = zi.image(idx)
+    raw = f"{zi.path.name}|{m.name}|{m.crc:08x}|{m.size}|{edge}|{fmt}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _render(zi: ZipIndex, name: str, edge: int, fmt: str) -> bytes:
+    pil_fmt = FORMATS[fmt][0]
+    im = open_frame(io.BytesIO(read_member(zi, name)), edge, edge)
+    buf = io.BytesIO()
+    if pil_fmt == "WEBP":
+        im.save(buf, "WEBP", quality=80, method=4)
+    else:
+        im.save(buf, "JPEG", quality=82, optimize=True)
+    return buf.getvalue()
+
+
+def thumbnail(zi: ZipIndex, idx: int = 0, *, edge: int = DEFAULT_EDGE, fmt: str = "webp",
+              cache_dir: Union[str, Path], max_cache_mb: int = MAX_CACHE_MB) -> Tuple[Path, str, str]:
+    """Return ``(path, etag, mime)`` for image *idx* of *zi*, rendering it on a miss."""
+    edge, fmt = _normalize(edge, fmt)
+    key = thumb_key(zi, idx, edge, fmt)
+    _, suffix, mime = FORMATS[fmt]
+    path = Path(cache_dir) / f"{key}{suffix}"
+    if path.exists():
+        lrudir.touch(path)
+    else:
+        lrudir.store(path, _render(zi, zi.image(idx).name, edge, fmt), max_cache_mb * 1024 * 1024)
+    return path, key, mime
+
+
+def warm(zp: Union[str, Path], *, cache_dir: Union[str, Path], edge: int = DEFAULT_EDGE, fmt: str = "webp") -> None:
+    """Render the first-image thumbnail of a newly seen zip in the background."""
+    edge, fmt = _normalize(edge, fmt)
+    try:
+        zi = zip_index(zp)
+        if not zi.images:
+            return
+        key = thumb_key(zi, 0, edge, fmt)
+    except Exception:
+        return
+    if (Path(cache_dir) / f"{key}{FORMATS[fmt][1]}").exists():
+        return
+    with _pending_lock:
+        if key in _pending:
+            return
+        _pending.add(key)
+
+    def job():
+        try:
+            thumbnail(zi, 0, edge=edge, fmt=fmt, cache_dir=cache_dir)
+        except Exception:
+            pass
+        finally:
+            with _pending_lock:
+                _pending.discard(key)
+
+    _pool.submit(job)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+Topic ids from runs/<date>/shortlist.json.
+
+The file is either a list or ``{"items"|"topics"|"ids": [...]}``; each entry
+is an id string or a dict with ``id``/``topic_id``/``slug``.
+"""
+import json
+from pathlib import Path
+
+
+def read_ids(shortlist_path: Path) -> list:
+    """Ids in shortlist order; [] when the file is missing or unreadable."""
+    try:
+        data = json.loads(shortlist_path.read_text(encoding="utf-8", errors="ignore"))
+    except Exception:
+        return []
+    ids = []
+    if isinstance(data, dict):
+        data = data.get("items") or data.get("topics") or data.get("ids") or []
+    if isinstance(data, list):
+        for x in data:
+            if isinstance(x, str):
+                ids.append(x)
+            elif isinstance(x, dict):
+                ids.append(x.get("id") or x.get("topic_id") or x.get("slug"))
+    return [i for i in ids if i]
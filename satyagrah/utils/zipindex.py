@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Cached central-directory indexes for result zips.
+
+The gallery hits the same handful of result zips dozens of times per page
+load (counts, thumbs, images, manifests). ``zip_index`` parses a zip's
+central directory once and keeps the member list, image ordering, sizes,
+MIME types and local-header offsets in a small LRU keyed by
+(path, mtime, size), so a rewritten zip is re-read automatically.
+``read_member`` / ``iter_member`` then read a member straight from its
+offset without building a ``zipfile.ZipFile`` again.
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+import struct
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+MAX_ENTRIES = 128
+CHUNK = 64 * 1024
+
+_LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")  # zipfile.structFileHeader
+_LOCAL_MAGIC = b"PK\x03\x04"
+
+
+@dataclass(frozen=True)
+class Member:
+    name: str
+    size: int           # uncompressed
+    csize: int          # compressed
+    offset: int         # local header offset
+    method: int         # zipfile.ZIP_STORED / ZIP_DEFLATED / ...
+    crc: int
+    mime: str
+
+
+@dataclass
+class ZipIndex:
+    path: Path
+    mtime_ns: int
+    size: int
+    members: List[Member]
+    images: List[str]
+    by_name: Dict[str, Member] = field(default_factory=dict)
+
+    def image(self, idx: int) -> Member:
+        """Image member at *idx*, clamped to the valid range (IndexError if none)."""
+        if not self.images:
+            raise IndexError("no image in zip")
+        return self.by_name[self.images[max(0, min(len(self.images) - 1, int(idx)))]]
+
+
+_lock = threading.Lock()
+_cache: "OrderedDict[Tuple[str, int, int], ZipIndex]" = OrderedDict()
+stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+
+def _parse(path: Path, st: os.stat_result) -> ZipIndex:
+    with zipfile.ZipFile(path, "r") as zf:
+        infos = zf.infolist()
+    members = [Member(i.filename, i.file_size, i.compress_size, i.header_offset, i.compress_type, i.CRC,
+                      mimetypes.guess_type(i.filename)[0] or "application/octet-stream")
+               for i in infos if not i.is_dir()]
+    images = [m.name for m in members if m.name.lower().endswith(IMAGE_EXTS)]
+    return ZipIndex(path, st.st_mtime_ns, st.st_size, members, images, {m.name: m for m in members})
+
+
+def zip_index(path: Union[str, Path]) -> ZipIndex:
+    """Parsed index of *path*, served from the LRU while the file is unchanged."""
+    path = Path(path)
+    st = path.stat()
+    key = (str(path.resolve()), st.st_mtime_ns, st.st_size)
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            stats["hits"] += 1
+            return hit
+    idx = _parse(path, st)
+    with _lock:
+        stats["misses"] += 1
+        # drop stale generations of the same file, then the least recently used
+        for k in [k for k in _cache if k[0] == key[0]]:
+            del _cache[k]
+        _cache[key] = idx
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return idx
+
+
+def data_offset(fh, m: Member) -> int:
+    """Absolute offset of *m*'s payload (past its local header) in open file *fh*."""
+    fh.seek(m.offset)
+    hdr = fh.read(_LOCAL_HEADER.size)
+    if len(hdr) != _LOCAL_HEADER.size or hdr[:4] != _LOCAL_MAGIC:
+        raise zipfile.BadZipFile(f"bad local header for {m.name}")
+    fields = _LOCAL_HEADER.unpack(hdr)
+    return m.offset + _LOCAL_HEADER.size + fields[9] + fields[10]
+
+
+def read_member(idx: ZipIndex, name: str) -> bytes:
+    """Bytes of member *name*, read from its recorded offset (CRC-checked)."""
+    m = idx.by_name[name]
+    if m.method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        with zipfile.ZipFile(idx.path) as zf:  # bz2/lzma: let zipfile handle it
+            return zf.read(name)
+    with open(idx.path, "rb") as fh:
+        fh.seek(data_offset(fh, m))
+        raw = fh.read(m.csize)
+    data = raw if m.method == zipfile.ZIP_STORED else zlib.decompress(raw, -15)
+    if len(data) != m.size or zlib.crc32(data) != m.crc:
+        raise zipfile.BadZipFile(f"bad CRC for {name}")
+    return data
+
+
+def iter_member(idx: ZipIndex, name: str, start: int = 0, end: Optional[int] = None,
+                chunk: int = CHUNK) -> Iterator[bytes]:
+    """
+    Yield bytes ``start..end`` (inclusive, uncompressed offsets) of member
+    *name* in chunks of at most *chunk* bytes. Stored members are read
+    straight from disk; deflated ones are inflated incrementally, so memory
+    stays constant whatever the member size. A full read is CRC-checked.
+    """
+    m = idx.by_name[name]
+    end = m.size - 1 if end is None else min(end, m.size - 1)
+    if start > end:
+        return
+    full = start == 0 and end == m.size - 1
+    if m.method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        with zipfile.ZipFile(idx.path) as zf, zf.open(name) as fh:  # bz2/lzma
+            pos = 0
+            for block in iter(lambda: fh.read(chunk), b""):
+                lo, hi = max(start - pos, 0), min(end + 1 - pos, len(block))
+                if lo < hi:
+                    yield block[lo:hi]
+                pos += len(block)
+                if pos > end:
+                    return
+        return
+    with open(idx.path, "rb") as fh:
+        base = data_offset(fh, m)
+        if m.method == zipfile.ZIP_STORED:
+            fh.seek(base + start)
+            left = end + 1 - start
+            crc = 0
+            while left > 0:
+                block = fh.read(min(chunk, left))
+                if not block:
+                    raise zipfile.BadZipFile(f"truncated member {name}")
+                left -= len(block)
+                if full:
+                    crc = zlib.crc32(block, crc)
+                yield block
+            if full and crc != m.crc:
+                raise zipfile.BadZipFile(f"bad CRC for {name}")
+            return
+        fh.seek(base)
+        d = zlib.decompressobj(-15)
+        left_in = m.csize
+        pos = crc = 0
+        while pos <= end:
+            if left_in > 0:
+                raw = fh.read(min(chunk, left_in))
+                if not raw:
+                    raise zipfile.BadZipFile(f"truncated member {name}")
+                left_in -= len(raw)
+                data = d.decompress(raw, chunk)
+            else:
+                data = d.flush()  # output still held back by the last max_length cut
+                if not data:
+                    break
+            while True:
+                if full:
+                    crc = zlib.crc32(data, crc)
+                lo, hi = max(start - pos, 0), min(end + 1 - pos, len(data))
+                if lo < hi:
+                    yield data[lo:hi]
+                pos += len(data)
+                if not d.unconsumed_tail or pos > end:
+                    break
+                data = d.decompress(d.unconsumed_tail, chunk)
+        if full and crc != m.crc:
+            raise zipfile.BadZipFile(f"bad CRC for {name}")
+
+
+def invalidate(path: Union[str, Path, None] = None) -> None:
+    """Forget one zip (or everything when *path* is None)."""
+    with _lock:
+        if path is None:
+            _cache.clear()
+            return
+        p = str(Path(path).resolve())
+        for k in [k for k in _cache if k[0] == p]:
+            del _cache[k]
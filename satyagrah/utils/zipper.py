@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Shared ZIP writer for exports and postpacks.
+
+PNG/JPG/MP4/etc. are already compressed, so deflating them burns CPU for
+no size gain: they are written ZIP_STORED, streamed from disk in chunks.
+Only text-like members (txt/json/csv/html...) are deflated, in parallel on
+a thread pool while earlier members are being written. Member order always
+follows the order of ``add`` calls.
+
+    with SmartZip(out_path) as z:
+        z.add(Path("art/hero.png"), "art/hero.png")
+        z.add_bytes("caption.txt", b"...")
+
+Every member is produced by ``zipfile`` itself as a one-member archive: a
+worker deflates text into its own in-memory ZipFile, media is written by a
+ZipFile opened on the output at the current position. SmartZip keeps each
+one's local header and data, collects their central directory records
+(with the local header offset set to where the member landed) and writes a
+single central directory on close.
+
+``sync_zip`` keeps an existing archive up to date incrementally: new files
+are appended in place and a full rewrite only happens when members were
+removed or changed. Members whose mtime moved but whose content (CRC) did
+not get their timestamp refreshed in the central directory, so they are not
+re-read on every later sync.
+"""
+from __future__ import annotations
+
+import io
+import os
+import struct
+import time
+import zlib
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+DEFLATE_EXTS = {
+    ".txt", ".json", ".jsonl", ".csv", ".tsv", ".html", ".htm", ".css", ".js",
+    ".md", ".xml", ".svg", ".yaml", ".yml", ".log", ".ini",
+}
+# text members above this are streamed from disk by zipfile instead of deflated in memory
+INLINE_DEFLATE_BYTES = 16 * 1024 * 1024
+DEFAULT_LEVEL = 6
+# local header offsets above this need a zip64 extra field (same cut-over zipfile uses)
+_OFFSET_LIMIT = (1 << 31) - 1
+
+
+def should_deflate(name: str) -> bool:
+    return Path(name).suffix.lower() in DEFLATE_EXTS
+
+
+def _compress_type(name: str) -> int:
+    return zipfile.ZIP_DEFLATED if should_deflate(name) else zipfile.ZIP_STORED
+
+
+def _central_record(tail: bytes) -> bytes:
+    """The central directory record at the start of a one-member archive's *tail*."""
+    if tail[:4] != b"PK\x01\x02":
+        raise zipfile.BadZipFile("no central directory record after member data")
+    n, m, k = struct.unpack_from("<3H", tail, 28)
+    return tail[:46 + n + m + k]
+
+
+def _deflate_member(zinfo: zipfile.ZipInfo, data: Union[bytes, Path], level: int) -> Tuple[bytes, int]:
+    """
+    Worker side: a one-member archive of *data* (bytes, or a file to read)
+    deflated in memory. Returns (archive, end of the member data).
+    """
+    if isinstance(data, Path):
+        data = data.read_bytes()
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", allowZip64=True) as one:
+        one.writestr(zinfo, data, compress_type=zipfile.ZIP_DEFLATED, compresslevel=level)
+        end = buf.tell()
+    return buf.getvalue(), end
+
+
+def _end_records(count: int, offset: int, size: int) -> bytes:
+    """End of central directory record, preceded by the zip64 ones when needed."""
+    out = b""
+    if count >= 0xFFFF or offset > _OFFSET_LIMIT or size > _OFFSET_LIMIT:
+        out += struct.pack("<4sQ2H2L4Q", b"PK\x06\x06", 44, 45, 45, 0, 0, count, count, size, offset)
+        out += struct.pack("<4sLQL", b"PK\x06\x07", 0, offset + size, 1)
+        count, offset, size = min(count, 0xFFFF), min(offset, 0xFFFFFFFF), min(size, 0xFFFFFFFF)
+    return out + struct.pack("<4s4H2LH", b"PK\x05\x06", 0, 0, count, count, size, offset, 0)
+
+
+class SmartZip:
+    """Zip writer that stores media, deflates text in parallel and keeps add() order."""
+
+    def __init__(self, file: Union[str, Path, IO[bytes]], *,
+                 workers: Optional[int] = None, level: int = DEFAULT_LEVEL):
+        if isinstance(file, (str, Path)):
+            self._fp: IO[bytes] = open(file, "w+b")
+            self._own_fp = True
+        else:
+            self._fp, self._own_fp = file, False  # must be seekable
+        self._central: List[bytes] = []
+        self.level = level
+        self.workers = workers or min(8, os.cpu_count() or 2)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        self._queue: Deque[tuple] = deque()
+        self._max_pending = self.workers * 2
+        self.stats: Dict[str, int] = {"stored": 0, "deflated": 0, "bytes_in": 0}
+
+    # -- public API --
+    def add(self, src: Union[str, Path], arcname: Optional[str] = None) -> None:
+        """Queue a file from disk under *arcname* (defaults to its name)."""
+        src = Path(src)
+        arcname = (arcname or src.name).replace("\\", "/")
+        st = src.stat()
+        zinfo = zipfile.ZipInfo.from_file(src, arcname)
+        self.stats["bytes_in"] += st.st_size
+        if should_deflate(arcname) and st.st_size <= INLINE_DEFLATE_BYTES:
+            self._queue.append(("deflate", zinfo, self._pool.submit(_deflate_member, zinfo, src, self.level)))
+        else:
+            self._queue.append(("file", zinfo, src))
+        self._drain(self._max_pending)
+
+    def add_bytes(self, arcname: str, data: Union[bytes, str]) -> None:
+        """Queue in-memory content under *arcname*."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        zinfo = zipfile.ZipInfo(arcname.replace("\\", "/"), time.localtime(time.time())[:6])
+        zinfo.external_attr = 0o644 << 16
+        self.stats["bytes_in"] += len(data)
+        if should_deflate(zinfo.filename):
+            self._queue.append(("deflate", zinfo, self._pool.submit(_deflate_member, zinfo, data, self.level)))
+        else:
+            self._queue.append(("bytes", zinfo, data))
+        self._drain(self._max_pending)
+
+    def close(self) -> None:
+        try:
+            self._drain(0)
+            start = self._fp.tell()
+            for rec in self._central:
+                self._fp.write(rec)
+            self._fp.write(_end_records(len(self._central), start, self._fp.tell() - start))
+            self._fp.truncate()
+            self._fp.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+            if self._own_fp:
+                self._fp.close()
+
+    def __enter__(self) -> "SmartZip":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            for kind, _, item in self._queue:
+                if kind == "deflate":
+                    item.cancel()
+            self._queue.clear()
+        self.close()
+
+    # -- internals --
+    def _drain(self, keep: int) -> None:
+        """Write queued members in order until at most *keep* remain queued."""
+        while len(self._queue) > keep:
+            kind, zinfo, item = self._queue.popleft()
+            ctype = _compress_type(zinfo.filename)
+            if kind == "deflate":
+                self._copy_member(zinfo, *item.result())
+            elif kind == "file":
+                self._write_member(lambda one: one.write(item, zinfo.filename, compress_type=ctype,
+                                                         compresslevel=self.level))
+            else:
+                self._write_member(lambda one: one.writestr(zinfo, item, compress_type=ctype))
+            self.stats["deflated" if ctype == zipfile.ZIP_DEFLATED else "stored"] += 1
+
+    def _write_member(self, write: Callable[[zipfile.ZipFile], None]) -> None:
+        """Let zipfile write one member at the current position; keep its central record."""
+        with zipfile.ZipFile(self._fp, "w", allowZip64=True) as one:
+            write(one)
+            end = self._fp.tell()
+        self._fp.seek(end)
+        self._central.append(_central_record(self._fp.read()))
+        self._fp.seek(end)
+        self._fp.truncate()
+
+    def _copy_member(self, zinfo: zipfile.ZipInfo, archive: bytes, end: int) -> None:
+        """Append a member deflated by a worker, pointing its central record here."""
+        offset = self._fp.tell()
+        if offset > _OFFSET_LIMIT:  # its record has no room for a zip64 offset: let zipfile redo it
+            data = zipfile.ZipFile(io.BytesIO(archive)).read(zinfo.filename)
+            self._write_member(lambda one: one.writestr(zinfo, data, compress_type=zipfile.ZIP_DEFLATED,
+                                                        compresslevel=self.level))
+            return
+        rec = _central_record(archive[end:])
+        self._fp.write(archive[:end])
+        self._central.append(rec[:42] + struct.pack("<L", offset) + rec[46:])
+
+
+def write_zip(out: Union[str, Path], members: Dict[str, Union[str, Path]], **kw) -> Path:
+    """Zip ``{arcname: path}`` into *out* (missing paths are skipped)."""
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with SmartZip(out, **kw) as z:
+        for arc, src in members.items():
+            if Path(src).is_file():
+                z.add(src, arc)
+    return out
+
+
+def _crc_file(path: Path, chunk: int = 1024 * 1024) -> int:
+    crc = 0
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(chunk), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def _unchanged(zinfo: zipfile.ZipInfo, path: Path) -> Tuple[bool, Optional[tuple]]:
+    """
+    Same size and DOS timestamp (2 s resolution); CRC decides when only the
+    mtime moved. Returns (unchanged, new date_time to record) where the
+    second item is set only for such content-identical touches.
+    """
+    st = path.stat()
+    if zinfo.file_size != st.st_size:
+        return False, None
+    dt = time.localtime(st.st_mtime)[:6]
+    if tuple(zinfo.date_time[:5]) == dt[:5] and zinfo.date_time[5] // 2 == dt[5] // 2:
+        return True, None
+    if _crc_file(path) != zinfo.CRC:
+        return False, None
+    return True, (tuple(dt) if dt[0] >= 1980 else None)
+
+
+def plan_update(out: Path, members: Dict[str, Path]) -> Optional[Tuple[List[str], Dict[str, tuple]]]:
+    """
+    Compare *out*'s central directory with ``{arcname: path}``.
+
+    Returns (arcnames that only need appending, ``{arcname: date_time}`` of
+    members whose timestamp should be refreshed), or None when the archive
+    is missing/unreadable or members were removed or changed.
+    """
+    if not out.exists():
+        return None
+    try:
+        with zipfile.ZipFile(out) as zf:
+            infos = zf.infolist()
+    except (zipfile.BadZipFile, OSError):
+        return None
+    old = {i.filename: i for i in infos}
+    if len(old) != len(infos) or set(old) - set(members):
+        return None  # duplicate names or deletions: rewrite
+    new: List[str] = []
+    retime: Dict[str, tuple] = {}
+    for arc, path in members.items():
+        zi = old.get(arc)
+        if zi is None:
+            new.append(arc)
+            continue
+        same, dt = _unchanged(zi, path)
+        if not same:
+            return None  # a zip cannot replace a member without leaving a duplicate name
+        if dt is not None:
+            retime[arc] = dt
+    return new, retime
+
+
+def sync_zip(out: Union[str, Path], members: Dict[str, Union[str, Path]], **kw) -> Dict[str, Union[str, int]]:
+    """
+    Make *out* contain exactly ``{arcname: path}`` (missing paths are skipped).
+
+    Only new members are written when the archive is otherwise up to date, so
+    an incremental export costs O(delta); everything else is rebuilt into a
+    temporary file and swapped in. Returns ``{"mode", "added", "kept", "retimed"}``
+    where mode is "unchanged", "append" or "rebuild".
+    """
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    files = {a.replace("\\", "/"): Path(p) for a, p in members.items() if Path(p).is_file()}
+    plan = plan_update(out, files)
+    if plan is not None:
+        todo, retime = plan
+        if not todo and not retime:
+            return {"mode": "unchanged", "added": 0, "kept": len(files), "retimed": 0}
+        try:
+            with zipfile.ZipFile(out, "a", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for arc, dt in retime.items():
+                    zf.getinfo(arc).date_time = dt
+                if retime:
+                    zf.comment = zf.comment  # marks the archive modified: close() rewrites the central directory
+                for arc in todo:  # a delta: written in place, one after the other
+                    zf.write(files[arc], arc, compress_type=_compress_type(arc),
+                             compresslevel=kw.get("level", DEFAULT_LEVEL))
+            return {"mode": "append" if todo else "unchanged", "added": len(todo),
+                    "kept": len(files) - len(todo), "retimed": len(retime)}
+        except Exception:
+            pass  # interrupted append: fall through to a clean rebuild
+    tmp = out.with_name(out.name + ".part")
+    try:
+        with SmartZip(tmp, **kw) as z:
+            for arc, path in files.items():
+                z.add(path, arc)
+        tmp.replace(out)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return {"mode": "rebuild", "added": len(files), "kept": 0, "retimed": 0}
@@ -1,12 +1,12 @@
 # -*- coding: utf-8 -*-
-import argparse, sys, subprocess, os, secrets, json, time, io, zipfile, mimetypes, csv, tempfile
+import argparse, sys, subprocess, os, secrets, json, time, io, zipfile, csv
 from pathlib import Path
 
 try:
     from fastapi import FastAPI, Request
     from fastapi.responses import (
         HTMLResponse, RedirectResponse, JSONResponse,
-        StreamingResponse, PlainTextResponse, FileResponse
+        StreamingResponse, PlainTextResponse, FileResponse, Response
     )
     from fastapi.staticfiles import StaticFiles
 except Exception as e:
@@ -19,9 +19,13 @@ except Exception:
     auth_router = None
 
 from .auth.service import user_from_session
-from .core.status import get_status
+from .core.status import get_status, request_probe
 from .core.jobs import start_job
 from .peer.jobfmt import make_job_dict, write_job_zip
+from .utils.zipindex import zip_index, iter_member, read_member
+from .utils import filecache, lrudir, resultthumbs
+from .utils.dirindex import dir_index
+from .utils.renderq import RenderQueue
 
 # optional telegram notify
 try:
@@ -41,7 +45,15 @@ proj = root.parent                           # D:\AISatyagrah
 PREFS_PATH     = proj / "data" / "web_prefs.json"
 PRESETS_PATH   = proj / "data" / "prompt_presets.json"
 FACTS_PATH     = proj / "data" / "facts" / "facts.json"
+if os.environ.get("SATYAGRAH_WATCH_CONFIG") == "1":
+    filecache.enable_watch([PREFS_PATH, PRESETS_PATH, FACTS_PATH])
 PENDING_DIR    = proj / "jobs" / "pending"
+THUMBS_DIR     = proj / "data" / "cache" / "thumbs"
+CONTACT_DIR    = proj / "data" / "cache" / "contact"
+CONTACT_CACHE_MB = int(os.getenv("SATYAGRAH_CONTACT_CACHE_MB", "256"))
+RENDERS        = RenderQueue(proj / "data" / "cache" / "renders",
+                             workers=int(os.getenv("SATYAGRAH_RENDER_WORKERS", "1")),
+                             max_cache_mb=int(os.getenv("SATYAGRAH_RENDER_CACHE_MB", "512")))
 DEFAULT_REGION = os.getenv("SATYAGRAH_DEFAULT_REGION", "india")
 
 # optional static dir
@@ -118,17 +130,14 @@ def _has_role(user, *allowed):
     return bool(user and user.get("role") in allowed)
 
 # ---------- prefs helpers ----------
-def _prefs_read() -> dict:
-    try:
-        if PREFS_PATH.exists():
-            return json.loads(PREFS_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        pass
-    return {}
+def _prefs_read(mutable: bool = False) -> dict:
+    data = filecache.load_json(PREFS_PATH, {}, copy=mutable)
+    return data if isinstance(data, dict) else {}
 
 def _prefs_write(data: dict):
     PREFS_PATH.parent.mkdir(parents=True, exist_ok=True)
     PREFS_PATH.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    filecache.invalidate(PREFS_PATH)  # the watcher's event may come after the next read
 
 def _get_user_prefs(username: str) -> dict:
     allp = _prefs_read()
@@ -143,7 +152,7 @@ def _get_user_prefs(username: str) -> dict:
     }
 
 def _set_user_prefs(username: str, newvals: dict):
-    allp = _prefs_read()
+    allp = _prefs_read(mutable=True)
     cur = allp.get(username) or {}
     allowed = {"region", "autodrop_default", "default_steps", "default_width", "default_height", "default_count"}
     for k,v in newvals.items():
@@ -154,13 +163,9 @@ def _set_user_prefs(username: str, newvals: dict):
 
 # ---------- presets / facts helpers ----------
 def _load_presets() -> list[str]:
-    if PRESETS_PATH.exists():
-        try:
-            data = json.loads(PRESETS_PATH.read_text(encoding="utf-8"))
-            if isinstance(data, list):
-                return [str(x) for x in data][:40]
-        except Exception:
-            pass
+    data = filecache.load_json(PRESETS_PATH)
+    if isinstance(data, list):
+        return [str(x) for x in data][:40]
     return [
         "low-poly political poster, bold palette, high contrast",
         "newspaper cutout collage, satire headline style",
@@ -174,7 +179,7 @@ def _load_presets() -> list[str]:
 
 def _prompt_from_facts(region: str) -> str:
     try:
-        data = json.loads(FACTS_PATH.read_text(encoding="utf-8"))
+        data = filecache.load_json(FACTS_PATH, {})
         topics = data.get("topics", [])[:4]
         bits = []
         for t in topics:
@@ -202,8 +207,41 @@ def _result_zip(job_id: str) -> Path|None:
     return zp if zp.exists() else None
 
 def _zip_images(zp: Path) -> list[str]:
-    with zipfile.ZipFile(zp, "r") as zf:
-        return [n for n in zf.namelist() if n.lower().endswith((".png",".jpg",".jpeg",".webp",".gif"))]
+    return zip_index(zp).images
+
+def _parse_range(header: str, size: int):
+    """(start, end) for a single ``bytes=`` range, None when absent, False when unsatisfiable."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), (int(last) if last else size - 1)
+        else:
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+def _member_response(request: Request, zi, m, ctype: str, headers: dict | None = None):
+    """Stream one zip member in chunks, honouring If-None-Match and a single Range."""
+    etag = f'"{m.crc:08x}-{m.size:x}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes", "Cache-Control": "no-cache", **(headers or {})}
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    rng = _parse_range(request.headers.get("range", ""), m.size)
+    if request.headers.get("if-range", etag) != etag:
+        rng = None
+    if rng is False:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{m.size}"})
+    start, end = rng or (0, m.size - 1)
+    headers["Content-Length"] = str(end - start + 1 if m.size else 0)
+    if rng:
+        headers["Content-Range"] = f"bytes {start}-{end}/{m.size}"
+    return StreamingResponse(iter_member(zi, m.name, start, end), status_code=206 if rng else 200,
+                             media_type=ctype, headers=headers)
 
 # ---------- Jobs API ----------
 @app.get("/api/jobs")
@@ -227,35 +265,33 @@ def api_jobs(limit: int = 50, offset: int = 0):
         limit = max(1, min(200, int(limit)))
         offset = max(0, int(offset))
 
-        all_zips = sorted(outbox.glob("job_*.zip"),
-                          key=lambda p: p.stat().st_mtime,
-                          reverse=True)
-        subset = all_zips[offset:offset+limit]
+        # indexed listings: one folder stat per request unless something changed
+        subset = dir_index(outbox, "job_*.zip").entries()[offset:offset+limit]
+        inbox_idx = dir_index(inbox, "job_*.zip") if inbox else None
+        results_idx = dir_index(results, "result_*.zip") if results else None
 
-        for p in subset:
-            st = p.stat()
-            job_id = p.stem.replace("job_", "")
+        for e in subset:
+            job_id = e.name[len("job_"):-len(".zip")]
             rec = {
                 "job_id": job_id,
-                "mtime": int(st.st_mtime),
-                "age_sec": int(now - st.st_mtime),
-                "size": st.st_size,
-                "out_zip": str(p),
+                "mtime": int(e.mtime),
+                "age_sec": int(now - e.mtime),
+                "size": e.size,
+                "out_zip": str(e.path),
             }
-            if inbox:
-                rec["inbox_has_copy"] = (inbox / p.name).exists()
+            if inbox_idx:
+                rec["inbox_has_copy"] = inbox_idx.get(e.name) is not None
 
             status = "unknown"
-            if results:
-                rp = results / f"result_{job_id}.zip"
-                if rp.exists():
-                    rs = rp.stat()
+            if results_idx:
+                rs = results_idx.get(f"result_{job_id}.zip")
+                if rs:
                     rec.update({
                         "result_found": True,
-                        "result_zip": str(rp),
-                        "result_mtime": int(rs.st_mtime),
-                        "result_age_sec": int(now - rs.st_mtime),
-                        "result_size": rs.st_size,
+                        "result_zip": str(rs.path),
+                        "result_mtime": int(rs.mtime),
+                        "result_age_sec": int(now - rs.mtime),
+                        "result_size": rs.size,
                     })
                     status = "done"
                 else:
@@ -278,16 +314,16 @@ def api_results(limit: int = 24):
     if not resdir or not resdir.exists():
         return JSONResponse({"ok": True, "items": []})
     limit = max(1, min(100, int(limit)))
-    zips = sorted(resdir.glob("result_*.zip"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
     items = []
-    for z in zips:
+    for e in dir_index(resdir, "result_*.zip").entries()[:limit]:
+        z = e.path
         job_id = z.stem.replace("result_", "")
-        st = z.stat()
         try:
             count = len(_zip_images(z))
+            resultthumbs.warm(z, cache_dir=THUMBS_DIR)  # newly arrived zip: render its thumb off-request
         except Exception:
             count = 0
-        items.append({"job_id": job_id, "zip": str(z), "mtime": int(st.st_mtime), "size": st.st_size, "image_count": count})
+        items.append({"job_id": job_id, "zip": str(z), "mtime": int(e.mtime), "size": e.size, "image_count": count})
     return JSONResponse({"ok": True, "items": items})
 
 @app.get("/api/result_manifest/{job_id}")
@@ -296,62 +332,51 @@ def api_result_manifest(job_id: str):
     if not zp:
         return JSONResponse({"ok": False, "error": "not found"}, status_code=404)
     try:
-        with zipfile.ZipFile(zp, "r") as zf:
-            rows = []
-            for n in zf.namelist():
-                info = zf.getinfo(n)
-                mime = mimetypes.guess_type(n)[0] or "application/octet-stream"
-                rows.append({"name": n, "size": info.file_size, "mime": mime})
+        rows = [{"name": m.name, "size": m.size, "mime": m.mime} for m in zip_index(zp).members]
         return JSONResponse({"ok": True, "items": rows})
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
 @app.get("/result_thumb/{job_id}")
-def result_thumb(job_id: str):
+def result_thumb(job_id: str, request: Request, size: int = resultthumbs.DEFAULT_EDGE, fmt: str = "webp", v: str = ""):
+    """Cached thumbnail of the first image; ``v`` (the zip mtime) makes the URL immutable."""
     zp = _result_zip(job_id)
     if not zp: return JSONResponse({"ok": False, "error": "not found"}, status_code=404)
     try:
-        with zipfile.ZipFile(zp, "r") as zf:
-            names = [n for n in zf.namelist() if n.lower().endswith((".png",".jpg",".jpeg",".webp",".gif"))]
-            if not names: return JSONResponse({"ok": False, "error": "no image in zip"}, status_code=404)
-            with zf.open(names[0]) as fh:
-                data = fh.read()
-                ctype = mimetypes.guess_type(names[0])[0] or "image/png"
-                return StreamingResponse(io.BytesIO(data), media_type=ctype)
+        zi = zip_index(zp)
+        if not zi.images: return JSONResponse({"ok": False, "error": "no image in zip"}, status_code=404)
+        path, key, mime = resultthumbs.thumbnail(zi, 0, edge=size, fmt=fmt, cache_dir=THUMBS_DIR)
+        etag = f'"{key}"'
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable" if v else "public, max-age=300"}
+        if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+            return Response(status_code=304, headers=headers)
+        return FileResponse(str(path), media_type=mime, headers=headers)
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
 @app.get("/result_image/{job_id}/{idx}")
-def result_image(job_id: str, idx: int = 0):
+def result_image(job_id: str, request: Request, idx: int = 0):
     zp = _result_zip(job_id)
     if not zp: return JSONResponse({"ok": False, "error": "not found"}, status_code=404)
     try:
-        with zipfile.ZipFile(zp, "r") as zf:
-            names = [n for n in zf.namelist() if n.lower().endswith((".png",".jpg",".jpeg",".webp",".gif"))]
-            if not names: return JSONResponse({"ok": False, "error": "no image in zip"}, status_code=404)
-            idx = max(0, min(len(names)-1, int(idx)))
-            with zf.open(names[idx]) as fh:
-                data = fh.read()
-                ctype = mimetypes.guess_type(names[idx])[0] or "image/png"
-                return StreamingResponse(io.BytesIO(data), media_type=ctype)
+        zi = zip_index(zp)
+        if not zi.images: return JSONResponse({"ok": False, "error": "no image in zip"}, status_code=404)
+        m = zi.image(idx)
+        return _member_response(request, zi, m, m.mime if m.mime.startswith("image/") else "image/png")
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
 @app.get("/download_result_image_file/{job_id}/{idx}")
-def download_result_image_file(job_id: str, idx: int = 0):
+def download_result_image_file(job_id: str, request: Request, idx: int = 0):
     zp = _result_zip(job_id)
     if not zp: return JSONResponse({"ok": False, "error": "not found"}, status_code=404)
     try:
-        with zipfile.ZipFile(zp, "r") as zf:
-            names = [n for n in zf.namelist() if n.lower().endswith((".png",".jpg",".jpeg",".webp",".gif"))]
-            if not names: return JSONResponse({"ok": False, "error": "no image in zip"}, status_code=404)
-            idx = max(0, min(len(names)-1, int(idx)))
-            name = Path(names[idx]).name
-            with zf.open(names[idx]) as fh:
-                data = fh.read()
-                ctype = mimetypes.guess_type(name)[0] or "application/octet-stream"
-                headers = {"Content-Disposition": f'attachment; filename="{name}"'}
-                return StreamingResponse(io.BytesIO(data), media_type=ctype, headers=headers)
+        zi = zip_index(zp)
+        if not zi.images: return JSONResponse({"ok": False, "error": "no image in zip"}, status_code=404)
+        m = zi.image(idx)
+        name = Path(m.name).name
+        headers = {"Content-Disposition": f'attachment; filename="{name}"'}
+        return _member_response(request, zi, m, m.mime, headers)
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
@@ -369,10 +394,8 @@ def download_result_csv(job_id: str):
         output = io.StringIO()
         w = csv.writer(output)
         w.writerow(["name","size","mime"])
-        with zipfile.ZipFile(zp, "r") as zf:
-            for n in zf.namelist():
-                info = zf.getinfo(n)
-                w.writerow([n, info.file_size, mimetypes.guess_type(n)[0] or "application/octet-stream"])
+        for m in zip_index(zp).members:
+            w.writerow([m.name, m.size, m.mime])
         data = output.getvalue().encode("utf-8")
         headers = {"Content-Disposition": f'attachment; filename="result_{job_id}.csv"'}
         return StreamingResponse(io.BytesIO(data), media_type="text/csv", headers=headers)
@@ -407,60 +430,66 @@ async def api_extract_result(request: Request):
 # ---------- NEW: PDF / PPTX / GIF / MP4 ----------
 @app.get("/download_contact_sheet_pdf/{job_id}")
 def download_contact_sheet_pdf(job_id: str, cols: int = 3, rows: int = 3, paper: str = "a4", dpi: int = 150, margin: int = 36):
-    """Build a contact sheet PDF (grid of images per page)."""
+    """Build a contact sheet PDF (grid of images per page); cached per image set and layout."""
     zp = _result_zip(job_id)
     if not zp: return JSONResponse({"ok": False, "error": "not found"}, status_code=404)
 
     try:
-        from PIL import Image, ImageOps
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.utils import ImageReader
+        from .utils.contactsheet import digest, downscale_many
     except Exception:
-        return JSONResponse({"ok": False, "error": "Pillow not installed. pip install pillow"}, status_code=500)
+        return JSONResponse({"ok": False, "error": "reportlab/Pillow not installed. pip install reportlab pillow"}, status_code=500)
 
     paper = paper.lower()
     if paper == "letter":
         W_in, H_in = 8.5, 11.0
     else:
+        paper = "a4"
         W_in, H_in = 8.27, 11.69
 
+    dpi = max(36, min(600, int(dpi)))
     page_w = int(W_in * dpi)
     page_h = int(H_in * dpi)
     cols = max(1, int(cols)); rows = max(1, int(rows))
     cell_w = (page_w - 2*margin) // cols
     cell_h = (page_h - 2*margin) // rows
+    headers = {"Content-Disposition": f'attachment; filename="result_{job_id}_contact_sheet.pdf"'}
 
     try:
-        with zipfile.ZipFile(zp, "r") as zf:
-            names = [n for n in zf.namelist() if n.lower().endswith((".png",".jpg",".jpeg",".webp",".gif"))]
-            if not names:
-                return JSONResponse({"ok": False, "error": "no images"}, status_code=404)
-
-            pages = []
-            page = Image.new("RGB", (page_w, page_h), "white")
-            i = 0
-            for n in names:
-                with zf.open(n) as fh:
-                    im = Image.open(io.BytesIO(fh.read()))
-                    if im.mode in ("RGBA", "LA"):
-                        bg = Image.new("RGB", im.size, "white")
-                        bg.paste(im, mask=im.getchannel("A") if "A" in im.getbands() else None)
-                        im = bg
-                    im = ImageOps.exif_transpose(im)
-                    im.thumbnail((cell_w-8, cell_h-8))
-                    x = margin + (i % cols) * cell_w + (cell_w - im.width)//2
-                    y = margin + (i // cols % rows) * cell_h + (cell_h - im.height)//2
-                    page.paste(im, (x, y))
-                    i += 1
-                    if (i % (cols*rows)) == 0:
-                        pages.append(page)
-                        page = Image.new("RGB", (page_w, page_h), "white")
-            if i % (cols*rows) != 0:
-                pages.append(page)
-
-            buff = io.BytesIO()
-            pages[0].save(buff, format="PDF", save_all=True, append_images=pages[1:])
-            buff.seek(0)
-            headers = {"Content-Disposition": f'attachment; filename="result_{job_id}_contact_sheet.pdf"'}
-            return StreamingResponse(buff, media_type="application/pdf", headers=headers)
+        zi = zip_index(zp)
+        if not zi.images:
+            return JSONResponse({"ok": False, "error": "no images"}, status_code=404)
+        members = [zi.by_name[n] for n in zi.images]
+        key = digest([zp.name, *((m.name, m.crc, m.size) for m in members), cols, rows, paper, dpi, margin])
+        cached = CONTACT_DIR / f"{key}.pdf"
+        if cached.exists():
+            lrudir.touch(cached)
+            return FileResponse(str(cached), media_type="application/pdf", headers=headers)
+
+        box = (max(1, cell_w - 8), max(1, cell_h - 8))
+        cells = downscale_many([lambda n=m.name: io.BytesIO(read_member(zi, n)) for m in members], box)
+        pt = 72.0 / dpi  # layout is in pixels at `dpi`; reportlab works in points
+        buff = io.BytesIO()
+        c = canvas.Canvas(buff, pagesize=(page_w * pt, page_h * pt), pageCompression=1)
+        i = 0
+        for cell in cells:
+            if cell is None:
+                continue
+            data, (w, h) = cell
+            x = margin + (i % cols) * cell_w + (cell_w - w)//2
+            y = margin + (i // cols % rows) * cell_h + (cell_h - h)//2
+            c.drawImage(ImageReader(io.BytesIO(data)), x * pt, (page_h - y - h) * pt, w * pt, h * pt)
+            i += 1
+            if (i % (cols*rows)) == 0:
+                c.showPage()
+        if i == 0:
+            return JSONResponse({"ok": False, "error": "no readable images"}, status_code=404)
+        if i % (cols*rows) != 0:
+            c.showPage()
+        c.save()
+        lrudir.store(cached, buff.getvalue(), CONTACT_CACHE_MB * 1024 * 1024)
+        return FileResponse(str(cached), media_type="application/pdf", headers=headers)
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
@@ -472,27 +501,21 @@ def download_result_pptx(job_id: str):
 
     try:
         from pptx import Presentation
-        from pptx.util import Inches
     except Exception:
         return JSONResponse({"ok": False, "error": "python-pptx not installed. pip install python-pptx"}, status_code=500)
 
     try:
+        from .utils.pptximg import DeckImages
         prs = Presentation()
         blank = prs.slide_layouts[6]
+        deck = DeckImages(cache_dir=proj / "data" / "cache" / "pptx")
         with zipfile.ZipFile(zp, "r") as zf:
-            names = [n for n in zf.namelist() if n.lower().endswith((".png",".jpg",".jpeg",".webp",".gif"))]
+            names = _zip_images(zp)
             if not names:
                 return JSONResponse({"ok": False, "error": "no images"}, status_code=404)
             for n in names:
                 slide = prs.slides.add_slide(blank)
-                data = zf.read(n)
-                pic = slide.shapes.add_picture(io.BytesIO(data), Inches(0), Inches(0))
-                slide_w, slide_h = prs.slide_width, prs.slide_height
-                ratio = min(slide_w / pic.width, slide_h / pic.height)
-                pic.width = int(pic.width * ratio)
-                pic.height = int(pic.height * ratio)
-                pic.left = int((slide_w - pic.width) / 2)
-                pic.top  = int((slide_h - pic.height) / 2)
+                deck.add_picture(slide.shapes, zf.read(n), 0, 0, prs.slide_width, prs.slide_height, fit=True)
         buff = io.BytesIO()
         prs.save(buff); buff.seek(0)
         headers = {"Content-Disposition": f'attachment; filename="result_{job_id}.pptx"'}
@@ -500,64 +523,85 @@ def download_result_pptx(job_id: str):
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
+def _render_response(request: Request, job, filename: str, media_type: str, status_only: bool):
+    """Serve a finished render, or 202 + poll URL while it is queued/running."""
+    poll = f"/api/render/{job.token}"
+    if job.status == "error":
+        return JSONResponse({"ok": False, "status": "error", "error": job.error, "poll": poll}, status_code=500)
+    if job.status != "done":
+        return JSONResponse({"ok": True, "status": job.status, "poll": poll, "download": str(request.url.remove_query_params("mode"))},
+                            status_code=202, headers={"Location": poll, "Retry-After": "2"})
+    if status_only:
+        return JSONResponse({"ok": True, "status": "done", "poll": poll, "download": str(request.url.remove_query_params("mode")), **job.info})
+    headers = {"X-Render-" + k.replace("_", "-").title(): str(v) for k, v in job.info.items()}
+    return FileResponse(str(job.path), media_type=media_type, filename=filename, headers=headers)
+
+def _zip_frames(zp: Path, names: list[str]):
+    """Yield open zip members one at a time (each decoded straight from the zip)."""
+    with zipfile.ZipFile(zp, "r") as zf:
+        for n in names:
+            with zf.open(n) as fh:
+                yield fh
+
+@app.get("/api/render/{token}")
+def api_render_status(token: str):
+    job = RENDERS.get(token)
+    if not job: return JSONResponse({"ok": False, "error": "unknown render"}, status_code=404)
+    return JSONResponse({"ok": job.status != "error", **job.as_dict()})
+
 @app.get("/download_result_gif/{job_id}")
-def download_result_gif(job_id: str, fps: float = 2.0, loop: int = 0):
-    """Animated GIF slideshow using Pillow only."""
+def download_result_gif(job_id: str, request: Request, fps: float = 2.0, loop: int = 0, width: int = 640, mode: str = ""):
+    """Animated GIF slideshow, rendered once in the background (202 + poll URL until ready)."""
     zp = _result_zip(job_id)
     if not zp: return JSONResponse({"ok": False, "error": "not found"}, status_code=404)
     try:
-        from PIL import Image, ImageOps, ImagePalette  # noqa
+        from .utils.gifstream import write_gif
     except Exception:
         return JSONResponse({"ok": False, "error": "Pillow not installed. pip install pillow"}, status_code=500)
 
     try:
-        with zipfile.ZipFile(zp, "r") as zf:
-            names = [n for n in zf.namelist() if n.lower().endswith((".png",".jpg",".jpeg",".webp",".gif"))]
-            if not names:
-                return JSONResponse({"ok": False, "error": "no images"}, status_code=404)
-            frames = []
-            for n in names:
-                im = Image.open(io.BytesIO(zf.read(n)))
-                im = ImageOps.exif_transpose(im)
-                if im.mode in ("RGBA", "LA"):
-                    bg = Image.new("RGB", im.size, "white"); bg.paste(im, mask=im.split()[-1])
-                    im = bg
-                frames.append(im.convert("P", palette=Image.ADAPTIVE))
-            dur = int(max(1, 1000.0 / max(0.1, float(fps))))
-            buff = io.BytesIO()
-            frames[0].save(buff, format="GIF", save_all=True, append_images=frames[1:], duration=dur, loop=max(0,int(loop)))
-            buff.seek(0)
-            headers = {"Content-Disposition": f'attachment; filename="result_{job_id}.gif"'}
-            return StreamingResponse(buff, media_type="image/gif", headers=headers)
+        zi = zip_index(zp)
+        names = list(zi.images)
+        if not names:
+            return JSONResponse({"ok": False, "error": "no images"}, status_code=404)
+        fps = max(0.1, float(fps)); loop = max(0, int(loop))
+        width = max(64, min(2048, int(width)))
+        dur = int(max(1, 1000.0 / fps))
+
+        def render(tmp: Path):
+            with tmp.open("wb") as fh:
+                frames = write_gif(_zip_frames(zp, names), fh, width=width, duration_ms=dur, loop=loop)
+            return {"frames": frames}
+
+        job = RENDERS.request((job_id, "gif", fps, loop, width, zi.mtime_ns, zi.size), ".gif", render)
+        return _render_response(request, job, f"result_{job_id}.gif", "image/gif", mode == "status")
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
 @app.get("/download_result_mp4/{job_id}")
-def download_result_mp4(job_id: str, fps: float = 2.0):
-    """MP4 slideshow (requires moviepy + imageio-ffmpeg)."""
+def download_result_mp4(job_id: str, request: Request, fps: float = 2.0, preset: str = "balanced", mode: str = ""):
+    """MP4 slideshow (raw frames piped into imageio-ffmpeg), rendered once in the background."""
     zp = _result_zip(job_id)
     if not zp: return JSONResponse({"ok": False, "error": "not found"}, status_code=404)
     try:
-        import moviepy.editor as mpy
+        from .utils.mp4pipe import encode_mp4, ffmpeg_exe
+        ffmpeg_exe()
     except Exception:
-        return JSONResponse({"ok": False, "error": "MP4 export requires moviepy and imageio-ffmpeg. pip install moviepy imageio-ffmpeg"}, status_code=500)
+        return JSONResponse({"ok": False, "error": "MP4 export requires Pillow and imageio-ffmpeg. pip install pillow imageio-ffmpeg"}, status_code=500)
 
     try:
-        with zipfile.ZipFile(zp, "r") as zf:
-            names = [n for n in zf.namelist() if n.lower().endswith((".png",".jpg",".jpeg",".webp",".gif"))]
-            if not names:
-                return JSONResponse({"ok": False, "error": "no images"}, status_code=404)
-
-            with tempfile.TemporaryDirectory() as td:
-                paths = []
-                for i,n in enumerate(names):
-                    p = Path(td) / f"frame_{i:04d}.png"
-                    p.write_bytes(zf.read(n))
-                    paths.append(str(p))
-                clip = mpy.ImageSequenceClip(paths, fps=max(0.1,float(fps)))
-                outp = Path(td) / f"result_{job_id}.mp4"
-                clip.write_videofile(str(outp), codec="libx264", audio=False, verbose=False, logger=None)
-                return FileResponse(str(outp), media_type="video/mp4", filename=outp.name)
+        zi = zip_index(zp)
+        names = list(zi.images)
+        if not names:
+            return JSONResponse({"ok": False, "error": "no images"}, status_code=404)
+        fps = max(0.1, float(fps))
+
+        def render(tmp: Path):
+            st = encode_mp4(_zip_frames(zp, names), tmp, fps=fps, preset=preset)
+            return {"frames": st["frames"], "encode_fps": st["fps"]}
+
+        job = RENDERS.request((job_id, "mp4", fps, 0, preset, zi.mtime_ns, zi.size), ".mp4", render)
+        return _render_response(request, job, f"result_{job_id}.mp4", "video/mp4", mode == "status")
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
 
@@ -597,11 +641,13 @@ def _pending_dir() -> Path:
     return PENDING_DIR
 
 @app.get("/api/pending")
-def api_pending():
-    pend = _pending_dir()
-    zips = sorted(pend.glob("job_*.zip"), key=lambda p: p.stat().st_mtime, reverse=True)
-    items = [{"job_id": p.stem.replace("job_", ""), "zip": str(p), "mtime": int(p.stat().st_mtime), "size": p.stat().st_size} for p in zips]
-    return JSONResponse({"ok": True, "items": items})
+def api_pending(limit: int = 0, offset: int = 0):
+    """Pending approvals, newest first; ``limit=0`` returns everything from ``offset``."""
+    entries = dir_index(_pending_dir(), "job_*.zip").entries()
+    offset = max(0, int(offset))
+    page = entries[offset:offset + int(limit)] if limit > 0 else entries[offset:]
+    items = [{"job_id": e.path.stem.replace("job_", ""), "zip": str(e.path), "mtime": int(e.mtime), "size": e.size} for e in page]
+    return JSONResponse({"ok": True, "items": items, "total": len(entries)})
 
 @app.post("/api/approve_job")
 async def api_approve_job(request: Request):
@@ -658,11 +704,13 @@ def index(request: Request):
     return _html(body)
 
 @app.get("/dash", response_class=HTMLResponse)
-def dashboard(request: Request):
+def dashboard(request: Request, refresh: int = 0):
     u = _current_user(request)
     if not u:
         return RedirectResponse(url="/auth/login")
 
+    if refresh:
+        request_probe()  # re-check SD now; the new result shows on the next load
     s = get_status()
     is_admin_editor = _has_role(u, "admin", "editor")
     is_viewer       = _has_role(u, "viewer")
@@ -673,7 +721,7 @@ def dashboard(request: Request):
       <div class="card">
         <div class="k">SD host</div>
         <div class="v">{s['sd_host']}</div>
-        <div class="{ 'ok' if s['sd_reachable'] else 'bad'}">{'reachable' if s['sd_reachable'] else 'down'}</div>
+        <div class="{ 'ok' if s['sd_reachable'] else 'bad'}">{'checking…' if s['sd_reachable'] is None else ('reachable' if s['sd_reachable'] else 'down')} <a href="/dash?refresh=1">re-check</a></div>
       </div>
       <div class="card">
         <div class="k">Secret</div>
@@ -949,7 +997,7 @@ async function loadResults(){
     const r=await fetch('/api/results?limit=24'); const j=await r.json(); const g=document.getElementById('gal');
     if(!j.ok||!j.items.length){ g.innerHTML='<span class=k>No results yet.</span>'; return; }
     g.innerHTML=j.items.map(x=>`<div style="text-align:center">
-      <img class="thumb" src="/result_thumb/${x.job_id}" alt="${x.job_id}"
+      <img class="thumb" src="/result_thumb/${x.job_id}?v=${x.mtime}" alt="${x.job_id}"
            onclick="lbOpen('${x.job_id}',0,${x.image_count||1})">
       <div class="k">${x.job_id} (${x.image_count||1})</div>
     </div>`).join('');
@@ -982,6 +1030,22 @@ document.addEventListener('click', (e)=>{
   if(!menu) return;
   if(!menu.contains(e.target)) menu.classList.remove('open');
 });
+/* GIF/MP4 render in the background: poll until ready, then download.
+   The tab is opened right away (inside the click) so popup blockers allow it. */
+async function renderThenOpen(url){
+  const w = window.open('', '_blank');
+  if(w) w.document.write('<p style="font-family:system-ui">Rendering…</p>');
+  const fail = (msg)=>{ if(w) w.close(); if(msg) alert(msg); };
+  for(let i=0;i<600;i++){
+    try{
+      const r = await fetch(url+'&mode=status'); const j = await r.json();
+      if(r.status===200 && j.status==='done'){ if(w) w.location.href = url; else location.href = url; return; }
+      if(!j.ok){ fail('Render failed: '+(j.error||r.status)); return; }
+    }catch(e){ fail(); return; }
+    await new Promise(res=>setTimeout(res,2000));
+  }
+  fail('Render timed out');
+}
 async function exportAs(kind){
   const menu = document.getElementById('exportMenu')?.parentElement;
   if(menu) menu.classList.remove('open');
@@ -992,8 +1056,8 @@ async function exportAs(kind){
   if(kind==='csv'){ window.open('/download_result_csv/'+job, '_blank'); return; }
   if(kind==='pdf'){ window.open('/download_contact_sheet_pdf/'+job+'?cols=3&rows=3&paper=a4&dpi=150', '_blank'); return; }
   if(kind==='pptx'){ window.open('/download_result_pptx/'+job, '_blank'); return; }
-  if(kind==='gif'){ window.open('/download_result_gif/'+job+'?fps=2', '_blank'); return; }
-  if(kind==='mp4'){ window.open('/download_result_mp4/'+job+'?fps=2', '_blank'); return; }
+  if(kind==='gif'){ renderThenOpen('/download_result_gif/'+job+'?fps=2'); return; }
+  if(kind==='mp4'){ renderThenOpen('/download_result_mp4/'+job+'?fps=2'); return; }
   if(kind==='extract'){
     try{
       const r = await fetch('/api/extract_result',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({job_id: job, open_explorer: true})});
@@ -1069,9 +1133,16 @@ def action_batch(request: Request):
     return RedirectResponse(url="/dash")
 
 @app.get("/api/status")
-def api_status():
+def api_status(refresh: int = 0):
+    if refresh:
+        request_probe()  # ?refresh=1: the prober re-checks now instead of at its next tick
     return JSONResponse(get_status())
 
+@app.get("/api/cache_stats")
+def api_cache_stats():
+    from .utils import zipindex
+    return JSONResponse({"files": filecache.stats(), "zip_index": dict(zipindex.stats)})
+
 @app.post("/api/make_job")
 async def api_make_job(request: Request):
     u = _current_user(request)
@@ -1094,12 +1165,13 @@ async def api_make_job(request: Request):
     width  = int(data.get("width", 768))
     height = int(data.get("height", 1024))
     count  = int(data.get("count", 1))
+    priority = int(data.get("priority", 0)) if is_admin_editor else 0
     region = (data.get("region") or _get_user_prefs(u["username"])["region"])
     autodrop = bool(data.get("autodrop", False)) if is_admin_editor else False
 
     job_id = f"demo_{secrets.token_hex(4)}"
     tasks = [{"type":"txt2img","prompt":prompt,"seed":seed,"steps":steps,"width":width,"height":height,"count":count}]
-    job = make_job_dict(job_id, requester=u["username"], tasks=tasks, ttl_hours=24)
+    job = make_job_dict(job_id, requester=u["username"], tasks=tasks, ttl_hours=24, priority=priority)
     job.setdefault("meta", {})["region"] = region
 
     if is_viewer: